@@ -19,6 +19,7 @@ from __future__ import print_function
 import json
 import os
 import sys
+import time
 import webbrowser
 
 import jsonschema
@@ -29,6 +30,8 @@ import yaml
 from rally import api
 from rally.cli import cliutils
 from rally.cli import envutils
+from rally.common import aggregates
+from rally.common import costilius
 from rally.common import db
 from rally.common import fileutils
 from rally.common.i18n import _
@@ -275,6 +278,64 @@ class TaskCommands(object):
         print(_("Task %(task_id)s: %(status)s")
               % {"task_id": task_id, "status": task["status"]})
 
+    @cliutils.args("--uuid", type=str, dest="task_id", help="UUID of task")
+    @cliutils.args("--interval", type=float, dest="interval", default=2.0,
+                   help="Refresh interval in seconds")
+    @envutils.with_default_task_id
+    def watch(self, task_id=None, interval=2.0):
+        """Display progress of task until it is finished.
+
+        Progress of a running scenario is available only if its results
+        are stored in chunks (see result_chunk_size option).
+
+        :param task_id: Task uuid
+        :param interval: refresh interval in seconds
+        """
+        fields = ["scenario", "iterations", "rate", "p50", "p95", "errors",
+                  "queued", "elapsed"]
+        float_cols = ["rate", "p50", "p95", "elapsed"]
+        formatters = dict(zip(float_cols,
+                              [cliutils.pretty_float_formatter(col, 3)
+                               for col in float_cols]))
+        stop_statuses = [consts.TaskStatus.FINISHED,
+                         consts.TaskStatus.FAILED,
+                         consts.TaskStatus.ABORTED]
+
+        while True:
+            task = db.task_get(task_id)
+            rows = []
+            for result in db.task_result_get_all_by_uuid(task_id):
+                row = dict.fromkeys(float_cols)
+                row["scenario"] = "%s [%s]" % (result["key"]["name"],
+                                               result["key"]["pos"])
+                progress = result["data"].get("progress")
+                summary = result["data"].get("summary")
+                if progress:
+                    done = progress["iterations_done"]
+                    total = progress["iterations_total"]
+                    row.update({
+                        "iterations": ("%d/%d" % (done, total)
+                                       if total is not None else str(done)),
+                        "rate": progress["rate"],
+                        "p50": progress["duration_p50"],
+                        "p95": progress["duration_p95"],
+                        "errors": "%.1f%%" % (progress["error_rate"] * 100),
+                        "queued": progress.get("queue_depth"),
+                        "elapsed": progress["elapsed"]})
+                elif summary:
+                    row["iterations"] = str(summary["iterations_count"])
+                rows.append(rutils.Struct(**row))
+
+            print(_("Task %(task_id)s: %(status)s")
+                  % {"task_id": task_id, "status": task["status"]})
+            if rows:
+                cliutils.print_list(rows, fields=fields,
+                                    formatters=formatters,
+                                    sortby_index=None)
+            if task["status"] in stop_statuses:
+                break
+            time.sleep(interval)
+
     @cliutils.args("--uuid", type=str, dest="task_id",
                    help=("uuid of task, if --uuid is \"last\" results of most "
                          "recently created task will be displayed."))
@@ -354,8 +415,28 @@ class TaskCommands(object):
             print("args values:")
             print(json.dumps(key["kw"], indent=2))
 
+        def _values_stats(values):
+            return [round(min(values), 3),
+                    round(utils.median(values), 3),
+                    round(utils.percentile(values, 0.90), 3),
+                    round(utils.percentile(values, 0.95), 3),
+                    round(max(values), 3),
+                    round(utils.mean(values), 3)]
+
+        def _summary_stats(summary):
+            return [round(summary.min, 3),
+                    round(summary.percentile(0.5), 3),
+                    round(summary.percentile(0.90), 3),
+                    round(summary.percentile(0.95), 3),
+                    round(summary.max, 3),
+                    round(summary.mean(), 3)]
+
+        def _get_summary(result):
+            summary = result["data"].get("summary")
+            if summary:
+                return aggregates.IterationsSummary.from_dict(summary)
+
         def _print_summrized_result(result):
-            raw = result["data"]["raw"]
             table_cols = ["action", "min", "median",
                           "90%ile", "95%ile", "max",
                           "avg", "success", "count"]
@@ -367,22 +448,35 @@ class TaskCommands(object):
                                    for col in float_cols]))
             table_rows = []
 
-            actions_data = utils.get_atomic_actions_data(raw)
+            summary = _get_summary(result)
+            if summary:
+                # Aggregated data is stored with results, so iterations
+                # are not loaded
+                count = summary.iterations_count
+                # Like for raw results, names of atomic actions are taken
+                # from successful iterations only
+                actions_data = costilius.OrderedDict(
+                    (name, durations)
+                    for name, durations in summary.atomic.items()
+                    if name in summary.atomic_passed)
+                actions_data["total"] = summary.duration
+            else:
+                raw = result["data"]["raw"]
+                count = len(raw)
+                actions_data = utils.get_atomic_actions_data(raw)
             for action in actions_data:
                 durations = actions_data[action]
-                if durations:
-                    data = [action,
-                            round(min(durations), 3),
-                            round(utils.median(durations), 3),
-                            round(utils.percentile(durations, 0.90), 3),
-                            round(utils.percentile(durations, 0.95), 3),
-                            round(max(durations), 3),
-                            round(utils.mean(durations), 3),
-                            "%.1f%%" % (len(durations) * 100.0 / len(raw)),
-                            len(raw)]
+                if summary and durations.count:
+                    data = ([action] + _summary_stats(durations) +
+                            ["%.1f%%" % (durations.count * 100.0 / count),
+                             count])
+                elif not summary and durations:
+                    data = ([action] + _values_stats(durations) +
+                            ["%.1f%%" % (len(durations) * 100.0 / count),
+                             count])
                 else:
                     data = [action, None, None, None, None, None, None,
-                            "0.0%", len(raw)]
+                            "0.0%", count]
                 table_rows.append(rutils.Struct(**dict(zip(table_cols,
                                                            data))))
 
@@ -393,16 +487,23 @@ class TaskCommands(object):
 
         def _print_ssrs_result(result):
             raw = result["data"]["raw"]
+            summary = _get_summary(result)
             # NOTE(hughsaunders): ssrs=scenario specific results
             ssrs = []
-            for result in raw:
-                data = result["scenario_output"].get("data")
-                if data:
-                    ssrs.append(data)
+            if summary:
+                ssrs = summary.output
+            else:
+                for result in raw:
+                    data = result["scenario_output"].get("data")
+                    if data:
+                        ssrs.append(data)
             if ssrs:
                 keys = set()
-                for ssr in ssrs:
-                    keys.update(ssr.keys())
+                if summary:
+                    keys.update(ssrs.keys())
+                else:
+                    for ssr in ssrs:
+                        keys.update(ssr.keys())
                 headers = ["key", "min", "median",
                            "90%ile", "95%ile", "max",
                            "avg"]
@@ -413,18 +514,19 @@ class TaskCommands(object):
                                    for col in float_cols]))
                 table_rows = []
                 for key in keys:
-                    values = [float(ssr[key]) for ssr in ssrs if key in ssr]
-
-                    if values:
-                        row = [str(key),
-                               round(min(values), 3),
-                               round(utils.median(values), 3),
-                               round(utils.percentile(values, 0.90), 3),
-                               round(utils.percentile(values, 0.95), 3),
-                               round(max(values), 3),
-                               round(utils.mean(values), 3)]
+                    if summary:
+                        row = [str(key)]
+                        if ssrs[key].count:
+                            row += _summary_stats(ssrs[key])
+                        else:
+                            row += ["n/a"] * 6
                     else:
-                        row = [str(key)] + ["n/a"] * 6
+                        values = [float(ssr[key])
+                                  for ssr in ssrs if key in ssr]
+                        if values:
+                            row = [str(key)] + _values_stats(values)
+                        else:
+                            row = [str(key)] + ["n/a"] * 6
                     table_rows.append(rutils.Struct(**dict(zip(headers,
                                                                row))))
                 print("\nScenario Specific Results\n")
@@ -433,6 +535,8 @@ class TaskCommands(object):
                                     formatters=formatters,
                                     table_label="Response Times (sec)")
 
+                if summary and not summary.output_errors:
+                    return
                 for result in raw:
                     errors = result["scenario_output"].get("errors")
                     if errors:
@@ -451,14 +555,16 @@ class TaskCommands(object):
             print(_("* To get raw JSON output of task results, run:"))
             print("\trally task results %s\n" % task["uuid"])
 
-        task = db.task_get_detailed(task_id)
-
-        if task is None:
+        # NOTE: Results are loaded lazily by get_results() below, so the
+        #       task is taken without them
+        try:
+            task = db.task_get(task_id)
+        except exceptions.TaskNotFound:
             print("The task %s can not be found" % task_id)
             return(1)
 
         if _print_task_info(task):
-            for result in task["results"]:
+            for result in objects.Task(task=task).get_results(lazy=True):
                 _print_scenario_args(result)
                 _print_summrized_result(result)
                 if iterations_data:
@@ -611,7 +717,8 @@ class TaskCommands(object):
                                "result": x["data"]["raw"],
                                "load_duration": x["data"]["load_duration"],
                                "full_duration": x["data"]["full_duration"]},
-                    objects.Task.get(task_file_or_uuid).get_results())
+                    objects.Task.get(task_file_or_uuid).get_results(
+                        lazy=True))
             else:
                 print(_("ERROR: Invalid UUID or file name passed: %s"
                         ) % task_file_or_uuid,
@@ -691,7 +798,7 @@ class TaskCommands(object):
         :param task_id: Task uuid.
         :returns: Number of failed criteria.
         """
-        results = objects.Task.get(task_id).get_results()
+        results = objects.Task.get(task_id).get_results(lazy=True)
         failed_criteria = 0
         data = []
         STATUS_PASS = "PASS"
@@ -0,0 +1,247 @@
+# Copyright 2015: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Mergeable summary of iteration results of a scenario."""
+
+import six
+
+from rally.common import costilius
+from rally.common import streaming_algorithms
+from rally.task.processing import utils
+
+
+class ValuesSummary(object):
+    """Count, min, max, mean and percentiles of a stream of numbers.
+
+    Percentiles are exact while the amount of values is not greater than
+    PercentileComputation.EXACT_LIMIT, like streaming_algorithms computes
+    them. For more values they are estimated by QuantileSketch with
+    relative error not greater than 0.5%, other values are always exact.
+    """
+
+    def __init__(self):
+        self.total = 0.0
+        self.sketch = streaming_algorithms.QuantileSketch()
+        # Values for exact percentiles, None if there are too many of them
+        self.values = []
+
+    def _check_values_limit(self):
+        limit = streaming_algorithms.PercentileComputation.EXACT_LIMIT
+        if self.values is not None and len(self.values) > limit:
+            self.values = None
+
+    @property
+    def count(self):
+        return self.sketch.count
+
+    @property
+    def min(self):
+        return self.sketch.min
+
+    @property
+    def max(self):
+        return self.sketch.max
+
+    def add(self, value):
+        self.total += value
+        self.sketch.add(value)
+        if self.values is not None:
+            self.values.append(value)
+            self._check_values_limit()
+
+    def merge(self, other):
+        self.total += other.total
+        self.sketch.merge(other.sketch)
+        if self.values is not None and other.values is not None:
+            self.values.extend(other.values)
+            self._check_values_limit()
+        else:
+            self.values = None
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def percentile(self, percent):
+        if self.values is not None:
+            return utils.percentile(self.values, percent)
+        return self.sketch.quantile(percent)
+
+    def to_dict(self):
+        return {"total": self.total, "sketch": self.sketch.to_dict(),
+                "values": self.values}
+
+    @classmethod
+    def from_dict(cls, data):
+        obj = cls()
+        obj.total = data["total"]
+        obj.sketch = streaming_algorithms.QuantileSketch.from_dict(
+            data["sketch"])
+        if data["values"] is not None:
+            obj.values = list(data["values"])
+        else:
+            obj.values = None
+        return obj
+
+
+def _merge_summaries(summaries, other):
+    for name, summary in six.iteritems(other):
+        if name in summaries:
+            summaries[name].merge(summary)
+        else:
+            summaries[name] = ValuesSummary.from_dict(summary.to_dict())
+
+
+class IterationsSummary(object):
+    """Summary of iteration results of a scenario.
+
+    The summary is computed while iterations are consumed, it takes
+    constant memory and can be stored with results of a scenario, so
+    aggregated data is available without loading all the iterations.
+    Summaries of parts of the results can be merged.
+    """
+
+    def __init__(self):
+        self.iterations_count = 0
+        self.iterations_failed = 0
+        self.tstamp_start = None
+        # Durations of successful iterations
+        self.duration = ValuesSummary()
+        # Durations of atomic actions which are not None
+        self.atomic = costilius.OrderedDict()
+        # Number of atomic actions with None duration
+        self.atomic_missed = {}
+        # Names of atomic actions of successful iterations
+        self.atomic_passed = set()
+        self.output = costilius.OrderedDict()
+        self.output_errors = 0
+
+    def add(self, iteration):
+        """Process the result of a single iteration.
+
+        :param iteration: dict, iteration result
+        """
+        self.iterations_count += 1
+        timestamp = iteration.get("timestamp")
+        if timestamp is not None and (self.tstamp_start is None or
+                                      timestamp < self.tstamp_start):
+            self.tstamp_start = timestamp
+
+        atomic_actions = iteration.get("atomic_actions", {})
+        if iteration.get("error"):
+            self.iterations_failed += 1
+        else:
+            self.duration.add(iteration.get("duration") or 0)
+            self.atomic_passed.update(atomic_actions)
+
+        for name, duration in six.iteritems(atomic_actions):
+            if name not in self.atomic:
+                self.atomic[name] = ValuesSummary()
+                self.atomic_missed[name] = 0
+            if duration is None:
+                self.atomic_missed[name] += 1
+            else:
+                self.atomic[name].add(duration)
+
+        output = iteration.get("scenario_output", {})
+        if output.get("errors"):
+            self.output_errors += 1
+        for name, value in six.iteritems(output.get("data", {})):
+            if name not in self.output:
+                self.output[name] = ValuesSummary()
+            try:
+                self.output[name].add(float(value))
+            except (TypeError, ValueError):
+                pass
+
+    def merge(self, other):
+        """Add the summary of other iterations to this one.
+
+        :param other: IterationsSummary
+        """
+        self.iterations_count += other.iterations_count
+        self.iterations_failed += other.iterations_failed
+        if other.tstamp_start is not None and (
+                self.tstamp_start is None or
+                other.tstamp_start < self.tstamp_start):
+            self.tstamp_start = other.tstamp_start
+        self.duration.merge(other.duration)
+        _merge_summaries(self.atomic, other.atomic)
+        for name, missed in six.iteritems(other.atomic_missed):
+            self.atomic_missed[name] = (
+                self.atomic_missed.get(name, 0) + missed)
+        self.atomic_passed.update(other.atomic_passed)
+        _merge_summaries(self.output, other.output)
+        self.output_errors += other.output_errors
+
+    def get_info(self):
+        """Return aggregated data in the format of Task.extend_results().
+
+        :returns: dict with info of scenario results except of full and
+                  load durations
+        """
+        atomic = costilius.OrderedDict()
+        for name, summary in six.iteritems(self.atomic):
+            # None durations are counted as 0
+            zero = 0 if self.atomic_missed[name] else None
+            atomic[name] = {
+                "min_duration": min(x for x in (summary.min, zero)
+                                    if x is not None),
+                "max_duration": max(x for x in (summary.max, zero)
+                                    if x is not None)}
+        return {"atomic": atomic,
+                "output_names": sorted(self.output),
+                "iterations_count": self.iterations_count,
+                "iterations_failed": self.iterations_failed,
+                "min_duration": self.duration.min or 0,
+                "max_duration": self.duration.max or 0,
+                "tstamp_start": self.tstamp_start or 0}
+
+    def to_dict(self):
+        """Return JSON serializable representation of the summary."""
+
+        def dump(summaries):
+            return [[name, summary.to_dict()]
+                    for name, summary in six.iteritems(summaries)]
+
+        return {"iterations_count": self.iterations_count,
+                "iterations_failed": self.iterations_failed,
+                "tstamp_start": self.tstamp_start,
+                "duration": self.duration.to_dict(),
+                "atomic": dump(self.atomic),
+                "atomic_missed": self.atomic_missed,
+                "atomic_passed": sorted(self.atomic_passed),
+                "output": dump(self.output),
+                "output_errors": self.output_errors}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create IterationsSummary from the result of to_dict()."""
+
+        def load(summaries):
+            return costilius.OrderedDict(
+                (name, ValuesSummary.from_dict(summary))
+                for name, summary in summaries)
+
+        obj = cls()
+        obj.iterations_count = data["iterations_count"]
+        obj.iterations_failed = data["iterations_failed"]
+        obj.tstamp_start = data["tstamp_start"]
+        obj.duration = ValuesSummary.from_dict(data["duration"])
+        obj.atomic = load(data["atomic"])
+        obj.atomic_missed = dict(data["atomic_missed"])
+        obj.atomic_passed = set(data["atomic_passed"])
+        obj.output = load(data["output"])
+        obj.output_errors = data["output_errors"]
+        return obj
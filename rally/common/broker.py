@@ -14,7 +14,13 @@
 #    under the License.
 
 import collections
+import itertools
+import math
+import multiprocessing
 import threading
+import time
+
+from six.moves import queue as Queue
 
 from rally.common.i18n import _
 from rally.common import log as logging
@@ -22,36 +28,163 @@ from rally.common import log as logging
 
 LOG = logging.getLogger(__name__)
 
+# Number of published jobs which may wait for consumers, per consumer
+QUEUE_SIZE_PER_CONSUMER = 100
 
-def _consumer(consume, queue):
-    """Infinity worker that consumes tasks from queue.
 
-    :param consume: method that consumes an object removed from the queue
-    :param queue: deque object to popleft() objects from
+class JobQueue(object):
+    """Bounded FIFO of jobs between a publisher and consumers.
+
+    The publisher is blocked in append() while the queue is full, consumers
+    are blocked in popleft() while it is empty. When the publisher is done
+    the queue is closed, so consumers exit when all jobs are consumed.
     """
-    cache = {}
+
+    def __init__(self, max_size=0):
+        """Queue constructor.
+
+        :param max_size: high-water mark, 0 means unlimited
+        """
+        self.max_size = max_size
+        self._items = collections.deque()
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        with self._cond:
+            return iter(list(self._items))
+
+    def append(self, item):
+        """Put a job to the queue, wait while the queue is full."""
+        with self._cond:
+            while (self.max_size and not self._closed and
+                   len(self._items) >= self.max_size):
+                self._cond.wait()
+            self._items.append(item)
+            self._cond.notify_all()
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def popleft(self):
+        """Take the oldest job, wait for it until the queue is closed.
+
+        :raises IndexError: if the queue is empty and closed
+        """
+        with self._cond:
+            while not self._items and not self._closed:
+                self._cond.wait()
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        """Mark that no jobs are expected anymore and wake everyone."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class _JobStats(object):
+    """Thread safe statistics of consumed jobs."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+        self.failed = 0
+        self.retried = 0
+        self.duration_total = 0.0
+        self.duration_max = 0.0
+
+    def add(self, duration, success, retries):
+        with self.lock:
+            self.count += 1
+            self.failed += 0 if success else 1
+            self.retried += retries
+            self.duration_total += duration
+            self.duration_max = max(self.duration_max, duration)
+
+    def merge(self, other):
+        """Add statistics returned by result() of other _JobStats."""
+        with self.lock:
+            self.count += other["count"]
+            self.failed += other["failed"]
+            self.retried += other["retried"]
+            self.duration_total += other["duration_total"]
+            self.duration_max = max(self.duration_max,
+                                    other["duration_max"])
+
+    def result(self):
+        with self.lock:
+            return {"count": self.count,
+                    "failed": self.failed,
+                    "retried": self.retried,
+                    "duration_total": self.duration_total,
+                    "duration_max": self.duration_max}
+
+
+def _consume_job(consume, cache, args, retries, retry_interval):
+    """Call consume() retrying it with exponential backoff.
+
+    :returns: tuple (result, success, number of retries)
+    """
+    attempt = 0
     while True:
-        if not queue:
-            break
-        else:
-            try:
-                args = queue.popleft()
-            except IndexError:
-                # consumed by other thread
-                continue
         try:
-            consume(cache, args)
+            return consume(cache, args), True, attempt
         except Exception as e:
+            if attempt < retries:
+                LOG.debug("Failed to consume a task from the queue, "
+                          "retrying: %s" % e)
+                time.sleep(retry_interval * 2 ** attempt)
+                attempt += 1
+                continue
             LOG.warning(_("Failed to consume a task from the queue: %s") % e)
             if logging.is_debug():
                 LOG.exception(e)
+            return None, False, attempt
+
+
+def _consumer(consume, queue, results=None, stats=None, retries=0,
+              retry_interval=1.0):
+    """Worker that consumes tasks from queue until it is closed and empty.
+
+    :param consume: method that consumes an object removed from the queue
+    :param queue: JobQueue object to popleft() objects from
+    :param results: object with append() method which receives values
+                    returned by consume() except of None
+    :param stats: _JobStats object to collect durations of jobs
+    :param retries: number of times a failed job is retried
+    :param retry_interval: seconds before the first retry, the interval is
+                           doubled for each next retry
+    """
+    cache = {}
+    while True:
+        try:
+            args = queue.popleft()
+        except IndexError:
+            # The queue is closed and all jobs are consumed
+            break
+        started_at = time.time()
+        result, success, retried = _consume_job(consume, cache, args,
+                                                retries, retry_interval)
+        if stats is not None:
+            stats.add(time.time() - started_at, success, retried)
+        if result is not None and results is not None:
+            results.append(result)
 
 
 def _publisher(publish, queue):
     """Calls a publish method that fills queue with jobs.
 
+    The queue is closed when publish() is finished, even if it fails.
+
     :param publish: method that fills the queue
-    :param queue: deque object to be filled by the publish() method
+    :param queue: JobQueue object to be filled by the publish() method
     """
     try:
         publish(queue)
@@ -59,28 +192,176 @@ def _publisher(publish, queue):
         LOG.warning(_("Failed to publish a task to the queue: %s") % e)
         if logging.is_debug():
             LOG.exception(e)
+    finally:
+        queue.close()
+
+
+def _run_consumers(consume, queue, consumers_count, results, stats,
+                   retries=0, retry_interval=1.0):
+    consumers = []
+    for i in range(consumers_count):
+        consumer = threading.Thread(
+            target=_consumer,
+            args=(consume, queue, results, stats, retries, retry_interval))
+        consumer.start()
+        consumers.append(consumer)
+
+    for consumer in consumers:
+        consumer.join()
+
+
+class _BatchSender(object):
+    """Sends consumed results to the parent process in batches."""
+
+    def __init__(self, results_queue, batch_size):
+        self.results_queue = results_queue
+        self.batch_size = batch_size
+        self.batch = []
+        self.lock = threading.Lock()
 
+    def append(self, result):
+        with self.lock:
+            self.batch.append(result)
+            if len(self.batch) >= self.batch_size:
+                self.flush()
 
-def run(publish, consume, consumers_count=1):
+    def flush(self):
+        if self.batch:
+            self.results_queue.put(self.batch)
+            self.batch = []
+
+
+def _process_consumer(consume, items, consumers_count, results_queue,
+                      batch_size, retries, retry_interval):
+    """Consume items with threads of the worker process.
+
+    :param consume: method that consumes a single item
+    :param items: list of items for this process
+    :param consumers_count: number of consumer threads
+    :param results_queue: multiprocessing.Queue for lists of results, dict
+                          with statistics of jobs is put when all items are
+                          consumed
+    :param batch_size: number of results sent to the parent at once
+    :param retries: number of times a failed job is retried
+    :param retry_interval: seconds before the first retry
+    """
+    sender = _BatchSender(results_queue, batch_size)
+    stats = _JobStats()
+    queue = JobQueue()
+    queue.extend(items)
+    queue.close()
+    try:
+        _run_consumers(consume, queue, consumers_count, sender, stats,
+                       retries, retry_interval)
+        sender.flush()
+    finally:
+        results_queue.put(stats.result())
+
+
+def _run_processes(queue, consume, consumers_count, processes_count,
+                   batch_size, stats, retries, retry_interval):
+    if not queue:
+        return []
+
+    # Items are distributed between processes before they are started,
+    # so only results are transferred between processes
+    threads_per_process = int(math.ceil(float(consumers_count) /
+                                        processes_count))
+    results_queue = multiprocessing.Queue()
+    processes = []
+    for i in range(min(processes_count, len(queue))):
+        items = list(itertools.islice(queue, i, None, processes_count))
+        process = multiprocessing.Process(
+            target=_process_consumer,
+            args=(consume, items, threads_per_process, results_queue,
+                  batch_size, retries, retry_interval))
+        process.start()
+        processes.append(process)
+
+    results = []
+    running = len(processes)
+    while running:
+        try:
+            batch = results_queue.get(timeout=1)
+        except Queue.Empty:
+            if not any(process.is_alive() for process in processes):
+                LOG.warning(_("Broker worker processes exited without "
+                              "reporting all results"))
+                break
+            continue
+        if isinstance(batch, dict):
+            stats.merge(batch)
+            running -= 1
+        else:
+            results.extend(batch)
+
+    for process in processes:
+        process.join()
+    return results
+
+
+def run(publish, consume, consumers_count=1, processes_count=0,
+        batch_size=100, queue_size=None, retries=0, retry_interval=1.0):
     """Run broker.
 
     publish() put to queue, consume() process one element from queue.
 
-    When publish() is finished and elements from queue are processed process
-    is finished all consumers threads are cleaned.
+    publish() is run in a separate thread at the same time with consumers
+    threads. The queue is bounded, so publish() waits while consumers are
+    busy and the whole list of jobs is not kept in memory. When publish()
+    is finished and elements from queue are processed, consumers threads
+    are finished.
+
+    If processes_count is set, publish() is finished first, then elements
+    are split between worker processes, each of them runs its share of
+    consumers threads. This avoids GIL contention when consume() is CPU
+    bound. consume() is called in the worker processes, so it has to return
+    results instead of storing them in the caller's objects, the results
+    are sent back in batches.
 
     :param publish: Function that puts values to the queue
     :param consume: Function that processes a single value from the queue
     :param consumers_count: Number of consumers
+    :param processes_count: Number of worker processes, 0 means that
+                            consumers are threads of the current process
+    :param batch_size: Number of results sent from a worker process at once
+    :param queue_size: Maximum number of values waiting for consumers,
+                       by default QUEUE_SIZE_PER_CONSUMER per consumer
+    :param retries: Number of times consume() is retried if it fails
+    :param retry_interval: Seconds before the first retry, the interval is
+                           doubled for each next retry
+    :returns: list of values returned by consume() except of None
     """
-    queue = collections.deque()
-    _publisher(publish, queue)
+    stats = _JobStats()
+    started_at = time.time()
 
-    consumers = []
-    for i in range(consumers_count):
-        consumer = threading.Thread(target=_consumer, args=(consume, queue))
-        consumer.start()
-        consumers.append(consumer)
+    if processes_count:
+        queue = JobQueue()
+        _publisher(publish, queue)
+        results = _run_processes(queue, consume, consumers_count,
+                                 processes_count, batch_size, stats,
+                                 retries, retry_interval)
+    else:
+        if queue_size is None:
+            queue_size = QUEUE_SIZE_PER_CONSUMER * consumers_count
+        queue = JobQueue(queue_size)
+        publisher = threading.Thread(target=_publisher,
+                                     args=(publish, queue))
+        publisher.start()
+        results = collections.deque()
+        _run_consumers(consume, queue, consumers_count, results, stats,
+                       retries, retry_interval)
+        publisher.join()
+        results = list(results)
 
-    for consumer in consumers:
-        consumer.join()
+    stats = stats.result()
+    LOG.debug("Broker consumed %(count)d jobs in %(duration).3fs: "
+              "%(failed)d failed, %(retried)d retries, job duration avg "
+              "%(avg).3fs, max %(max).3fs"
+              % {"count": stats["count"], "failed": stats["failed"],
+                 "retried": stats["retried"],
+                 "duration": time.time() - started_at,
+                 "avg": (stats["duration_total"] / stats["count"]
+                         if stats["count"] else 0.0),
+                 "max": stats["duration_max"]})
+    return results
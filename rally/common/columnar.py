@@ -0,0 +1,259 @@
+# Copyright 2015: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Compact columnar representation of iteration results."""
+
+import array
+import math
+
+import six
+
+# Marker of a value that is absent in the iteration
+_MISSING = float("nan")
+
+_NUMBER_TYPES = six.integer_types + (float,)
+
+
+def _is_number(value):
+    return isinstance(value, _NUMBER_TYPES) and not isinstance(value, bool)
+
+
+def _is_default_output(output):
+    return (isinstance(output, dict) and output.get("data") == {} and
+            output.get("errors") == "" and len(output) == 2)
+
+
+class IterationResults(object):
+    """Stores iteration results column by column.
+
+    Numeric fields (duration, timestamp, idle_duration, ...) are stored in
+    typed arrays, names of atomic actions and types of errors are stored
+    once and referenced by index. Rare values (error messages, non empty
+    scenario output, non numeric fields) are stored per iteration.
+
+    Iterations are appended and read as dicts in the format of
+    rally.task.runner.ScenarioRunnerResult, so the representation is
+    transparent for consumers.
+    """
+
+    def __init__(self):
+        self._count = 0
+        self._numeric = {}
+        self._atomic_names = []
+        self._atomic_index = {}
+        self._atomic_layouts = []
+        self._atomic_layout_index = {}
+        self._atomic_layout = array.array("i")
+        self._atomic = []
+        self._error_types = []
+        self._error_type_index = {}
+        self._error_type = array.array("i")
+        self._errors = {}
+        self._output = array.array("b")
+        self._outputs = {}
+        self._other = {}
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for i in six.moves.range(self._count):
+            yield self[i]
+
+    def _new_column(self):
+        return array.array("d", [_MISSING]) * self._count
+
+    def _index_of(self, value, values, index):
+        if value not in index:
+            index[value] = len(values)
+            values.append(value)
+        return index[value]
+
+    def append(self, result):
+        """Append a single iteration result.
+
+        :param result: dict with iteration result
+        """
+        row = self._count
+        other = {}
+        for key, value in six.iteritems(result):
+            if key == "atomic_actions" and isinstance(value, dict):
+                self._append_atomic(row, value)
+            elif key == "error" and isinstance(value, list):
+                self._append_error(row, value)
+            elif key == "scenario_output" and _is_default_output(value):
+                self._output.append(1)
+            elif key == "scenario_output":
+                self._output.append(2)
+                self._outputs[row] = value
+            elif _is_number(value):
+                if key not in self._numeric:
+                    self._numeric[key] = self._new_column()
+                self._numeric[key].append(value)
+            else:
+                other[key] = value
+        if other:
+            self._other[row] = other
+        self._count += 1
+
+        for key, column in six.iteritems(self._numeric):
+            if len(column) == row:
+                column.append(_MISSING)
+        if len(self._atomic_layout) == row:
+            self._atomic_layout.append(-1)
+        if len(self._error_type) == row:
+            self._error_type.append(-1)
+        if len(self._output) == row:
+            self._output.append(0)
+        for column in self._atomic:
+            if len(column) == row:
+                column.append(_MISSING)
+
+    def _append_atomic(self, row, atomic_actions):
+        layout = []
+        for name, duration in six.iteritems(atomic_actions):
+            index = self._index_of(name, self._atomic_names,
+                                   self._atomic_index)
+            if index == len(self._atomic):
+                self._atomic.append(self._new_column())
+            # None is stored as a missing value, the layout tells that the
+            # action is present
+            self._atomic[index].append(
+                _MISSING if duration is None else duration)
+            layout.append(index)
+        self._atomic_layout.append(self._index_of(
+            tuple(layout), self._atomic_layouts, self._atomic_layout_index))
+
+    def _append_error(self, row, error):
+        if not error:
+            self._error_type.append(-2)
+            return
+        self._error_type.append(self._index_of(
+            error[0], self._error_types, self._error_type_index))
+        if len(error) > 1:
+            self._errors[row] = error[1:]
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += self._count
+        if not 0 <= row < self._count:
+            raise IndexError("Iteration %s does not exist" % row)
+
+        result = {}
+        for key, column in six.iteritems(self._numeric):
+            if not math.isnan(column[row]):
+                result[key] = column[row]
+
+        layout = self._atomic_layout[row]
+        if layout >= 0:
+            atomic_actions = {}
+            for index in self._atomic_layouts[layout]:
+                duration = self._atomic[index][row]
+                atomic_actions[self._atomic_names[index]] = (
+                    None if math.isnan(duration) else duration)
+            result["atomic_actions"] = atomic_actions
+
+        error_type = self._error_type[row]
+        if error_type == -2:
+            result["error"] = []
+        elif error_type >= 0:
+            result["error"] = ([self._error_types[error_type]] +
+                               list(self._errors.get(row, [])))
+
+        if self._output[row] == 1:
+            result["scenario_output"] = {"errors": "", "data": {}}
+        elif self._output[row] == 2:
+            result["scenario_output"] = self._outputs[row]
+        result.update(self._other.get(row, {}))
+        return result
+
+    def iter_sorted(self, field):
+        """Iterate over iterations in order of the numeric field.
+
+        Iterations without the field go last.
+
+        :param field: name of the numeric field, e.g. "timestamp"
+        """
+        column = self._numeric.get(field)
+        if column is None:
+            return iter(self)
+
+        inf = float("inf")
+        rows = sorted(six.moves.range(self._count),
+                      key=lambda i: inf if math.isnan(column[i])
+                      else column[i])
+        return (self[row] for row in rows)
+
+    def to_dict(self):
+        """Return JSON serializable representation of iterations."""
+
+        def dump_column(column):
+            return [None if math.isnan(v) else v for v in column]
+
+        return {
+            "count": self._count,
+            "numeric": dict((key, dump_column(column))
+                            for key, column in six.iteritems(self._numeric)),
+            "atomic_names": self._atomic_names,
+            "atomic_layouts": [list(x) for x in self._atomic_layouts],
+            "atomic_layout": self._atomic_layout.tolist(),
+            "atomic": [dump_column(column) for column in self._atomic],
+            "error_types": self._error_types,
+            "error_type": self._error_type.tolist(),
+            # JSON keys are strings
+            "errors": dict((str(k), v) for k, v in
+                           six.iteritems(self._errors)),
+            "output": self._output.tolist(),
+            "outputs": dict((str(k), v) for k, v in
+                            six.iteritems(self._outputs)),
+            "other": dict((str(k), v) for k, v in
+                          six.iteritems(self._other))
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create IterationResults from the result of to_dict().
+
+        :param data: dict returned by IterationResults.to_dict()
+        """
+
+        def load_column(values):
+            return array.array(
+                "d", [_MISSING if v is None else v for v in values])
+
+        obj = cls()
+        obj._count = data["count"]
+        obj._numeric = dict((key, load_column(values))
+                            for key, values in six.iteritems(data["numeric"]))
+        obj._atomic_names = list(data["atomic_names"])
+        obj._atomic_index = dict(
+            (name, i) for i, name in enumerate(obj._atomic_names))
+        obj._atomic_layouts = [tuple(x) for x in data["atomic_layouts"]]
+        obj._atomic_layout_index = dict(
+            (layout, i) for i, layout in enumerate(obj._atomic_layouts))
+        obj._atomic_layout = array.array("i", data["atomic_layout"])
+        obj._atomic = [load_column(values) for values in data["atomic"]]
+        obj._error_types = list(data["error_types"])
+        obj._error_type_index = dict(
+            (name, i) for i, name in enumerate(obj._error_types))
+        obj._error_type = array.array("i", data["error_type"])
+        obj._errors = dict((int(k), v) for k, v in
+                           six.iteritems(data["errors"]))
+        obj._output = array.array("b", data["output"])
+        obj._outputs = dict((int(k), v) for k, v in
+                            six.iteritems(data["outputs"]))
+        obj._other = dict((int(k), v) for k, v in
+                          six.iteritems(data["other"]))
+        return obj
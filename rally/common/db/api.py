@@ -196,6 +196,39 @@ def task_result_create(task_uuid, key, data):
     return get_impl().task_result_create(task_uuid, key, data)
 
 
+def task_result_update(result_id, data):
+    """Update data of task result record.
+
+    :param result_id: id of TaskResult instance.
+    :param data: data expected to be stored in task result.
+    :raises NotFoundException: if the task result does not exist.
+    :returns: TaskResult instance updated.
+    """
+    return get_impl().task_result_update(result_id, data)
+
+
+def task_result_chunk_create(result_id, position, data):
+    """Append a chunk of iterations to task result.
+
+    :param result_id: id of TaskResult instance.
+    :param position: int, position of the chunk in task result.
+    :param data: data expected to be stored in the chunk.
+    :returns: TaskResultChunk instance appended.
+    """
+    return get_impl().task_result_chunk_create(result_id, position, data)
+
+
+def task_result_chunk_get_all(result_id):
+    """Get chunks of iterations of task result.
+
+    Chunks are loaded from database one by one.
+
+    :param result_id: id of TaskResult instance.
+    :returns: iterator over TaskResultChunk instances in order of positions.
+    """
+    return get_impl().task_result_chunk_get_all(result_id)
+
+
 def deployment_create(values):
     """Create a deployment from the values dictionary.
 
@@ -32,6 +32,9 @@ from rally import exceptions
 CONF = cfg.CONF
 
 _FACADE = None
+# Whether the table of task result chunks is known to exist, see
+# Connection._ensure_task_result_chunks_table()
+_TASK_RESULT_CHUNKS_TABLE_EXISTS = False
 
 
 def _create_facade_lazily():
@@ -61,15 +64,32 @@ def get_backend():
 class Connection(object):
 
     def db_cleanup(self):
-        global _FACADE
+        global _FACADE, _TASK_RESULT_CHUNKS_TABLE_EXISTS
 
         _FACADE = None
+        _TASK_RESULT_CHUNKS_TABLE_EXISTS = False
 
     def db_create(self):
         models.create_db()
 
     def db_drop(self):
+        global _TASK_RESULT_CHUNKS_TABLE_EXISTS
+
         models.drop_db()
+        _TASK_RESULT_CHUNKS_TABLE_EXISTS = False
+
+    def _ensure_task_result_chunks_table(self):
+        """Create the table of task result chunks if it is missing.
+
+        Databases created by previous versions of Rally have no such table,
+        so it is created on first use instead of recreating the database.
+        """
+        global _TASK_RESULT_CHUNKS_TABLE_EXISTS
+
+        if not _TASK_RESULT_CHUNKS_TABLE_EXISTS:
+            models.TaskResultChunk.__table__.create(bind=get_engine(),
+                                                    checkfirst=True)
+            _TASK_RESULT_CHUNKS_TABLE_EXISTS = True
 
     def model_query(self, model, session=None):
         """The helper method to create query.
@@ -165,6 +185,7 @@ class Connection(object):
         return query.all()
 
     def task_delete(self, uuid, status=None):
+        self._ensure_task_result_chunks_table()
         session = get_session()
         with session.begin():
             query = base_query = (self.model_query(models.Task).
@@ -172,8 +193,16 @@ class Connection(object):
             if status is not None:
                 query = base_query.filter_by(status=status)
 
-            (self.model_query(models.TaskResult).filter_by(task_uuid=uuid).
-             delete(synchronize_session=False))
+            results = (self.model_query(models.TaskResult).
+                       filter_by(task_uuid=uuid))
+            result_ids = [result.id for result in
+                          results.options(sa_loadonly("id"))]
+            if result_ids:
+                (self.model_query(models.TaskResultChunk).
+                 filter(models.TaskResultChunk.task_result_id.in_(
+                     result_ids)).
+                 delete(synchronize_session=False))
+            results.delete(synchronize_session=False)
 
             count = query.delete(synchronize_session=False)
             if not count:
@@ -195,6 +224,36 @@ class Connection(object):
         return (self.model_query(models.TaskResult).
                 filter_by(task_uuid=uuid).all())
 
+    def task_result_update(self, result_id, data):
+        session = get_session()
+        with session.begin():
+            result = (self.model_query(models.TaskResult, session=session).
+                      filter_by(id=result_id).first())
+            if not result:
+                raise exceptions.NotFoundException(
+                    "Can't find task result with id '%s'." % result_id)
+            result.update({"data": data})
+        return result
+
+    def task_result_chunk_create(self, result_id, position, data):
+        self._ensure_task_result_chunks_table()
+        chunk = models.TaskResultChunk()
+        chunk.update({"task_result_id": result_id, "position": position,
+                      "data": data})
+        chunk.save()
+        return chunk
+
+    def task_result_chunk_get_all(self, result_id):
+        self._ensure_task_result_chunks_table()
+        query = (self.model_query(models.TaskResultChunk).
+                 filter_by(task_result_id=result_id).
+                 order_by(models.TaskResultChunk.position))
+        # Chunks are fetched from the database one by one, so only a single
+        # chunk is kept in memory at once
+        for chunk_id, in query.with_entities(models.TaskResultChunk.id):
+            yield (self.model_query(models.TaskResultChunk).
+                   filter_by(id=chunk_id).one())
+
     def _deployment_get(self, deployment, session=None):
         stored_deployment = self.model_query(
             models.Deployment,
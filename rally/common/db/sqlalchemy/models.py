@@ -183,6 +183,22 @@ class TaskResult(BASE, RallyBase):
                                primaryjoin="TaskResult.task_uuid == Task.uuid")
 
 
+class TaskResultChunk(BASE, RallyBase):
+    """Represents a part of iterations of TaskResult."""
+    __tablename__ = "task_result_chunks"
+    __table_args__ = (
+        sa.Index("task_result_chunk_result_id", "task_result_id", "position"),
+    )
+
+    id = sa.Column(sa.Integer, primary_key=True, autoincrement=True)
+    position = sa.Column(sa.Integer, nullable=False)
+
+    data = sa.Column(sa_types.BigMutableJSONEncodedDict, nullable=False)
+
+    task_result_id = sa.Column(sa.Integer, sa.ForeignKey(TaskResult.id),
+                               nullable=False)
+
+
 class Verification(BASE, RallyBase):
     """Represents a verifier result."""
 
@@ -13,9 +13,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import heapq
 import json
 import uuid
 
+from rally.common import aggregates
+from rally.common import columnar
 from rally.common import costilius
 from rally.common import db
 from rally.common.i18n import _LE
@@ -209,6 +212,50 @@ TASK_EXTENDED_RESULT_SCHEMA = {
 }
 
 
+class ChunkedIterations(object):
+    """Iterations of scenario results which are stored in chunks.
+
+    Chunks are loaded from the database on first use and kept in the
+    compact columnar form, iterations are converted to dicts only while
+    iterating. Iterations are returned in order of starting and can be
+    iterated over many times.
+    """
+
+    def __init__(self, result_id):
+        self.result_id = result_id
+        self._chunks = None
+
+    def _get_chunks(self):
+        if self._chunks is None:
+            self._chunks = []
+            for chunk in db.task_result_chunk_get_all(self.result_id):
+                if "columnar" in chunk["data"]:
+                    self._chunks.append(columnar.IterationResults.from_dict(
+                        chunk["data"]["columnar"]))
+                else:
+                    self._chunks.append(chunk["data"]["raw"])
+        return self._chunks
+
+    def __len__(self):
+        return sum(len(chunk) for chunk in self._get_chunks())
+
+    def __iter__(self):
+        # Chunks are stored in order of ending, so iterations of each
+        # chunk are sorted and chunks are merged in order of starting
+        sorted_chunks = []
+        for chunk_pos, chunk in enumerate(self._get_chunks()):
+            if isinstance(chunk, columnar.IterationResults):
+                iterations = chunk.iter_sorted("timestamp")
+            else:
+                iterations = iter(sorted(chunk,
+                                         key=lambda x: x["timestamp"]))
+            sorted_chunks.append(
+                (itr["timestamp"], chunk_pos, pos, itr)
+                for pos, itr in enumerate(iterations))
+        for item in heapq.merge(*sorted_chunks):
+            yield item[-1]
+
+
 class Task(object):
     """Represents a task object."""
 
@@ -278,8 +325,69 @@ class Task(object):
         self._update({"status": consts.TaskStatus.FAILED,
                       "verification_log": json.dumps(log)})
 
-    def get_results(self):
-        return db.task_result_get_all_by_uuid(self.task["uuid"])
+    def get_results(self, lazy=False):
+        """Get results of the task.
+
+        Iterations of results which are stored in chunks are loaded only
+        when the corresponding result is taken from the iterator.
+
+        :param lazy: if True, iterations stored in chunks are returned as
+                     an iterable which keeps them in the compact columnar
+                     form and converts them to dicts only while iterating,
+                     otherwise as a list of dicts
+        :returns: iterator over dicts with results of scenarios
+        """
+        for result in db.task_result_get_all_by_uuid(self.task["uuid"]):
+            result = dict(result)
+            if result["data"].get("chunked"):
+                raw = ChunkedIterations(result["id"])
+                result["data"] = dict(result["data"])
+                result["data"]["raw"] = raw if lazy else list(raw)
+            yield result
+
+    @staticmethod
+    def _scan_iterations(iterations):
+        iterations_count = 0
+        tstamp_start = 0
+        min_duration = 0
+        max_duration = 0
+        iterations_failed = 0
+        atomic = costilius.OrderedDict()
+        output_names = set()
+
+        for itr in iterations:
+            iterations_count += 1
+            for atomic_name, duration in itr["atomic_actions"].items():
+                duration = duration or 0
+                if atomic_name not in atomic:
+                    atomic[atomic_name] = {"min_duration": duration,
+                                           "max_duration": duration}
+                elif duration < atomic[atomic_name]["min_duration"]:
+                    atomic[atomic_name]["min_duration"] = duration
+                elif duration > atomic[atomic_name]["max_duration"]:
+                    atomic[atomic_name]["max_duration"] = duration
+
+            output_names.update(itr["scenario_output"]["data"].keys())
+
+            if not tstamp_start or itr["timestamp"] < tstamp_start:
+                tstamp_start = itr["timestamp"]
+
+            if itr["error"]:
+                iterations_failed += 1
+            else:
+                duration = itr["duration"] or 0
+                if not min_duration or duration < min_duration:
+                    min_duration = duration
+                if not max_duration or duration > max_duration:
+                    max_duration = duration
+
+        return {"atomic": atomic,
+                "output_names": list(output_names),
+                "iterations_count": iterations_count,
+                "iterations_failed": iterations_failed,
+                "min_duration": min_duration,
+                "max_duration": max_duration,
+                "tstamp_start": tstamp_start}
 
     @classmethod
     def extend_results(cls, results, serializable=False):
@@ -291,18 +399,20 @@ class Task(object):
         be taken as-is directly from the database.
 
         Each scenario results have extra `info' with aggregated data,
-        and iterations data is represented by iterator - this simplifies
-        its future implementation as generator and gives ability to process
-        arbitrary number of iterations with low memory usage.
+        and iterations data is represented by iterator. Results are
+        processed one by one and `info' is computed in a single pass over
+        iterations, so together with Task.get_results(lazy=True) arbitrary
+        number of iterations can be processed with low memory usage.
 
-        :param results: list of db.sqlalchemy.models.TaskResult
+        :param results: iterable of db.sqlalchemy.models.TaskResult or
+                        dicts returned by Task.get_results()
         :param serializable: bool, whether to convert json non-serializable
                              types (like datetime) to serializable ones
-        :returns: list of dicts, each dict represents scenario results:
+        :returns: generator of dicts, each dict represents scenario results:
                   key - dict, scenario input data
                   sla - list, SLA results
-                  iterations - if serializiable, then iterator with
-                               iterations data, otherwise a list
+                  iterations - if serializiable, then a list with
+                               iterations data, otherwise an iterator
                   created_at - if serializiable, then str datetime,
                                otherwise absent
                   updated_at - if serializiable, then str datetime,
@@ -320,40 +430,17 @@ class Task(object):
                       full_duration - float full scenario duration
                       load_duration - float load scenario duration
         """
-        extended = []
         for scenario_result in results:
             scenario = dict(scenario_result)
-            tstamp_start = 0
-            min_duration = 0
-            max_duration = 0
-            iterations_failed = 0
-            atomic = costilius.OrderedDict()
-            output_names = set()
-
-            for itr in scenario["data"]["raw"]:
-                for atomic_name, duration in itr["atomic_actions"].items():
-                    duration = duration or 0
-                    if atomic_name not in atomic:
-                        atomic[atomic_name] = {"min_duration": duration,
-                                               "max_duration": duration}
-                    elif duration < atomic[atomic_name]["min_duration"]:
-                        atomic[atomic_name]["min_duration"] = duration
-                    elif duration > atomic[atomic_name]["max_duration"]:
-                        atomic[atomic_name]["max_duration"] = duration
-
-                output_names.update(itr["scenario_output"]["data"].keys())
-
-                if not tstamp_start or itr["timestamp"] < tstamp_start:
-                    tstamp_start = itr["timestamp"]
-
-                if itr["error"]:
-                    iterations_failed += 1
-                else:
-                    duration = itr["duration"] or 0
-                    if not min_duration or duration < min_duration:
-                        min_duration = duration
-                    if not max_duration or duration > max_duration:
-                        max_duration = duration
+            if scenario["data"].get("summary"):
+                # Aggregated data is stored with results, so there is
+                # no need to go through iterations
+                info = aggregates.IterationsSummary.from_dict(
+                    scenario["data"]["summary"]).get_info()
+            else:
+                info = cls._scan_iterations(scenario["data"]["raw"])
+            info["full_duration"] = scenario["data"]["full_duration"]
+            info["load_duration"] = scenario["data"]["load_duration"]
 
             for k in "created_at", "updated_at":
                 if serializable:
@@ -364,30 +451,61 @@ class Task(object):
                 else:
                     del scenario[k]
 
-            scenario["info"] = {
-                "atomic": atomic,
-                "output_names": list(output_names),
-                "iterations_count": len(scenario["data"]["raw"]),
-                "iterations_failed": iterations_failed,
-                "min_duration": min_duration,
-                "max_duration": max_duration,
-                "tstamp_start": tstamp_start,
-                "full_duration": scenario["data"]["full_duration"],
-                "load_duration": scenario["data"]["load_duration"]}
+            scenario["info"] = info
             if serializable:
-                scenario["iterations"] = scenario["data"]["raw"]
+                scenario["iterations"] = list(scenario["data"]["raw"])
             else:
                 scenario["iterations"] = iter(scenario["data"]["raw"])
             scenario["sla"] = scenario["data"]["sla"]
             del scenario["data"]
             del scenario["task_uuid"]
             del scenario["id"]
-            extended.append(scenario)
-        return extended
+            yield scenario
 
     def append_results(self, key, value):
         db.task_result_create(self.task["uuid"], key, value)
 
+    def create_results(self, key):
+        """Create results of a scenario which are stored in chunks.
+
+        :param key: scenario identifier
+        :returns: id of the created results
+        """
+        return db.task_result_create(
+            self.task["uuid"], key,
+            {"raw": [], "load_duration": 0, "full_duration": 0, "sla": [],
+             "chunked": True})["id"]
+
+    def update_progress(self, result_id, progress):
+        """Store progress of a scenario which is still running.
+
+        :param result_id: id of results returned by create_results()
+        :param progress: dict returned by ResultConsumer.get_progress()
+        """
+        db.task_result_update(
+            result_id,
+            {"raw": [], "load_duration": 0, "full_duration": 0, "sla": [],
+             "chunked": True, "progress": progress})
+
+    def append_results_chunk(self, result_id, position, iterations):
+        """Store a chunk of iterations of scenario results.
+
+        :param result_id: id of results returned by create_results()
+        :param position: int, number of the chunk
+        :param iterations: columnar.IterationResults instance
+        """
+        db.task_result_chunk_create(result_id, position,
+                                    {"columnar": iterations.to_dict()})
+
+    def update_results(self, result_id, value):
+        """Update results created by create_results().
+
+        :param result_id: id of results returned by create_results()
+        :param value: dict with load_duration, full_duration and sla
+        """
+        value = dict(value, raw=[], chunked=True)
+        db.task_result_update(result_id, value)
+
     def delete(self, status=None):
         db.task_delete(self.task["uuid"], status=status)
 
@@ -28,6 +28,8 @@ from rally.plugins.openstack.scenarios.murano import utils as murano_utils
 from rally.plugins.openstack.scenarios.nova import utils as nova_utils
 from rally.plugins.openstack.scenarios.sahara import utils as sahara_utils
 from rally.plugins.openstack.scenarios.vm import utils as vm_utils
+from rally.task import engine
+from rally.task import runner
 from rally.verification.tempest import config as tempest_conf
 
 
@@ -46,7 +48,9 @@ def list_opts():
                          murano_utils.MURANO_BENCHMARK_OPTS,
                          nova_utils.NOVA_BENCHMARK_OPTS,
                          sahara_utils.SAHARA_BENCHMARK_OPTS,
-                         vm_utils.VM_BENCHMARK_OPTS)),
+                         vm_utils.VM_BENCHMARK_OPTS,
+                         runner.RUNNER_OPTS,
+                         engine.ENGINE_OPTS)),
         ("image",
          itertools.chain(tempest_conf.IMAGE_OPTS)),
         ("role", itertools.chain(tempest_conf.ROLE_OPTS)),
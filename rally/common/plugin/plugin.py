@@ -13,12 +13,110 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import threading
+import weakref
+
+from oslo_utils import importutils
+
 from rally.common.plugin import discover
 from rally.common.plugin import info
 from rally.common.plugin import meta
 from rally import exceptions
 
 
+# Index of configured plugins: plugin name -> list of weak references to
+# plugin classes. Weak references are used to keep the behaviour of
+# discover.itersubclasses(): plugin disappears together with its class.
+_PLUGINS_BY_NAME = collections.defaultdict(list)
+
+
+def _index_plugin(plugin):
+    refs = _PLUGINS_BY_NAME[plugin.get_name()]
+    if not any(ref() is plugin for ref in refs):
+        refs.append(weakref.ref(plugin))
+
+
+def _unindex_plugin(plugin):
+    for name, refs in list(_PLUGINS_BY_NAME.items()):
+        refs[:] = [ref for ref in refs if ref() not in (plugin, None)]
+        if not refs:
+            del _PLUGINS_BY_NAME[name]
+
+
+# Manifest entries of plugins from modules that are not imported yet, see
+# rally.plugins.load_lazily()
+_LAZY_PLUGINS = []
+_LAZY_PLUGINS_LOCK = threading.RLock()
+
+
+def get_plugin_path(cls):
+    """Return full name of the class, e.g. rally.task.context.Context."""
+    return "%s.%s" % (cls.__module__, cls.__name__)
+
+
+def set_lazy_plugins(entries):
+    """Set plugins that are imported on demand.
+
+    Modules of these plugins are imported by Plugin.get() and
+    Plugin.get_all() when plugins are requested.
+
+    :param entries: list of dicts with "name", "bases" (full names of plugin
+                    classes in MRO) and "module" of plugins
+    """
+    with _LAZY_PLUGINS_LOCK:
+        _LAZY_PLUGINS[:] = entries
+
+
+def _import_lazy_plugins(base, name=None):
+    """Import modules with plugins of base class that are not imported yet.
+
+    :param base: Plugin subclass
+    :param name: import only modules with plugins of this name
+    :returns: True if any module was imported
+    """
+    base_path = get_plugin_path(base)
+    # The lock is taken even if there are no entries left, to wait for
+    # modules which are being imported by other thread
+    with _LAZY_PLUGINS_LOCK:
+        if not _LAZY_PLUGINS:
+            return False
+        modules = set(entry["module"] for entry in _LAZY_PLUGINS
+                      if base_path in entry["bases"]
+                      and name in (None, entry["name"]))
+        if not modules:
+            return False
+
+        _LAZY_PLUGINS[:] = [entry for entry in _LAZY_PLUGINS
+                            if entry["module"] not in modules]
+        for module in sorted(modules):
+            importutils.import_module(module)
+    return True
+
+
+def _find_lazy_plugin(name, namespace, module):
+    """Return entry of not imported plugin with the name from other module.
+
+    :param name: plugin name
+    :param namespace: plugin namespace
+    :param module: module of the plugin which is checked
+    :returns: manifest entry or None
+    """
+    with _LAZY_PLUGINS_LOCK:
+        for entry in _LAZY_PLUGINS:
+            if (entry["name"] == name
+                    and entry.get("namespace", "default") == namespace
+                    and entry["module"] != module):
+                return entry
+
+
+def _get_func_or_plugin(plugin):
+    """Return function of plugin created by from_func() or plugin itself."""
+    # NOTE: func_ref is taken from __dict__, since on Python 2 getattr
+    #       returns unbound method instead of function
+    return plugin.__dict__.get("func_ref", plugin)
+
+
 def deprecated(reason, rally_version):
     """Mark plugin as deprecated.
 
@@ -137,18 +235,19 @@ class Plugin(meta.MetaMixin, info.InfoMixin):
     @classmethod
     def unregister(cls):
         """Removes all pluign meta information and makes it indiscoverable."""
+        _unindex_plugin(cls)
         cls._meta_clear()
 
     @classmethod
     def _set_name_and_namespace(cls, name, namespace):
-        try:
-            Plugin.get(name, namespace=namespace)
-        except exceptions.PluginNotFound:
-            cls._meta_set("name", name)
-            cls._meta_set("namespace", namespace)
-        else:
+        module = getattr(cls, "func_ref", cls).__module__
+        if (Plugin._find(name, namespace=namespace) is not None
+                or _find_lazy_plugin(name, namespace, module) is not None):
             raise exceptions.PluginWithSuchNameExists(name=name,
                                                       namespace=namespace)
+        cls._meta_set("name", name)
+        cls._meta_set("namespace", namespace)
+        _index_plugin(cls)
 
     @classmethod
     def _set_deprecated(cls, reason, rally_version):
@@ -168,8 +267,8 @@ class Plugin(meta.MetaMixin, info.InfoMixin):
     def get(cls, name, namespace=None):
         """Return plugin by it's name from specified namespace.
 
-        This method iterates over all subclasses of cls and returns plugin
-        by name from specified namespace.
+        Plugins are looked up in the index of plugin names, so the cost
+        doesn't depend on the amount of loaded plugins.
 
         If namespace is not specified it will return first found plugin from
         any of namespaces.
@@ -177,12 +276,37 @@ class Plugin(meta.MetaMixin, info.InfoMixin):
         :param name: Plugin's name
         :param namespace: Namespace where to search for plugins
         """
-        for p in cls.get_all(namespace=namespace):
-            if p.get_name() == name:
-                return p
+        plugin = cls._find(name, namespace=namespace)
+        if plugin is None:
+            # The plugin may be imported by other thread meanwhile, so it
+            # is looked up again even if nothing is imported by this call
+            _import_lazy_plugins(cls, name)
+            plugin = cls._find(name, namespace=namespace)
+        if plugin is None:
+            raise exceptions.PluginNotFound(
+                name=name, namespace=namespace or "any of")
+        return plugin
 
-        raise exceptions.PluginNotFound(
-            name=name, namespace=namespace or "any of")
+    @classmethod
+    def _find(cls, name, namespace=None):
+        """Return plugin from imported ones or None if it is not found."""
+        found = []
+        for ref in _PLUGINS_BY_NAME.get(name, []):
+            p = ref()
+            if (p is not None and p is not cls and issubclass(p, cls)
+                    and p._meta_is_inited(raise_exc=False)
+                    and p.get_name() == name
+                    and (not namespace or namespace == p.get_namespace())):
+                found.append(p)
+
+        if len(found) == 1:
+            return _get_func_or_plugin(found[0])
+        elif found:
+            # Plugins with the same name from different namespaces are
+            # resolved in order of subclasses, like get_all() returns them
+            for p in cls.get_all(namespace=namespace):
+                if p.get_name() == name:
+                    return p
 
     @classmethod
     def get_all(cls, namespace=None):
@@ -192,12 +316,13 @@ class Plugin(meta.MetaMixin, info.InfoMixin):
 
         :param namespace: return only plugins from specified namespace.
         """
+        _import_lazy_plugins(cls)
         plugins = []
 
         for p in discover.itersubclasses(cls):
             if issubclass(p, Plugin) and p._meta_is_inited(raise_exc=False):
                 if not namespace or namespace == p.get_namespace():
-                    plugins.append(getattr(p, "func_ref", p))
+                    plugins.append(_get_func_or_plugin(p))
 
         return plugins
 
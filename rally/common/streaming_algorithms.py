@@ -14,8 +14,14 @@
 #    under the License.
 
 import abc
+import bisect
 import math
 
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is optional, it only speeds up QuantileSketch.add_many()
+    np = None
 import six
 
 from rally.common.i18n import _
@@ -125,30 +131,286 @@ class MaxComputation(StreamingAlgorithm):
         return self._value
 
 
+class QuantileSketch(object):
+    """Mergeable sketch of the distribution of a stream of numbers.
+
+    Values are counted in buckets with logarithmically growing bounds
+    (DDSketch, https://arxiv.org/abs/1908.10693). Any quantile is estimated
+    with relative error not greater than relative_accuracy, e.g. with the
+    default accuracy of 0.5% the estimated 95th percentile of durations is
+    within 0.5% of the exact one, independently of the amount of values and
+    of their distribution. The lowest and the highest values are exact.
+
+    Memory is bounded by max_bins buckets. 2048 buckets of the default
+    accuracy cover values from 1 microsecond to more than 10 days, if the
+    values do not fit in, the lowest buckets are collapsed and only the low
+    quantiles lose accuracy.
+
+    Sketches with the same accuracy can be merged, so the distribution of
+    several streams can be computed separately and combined later.
+    """
+
+    def __init__(self, relative_accuracy=0.005, max_bins=2048):
+        """Init the sketch.
+
+        :param relative_accuracy: max relative error of quantiles
+                                  (from 0 to 1, exclusive)
+        :param max_bins: max number of buckets for positive and for negative
+                         values each
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("Unexpected relative accuracy: %s"
+                             % relative_accuracy)
+        if max_bins < 1:
+            raise ValueError("Unexpected max bins: %s" % max_bins)
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._positive = {}
+        self._negative = {}
+        # Keys of the buckets in ascending order, so quantiles are found
+        # without sorting the buckets on each call
+        self._positive_keys = []
+        self._negative_keys = []
+        self._zero_count = 0
+        self.count = 0
+        self.min = None
+        self.max = None
+
+    def _key(self, value):
+        return int(math.ceil(math.log(value) / self._log_gamma))
+
+    def _value(self, key):
+        # The middle of the bucket (gamma^(key-1), gamma^key] in terms of
+        # relative error
+        return 2 * self._gamma ** key / (self._gamma + 1)
+
+    def _collapse(self, bins, keys):
+        extra = len(keys) - self.max_bins
+        lowest = keys[extra]
+        for key in keys[:extra]:
+            bins[lowest] += bins.pop(key)
+        del keys[:extra]
+
+    def _add_to(self, bins, keys, key, count):
+        if key in bins:
+            bins[key] += count
+            return
+        bins[key] = count
+        bisect.insort(keys, key)
+        if len(keys) > self.max_bins:
+            self._collapse(bins, keys)
+
+    def add(self, value):
+        """Add a single value to the sketch."""
+        if value > 0:
+            self._add_to(self._positive, self._positive_keys,
+                         self._key(value), 1)
+        elif value < 0:
+            self._add_to(self._negative, self._negative_keys,
+                         self._key(-value), 1)
+        else:
+            self._zero_count += 1
+
+        self.count += 1
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def add_many(self, values):
+        """Add a sequence of values to the sketch.
+
+        The result is the same as of add() called for each value, but with
+        NumPy the values are counted in buckets at once.
+
+        :param values: sequence of numbers or NumPy array
+        """
+        if np is None:
+            for value in values:
+                self.add(value)
+            return
+
+        values = np.asarray(values, dtype=float)
+        if not len(values):
+            return
+        positive = values[values > 0]
+        negative = -values[values < 0]
+        for part, bins, keys in ((positive, self._positive,
+                                  self._positive_keys),
+                                 (negative, self._negative,
+                                  self._negative_keys)):
+            if len(part):
+                part_keys, counts = np.unique(
+                    np.ceil(np.log(part) / self._log_gamma).astype(int),
+                    return_counts=True)
+                for key, count in zip(part_keys.tolist(), counts.tolist()):
+                    self._add_to(bins, keys, key, count)
+        self._zero_count += len(values) - len(positive) - len(negative)
+
+        self.count += len(values)
+        low, high = float(np.min(values)), float(np.max(values))
+        if self.min is None or low < self.min:
+            self.min = low
+        if self.max is None or high > self.max:
+            self.max = high
+
+    def merge(self, other):
+        """Add all values of other sketch to this one.
+
+        :param other: QuantileSketch with the same relative accuracy
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Unable to merge sketches with different "
+                             "accuracy: %s and %s" % (self.relative_accuracy,
+                                                      other.relative_accuracy))
+        if not other.count:
+            return
+        for key, count in six.iteritems(other._positive):
+            self._add_to(self._positive, self._positive_keys, key, count)
+        for key, count in six.iteritems(other._negative):
+            self._add_to(self._negative, self._negative_keys, key, count)
+        self._zero_count += other._zero_count
+
+        self.count += other.count
+        if self.min is None or other.min < self.min:
+            self.min = other.min
+        if self.max is None or other.max > self.max:
+            self.max = other.max
+
+    def to_dict(self):
+        """Return JSON serializable representation of the sketch."""
+        return {"relative_accuracy": self.relative_accuracy,
+                "max_bins": self.max_bins,
+                "positive": sorted(self._positive.items()),
+                "negative": sorted(self._negative.items()),
+                "zero_count": self._zero_count,
+                "count": self.count,
+                "min": self.min,
+                "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create QuantileSketch from the result of to_dict()."""
+        sketch = cls(data["relative_accuracy"], data["max_bins"])
+        sketch._positive = dict((key, count)
+                                for key, count in data["positive"])
+        sketch._negative = dict((key, count)
+                                for key, count in data["negative"])
+        sketch._positive_keys = sorted(sketch._positive)
+        sketch._negative_keys = sorted(sketch._negative)
+        sketch._zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.min = data["min"]
+        sketch.max = data["max"]
+        return sketch
+
+    def _get_value(self, rank):
+        if rank == 0:
+            return self.min
+        if rank == self.count - 1:
+            return self.max
+
+        seen = 0
+        for key in reversed(self._negative_keys):
+            seen += self._negative[key]
+            if seen > rank:
+                return max(-self._value(key), self.min)
+        seen += self._zero_count
+        if seen > rank:
+            return 0
+        for key in self._positive_keys:
+            seen += self._positive[key]
+            if seen > rank:
+                return min(self._value(key), self.max)
+        return self.max
+
+    def quantile(self, percent):
+        """Estimate the quantile of processed values.
+
+        Quantile is interpolated between the closest ranks the same way as
+        rally.task.processing.utils.percentile() does.
+
+        :param percent: float value from 0.0 to 1.0
+        :returns: the quantile or None if there are no values
+        """
+        if not self.count:
+            return None
+        k = (self.count - 1) * percent
+        f = math.floor(k)
+        c = math.ceil(k)
+        if f == c:
+            return self._get_value(int(k))
+        return (self._get_value(int(f)) * (c - k) +
+                self._get_value(int(c)) * (k - f))
+
+
 class PercentileComputation(StreamingAlgorithm):
-    """Compute percentile value from a stream of numbers."""
+    """Compute percentile value from a stream of numbers.
 
-    def __init__(self, percent, length):
+    Percentile is exact while the amount of values is not greater than
+    EXACT_LIMIT, for longer streams it is estimated by QuantileSketch, so
+    the used memory is bounded.
+    """
+
+    EXACT_LIMIT = 10000
+
+    def __init__(self, percent, length=None):
         """Init streaming computation.
 
         :param percent: numeric percent (from 0.00..1 to 0.999..)
-        :param length: count of the measurements
+        :param length: count of the measurements. It is not required
+                       anymore and is kept for backward compatibility
         """
         if not 0 < percent < 1:
             raise ValueError("Unexpected percent: %s" % percent)
         self._percent = percent
+        self._values = []
+        self._sketch = None
 
-        self._graph_zipper = utils.GraphZipper(length, 10000)
+    def _switch_to_sketch(self):
+        self._sketch = QuantileSketch()
+        for value in self._values:
+            self._sketch.add(value)
+        self._values = None
 
     def add(self, value):
-        self._graph_zipper.add_point(value)
+        if not isinstance(value, (six.integer_types, float)):
+            value = 0
+
+        if self._sketch is not None:
+            self._sketch.add(value)
+            return
+        self._values.append(value)
+        if len(self._values) > self.EXACT_LIMIT:
+            self._switch_to_sketch()
+
+    def merge(self, other):
+        """Add all values processed by other computation.
+
+        :param other: PercentileComputation
+        """
+        if self._sketch is None and other._sketch is None:
+            self._values.extend(other._values)
+            if len(self._values) > self.EXACT_LIMIT:
+                self._switch_to_sketch()
+            return
+
+        if self._sketch is None:
+            self._switch_to_sketch()
+        if other._sketch is None:
+            for value in other._values:
+                self._sketch.add(value)
+        else:
+            self._sketch.merge(other._sketch)
 
     def result(self):
-        results = list(
-            map(lambda x: x[1], self._graph_zipper.get_zipped_graph()))
-        if not results:
+        if self._sketch is not None:
+            return self._sketch.quantile(self._percent)
+        if not self._values:
             raise ValueError("No values have been processed")
-        return utils.percentile(results, self._percent)
+        return utils.percentile(self._values, self._percent)
 
 
 class IncrementComputation(StreamingAlgorithm):
@@ -15,6 +15,8 @@
 
 import abc
 import os
+import threading
+import weakref
 
 from oslo_config import cfg
 
@@ -27,6 +29,7 @@ from rally import exceptions
 
 
 CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
 
 OSCLIENTS_OPTS = [
     cfg.FloatOpt("openstack_client_http_timeout", default=180.0,
@@ -36,13 +39,115 @@ OSCLIENTS_OPTS = [
                 deprecated_for_removal=True),
     cfg.StrOpt("https_cacert", default=None,
                help="Path to CA server certificate for SSL",
-               deprecated_for_removal=True)
+               deprecated_for_removal=True),
+    cfg.IntOpt("keystone_token_stale_duration", default=60,
+               help="Authenticate in Keystone again if the cached token "
+                    "expires in less than the given number of seconds")
 ]
 CONF.register_opts(OSCLIENTS_OPTS)
 
 _NAMESPACE = "openstack"
 
 
+class AuthCache(object):
+    """Process-wide cache of authenticated keystone clients.
+
+    Clients instances are created per user, per context and per iteration,
+    each of them used to authenticate in Keystone. AuthCache shares the
+    authenticated keystone client (with its token and service catalog)
+    between all Clients instances with the same credentials. The token is
+    refreshed when it is about to expire.
+
+    The cache is inherited by forked processes, e.g. by workers of scenario
+    runners, and it is emptied in them on first use, so processes don't
+    share connections of keystone clients.
+    """
+
+    def __init__(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._locks = {}
+        self._clients = {}
+        self._urls = weakref.WeakKeyDictionary()
+        # Number of requests served from the cache
+        self.hits = 0
+        # Number of authentications in Keystone
+        self.authentications = 0
+
+    def _clear_if_forked(self):
+        pid = os.getpid()
+        if self._pid != pid:
+            # NOTE: The lock may be held by a thread of the parent process
+            #       which doesn't exist in this one
+            self._lock = threading.Lock()
+            self._pid = pid
+            self.clear()
+
+    @staticmethod
+    def _expires_soon(client):
+        auth_ref = getattr(client, "auth_ref", None)
+        return auth_ref is None or auth_ref.will_expire_soon(
+            CONF.keystone_token_stale_duration)
+
+    def get_client(self, kwargs, create):
+        """Return cached keystone client or create and cache a new one.
+
+        :param kwargs: dict with arguments of keystone client
+        :param create: function which takes kwargs and returns
+                       authenticated keystone client
+        """
+        self._clear_if_forked()
+        key = tuple(sorted(kwargs.items()))
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+
+        # Threads with the same credentials wait for a single
+        # authentication instead of sending their own requests
+        with lock:
+            client = self._clients.get(key)
+            if client is not None and not self._expires_soon(client):
+                with self._lock:
+                    self.hits += 1
+                return client
+
+            client = create(kwargs)
+            with self._lock:
+                self._clients[key] = client
+                self.authentications += 1
+                LOG.debug("User %(user)s is authenticated in %(url)s "
+                          "(%(auth)d authentications, %(hits)d cached "
+                          "clients used)"
+                          % {"user": kwargs.get("username"),
+                             "url": kwargs.get("auth_url"),
+                             "auth": self.authentications,
+                             "hits": self.hits})
+            return client
+
+    def url_for(self, client, **kwargs):
+        """Return URL of the service from the catalog of keystone client.
+
+        Resolved URLs are cached while the client is alive.
+        """
+        self._clear_if_forked()
+        key = tuple(sorted(kwargs.items()))
+        with self._lock:
+            urls = self._urls.setdefault(client, {})
+        if key not in urls:
+            urls[key] = client.service_catalog.url_for(**kwargs)
+        return urls[key]
+
+    def clear(self):
+        with self._lock:
+            self._locks.clear()
+            self._clients.clear()
+            self._urls.clear()
+            self.hits = 0
+            self.authentications = 0
+
+
+AUTH_CACHE = AuthCache()
+
+
 def configure(name, default_version=None, default_service_type=None,
               supported_versions=None):
     """OpenStack client class wrapper.
@@ -164,11 +269,10 @@ class OSClient(plugin.Plugin):
 
     def _get_endpoint(self, service_type=None):
         kc = self.keystone()
-        api_url = kc.service_catalog.url_for(
-            service_type=self.choose_service_type(service_type),
+        return AUTH_CACHE.url_for(
+            kc, service_type=self.choose_service_type(service_type),
             endpoint_type=self.endpoint.endpoint_type,
             region_name=self.endpoint.region_name)
-        return api_url
 
     def _get_auth_info(self, user_key="username",
                        password_key="password",
@@ -223,18 +327,26 @@ class Keystone(OSClient):
         raise exceptions.RallyException("Failed to discover keystone version "
                                         "for url %(auth_url)s.", **args)
 
+    @classmethod
+    def _authenticate(cls, kwargs):
+        client = cls._create_keystone_client(kwargs)
+        if client.auth_ref is None:
+            client.authenticate()
+        return client
+
     def create_client(self):
-        """Return keystone client."""
+        """Return keystone client.
+
+        Authenticated clients are shared between Clients instances with the
+        same credentials, see AuthCache.
+        """
         new_kw = {
             "timeout": CONF.openstack_client_http_timeout,
             "insecure": self.endpoint.insecure, "cacert": self.endpoint.cacert
         }
         kw = self.endpoint.to_dict()
         kw.update(new_kw)
-        client = self._create_keystone_client(kw)
-        if client.auth_ref is None:
-            client.authenticate()
-        return client
+        return AUTH_CACHE.get_client(kw, self._authenticate)
 
 
 @configure("nova", default_version="2", default_service_type="compute")
@@ -254,10 +366,7 @@ class Nova(OSClient):
         """Return nova client."""
         from novaclient import client as nova
         kc = self.keystone()
-        compute_api_url = kc.service_catalog.url_for(
-            service_type=self.choose_service_type(service_type),
-            endpoint_type=self.endpoint.endpoint_type,
-            region_name=self.endpoint.region_name)
+        compute_api_url = self._get_endpoint(service_type)
         client = nova.Client(self.choose_version(version),
                              auth_token=kc.auth_token,
                              http_log_debug=logging.is_debug(),
@@ -276,10 +385,7 @@ class Neutron(OSClient):
         """Return neutron client."""
         from neutronclient.neutron import client as neutron
         kc = self.keystone()
-        network_api_url = kc.service_catalog.url_for(
-            service_type=self.choose_service_type(service_type),
-            endpoint_type=self.endpoint.endpoint_type,
-            region_name=self.endpoint.region_name)
+        network_api_url = self._get_endpoint(service_type)
         client = neutron.Client(self.choose_version(version),
                                 token=kc.auth_token,
                                 endpoint_url=network_api_url,
@@ -299,10 +405,7 @@ class Glance(OSClient):
         """Return glance client."""
         import glanceclient as glance
         kc = self.keystone()
-        image_api_url = kc.service_catalog.url_for(
-            service_type=self.choose_service_type(service_type),
-            endpoint_type=self.endpoint.endpoint_type,
-            region_name=self.endpoint.region_name)
+        image_api_url = self._get_endpoint(service_type)
         client = glance.Client(self.choose_version(version),
                                endpoint=image_api_url,
                                token=kc.auth_token,
@@ -319,10 +422,7 @@ class Heat(OSClient):
         """Return heat client."""
         from heatclient import client as heat
         kc = self.keystone()
-        orchestration_api_url = kc.service_catalog.url_for(
-            service_type=self.choose_service_type(service_type),
-            endpoint_type=self.endpoint.endpoint_type,
-            region_name=self.endpoint.region_name)
+        orchestration_api_url = self._get_endpoint(service_type)
         client = heat.Client(self.choose_version(version),
                              endpoint=orchestration_api_url,
                              token=kc.auth_token,
@@ -346,10 +446,7 @@ class Cinder(OSClient):
                                cacert=self.endpoint.cacert,
                                **self._get_auth_info(password_key="api_key"))
         kc = self.keystone()
-        volume_api_url = kc.service_catalog.url_for(
-            service_type=self.choose_service_type(service_type),
-            endpoint_type=self.endpoint.endpoint_type,
-            region_name=self.endpoint.region_name)
+        volume_api_url = self._get_endpoint(service_type)
         client.client.management_url = volume_api_url
         client.client.auth_token = kc.auth_token
         return client
@@ -371,10 +468,8 @@ class Manila(OSClient):
             **self._get_auth_info(password_key="api_key",
                                   project_name_key="project_name"))
         kc = self.keystone()
-        manila_client.client.management_url = kc.service_catalog.url_for(
-            service_type=self.choose_service_type(service_type),
-            endpoint_type=self.endpoint.endpoint_type,
-            region_name=self.endpoint.region_name)
+        manila_client.client.management_url = self._get_endpoint(
+            service_type)
         manila_client.client.auth_token = kc.auth_token
         return manila_client
 
@@ -386,10 +481,7 @@ class Ceilometer(OSClient):
         """Return ceilometer client."""
         from ceilometerclient import client as ceilometer
         kc = self.keystone()
-        metering_api_url = kc.service_catalog.url_for(
-            service_type=self.choose_service_type(service_type),
-            endpoint_type=self.endpoint.endpoint_type,
-            region_name=self.endpoint.region_name)
+        metering_api_url = self._get_endpoint(service_type)
         auth_token = kc.auth_token
         if not hasattr(auth_token, "__call__"):
             # python-ceilometerclient requires auth_token to be a callable
@@ -414,10 +506,7 @@ class Ironic(OSClient):
         """Return Ironic client."""
         from ironicclient import client as ironic
         kc = self.keystone()
-        baremetal_api_url = kc.service_catalog.url_for(
-            service_type=self.choose_service_type(service_type),
-            endpoint_type=self.endpoint.endpoint_type,
-            region_name=self.endpoint.region_name)
+        baremetal_api_url = self._get_endpoint(service_type)
         client = ironic.get_client(self.choose_version(version),
                                    os_auth_token=kc.auth_token,
                                    ironic_url=baremetal_api_url,
@@ -464,10 +553,7 @@ class Zaqar(OSClient):
         """Return Zaqar client."""
         from zaqarclient.queues import client as zaqar
         kc = self.keystone()
-        messaging_api_url = kc.service_catalog.url_for(
-            service_type=self.choose_service_type(service_type),
-            endpoint_type=self.endpoint.endpoint_type,
-            region_name=self.endpoint.region_name)
+        messaging_api_url = self._get_endpoint(service_type)
         conf = {"auth_opts": {"backend": "keystone", "options": {
             "os_username": self.endpoint.username,
             "os_password": self.endpoint.password,
@@ -490,11 +576,7 @@ class Murano(OSClient):
         """Return Murano client."""
         from muranoclient import client as murano
         kc = self.keystone()
-        murano_url = kc.service_catalog.url_for(
-            service_type=self.choose_service_type(service_type),
-            endpoint_type=self.endpoint.endpoint_type,
-            region_name=self.endpoint.region_name
-        )
+        murano_url = self._get_endpoint(service_type)
 
         client = murano.Client(self.choose_version(version),
                                endpoint=murano_url,
@@ -541,10 +623,7 @@ class Mistral(OSClient):
         from mistralclient.api import client
         kc = self.keystone()
 
-        mistral_url = kc.service_catalog.url_for(
-            service_type=self.choose_service_type(service_type),
-            endpoint_type=self.endpoint.endpoint_type,
-            region_name=self.endpoint.region_name)
+        mistral_url = self._get_endpoint(service_type)
 
         client = client.client(
             mistral_url=mistral_url,
@@ -559,10 +638,7 @@ class Swift(OSClient):
         """Return swift client."""
         from swiftclient import client as swift
         kc = self.keystone()
-        object_api_url = kc.service_catalog.url_for(
-            service_type=self.choose_service_type(service_type),
-            endpoint_type=self.endpoint.endpoint_type,
-            region_name=self.endpoint.region_name)
+        object_api_url = self._get_endpoint(service_type)
         client = swift.Connection(retries=1,
                                   preauthurl=object_api_url,
                                   preauthtoken=kc.auth_token,
@@ -589,10 +665,7 @@ class EC2(OSClient):
                   "Keystone version 2"))
         ec2_credential = kc.ec2.create(user_id=kc.auth_user_id,
                                        tenant_id=kc.auth_tenant_id)
-        ec2_api_url = kc.service_catalog.url_for(
-            service_type=consts.ServiceType.EC2,
-            endpoint_type=self.endpoint.endpoint_type,
-            region_name=self.endpoint.region_name)
+        ec2_api_url = self._get_endpoint(consts.ServiceType.EC2)
         client = boto.connect_ec2_endpoint(
             url=ec2_api_url,
             aws_access_key_id=ec2_credential.access,
@@ -608,10 +681,7 @@ class Monasca(OSClient):
         """Return monasca client."""
         from monascaclient import client as monasca
         kc = self.keystone()
-        monitoring_api_url = kc.service_catalog.url_for(
-            service_type=self.choose_service_type(service_type),
-            endpoint_type=self.endpoint.endpoint_type,
-            region_name=self.endpoint.region_name)
+        monitoring_api_url = self._get_endpoint(service_type)
         auth_token = kc.auth_token
         client = monasca.Client(
             self.choose_version(version),
@@ -636,7 +706,7 @@ class Clients(object):
             self.endpoint.insecure = CONF.https_insecure
         if self.endpoint.cacert is None:
             self.endpoint.cacert = CONF.https_cacert
-        self.cache = {}
+        self.clear()
 
     def __getattr__(self, client_name):
         """Lazy load of clients."""
@@ -657,6 +727,20 @@ class Clients(object):
     def clear(self):
         """Remove all cached client handles."""
         self.cache = {}
+        self._pid = os.getpid()
+
+    def clear_if_token_expires(self):
+        """Remove cached client handles if their token is about to expire.
+
+        Clients of services are created with the token of the cached
+        keystone client, so they are created again with a refreshed token,
+        see AuthCache. Handles created by the parent of a forked process
+        are removed as well, so processes don't share their connections.
+        """
+        keystone = self.cache.get("keystone")
+        if self._pid != os.getpid() or (
+                keystone is not None and AUTH_CACHE._expires_soon(keystone)):
+            self.clear()
 
     def verified_keystone(self):
         """Ensure keystone endpoints are valid and then authenticate
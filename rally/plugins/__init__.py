@@ -13,31 +13,168 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import json
 import os
 
 import decorator
 
+import rally
+from rally.common import log as logging
 from rally.common.plugin import discover
+from rally.common.plugin import plugin
 
 
+LOG = logging.getLogger(__name__)
+
+PACKAGES = ["rally.deployment.engines",
+            "rally.deployment.serverprovider",
+            "rally.plugins"]
+
+MANIFEST_PATH = os.path.expanduser("~/.rally/plugins_manifest.json")
+
 PLUGINS_LOADED = False
+LAZY_PLUGINS_LOADED = False
+USER_PLUGINS_LOADED = False
+
+
+def _load_user_plugins():
+    global USER_PLUGINS_LOADED
+
+    if not USER_PLUGINS_LOADED:
+        discover.load_plugins("/opt/rally/plugins/")
+        discover.load_plugins(os.path.expanduser("~/.rally/plugins/"))
+
+    USER_PLUGINS_LOADED = True
 
 
 def load():
     global PLUGINS_LOADED
 
     if not PLUGINS_LOADED:
-        discover.import_modules_from_package("rally.deployment.engines")
-        discover.import_modules_from_package("rally.deployment.serverprovider")
-        discover.import_modules_from_package("rally.plugins")
+        for package in PACKAGES:
+            discover.import_modules_from_package(package)
 
-        discover.load_plugins("/opt/rally/plugins/")
-        discover.load_plugins(os.path.expanduser("~/.rally/plugins/"))
+        _load_user_plugins()
 
     PLUGINS_LOADED = True
 
 
+def _get_packages_mtime():
+    """Return the latest mtime of modules and directories of PACKAGES.
+
+    Directories are taken into account to notice removed modules.
+    """
+    root = os.path.dirname(os.path.dirname(rally.__file__))
+    mtime = 0
+    for package in PACKAGES:
+        path = os.path.join(root, *package.split("."))
+        for dirpath, dirnames, filenames in os.walk(path):
+            mtime = max(mtime, os.path.getmtime(dirpath))
+            for filename in filenames:
+                if filename.endswith(".py"):
+                    mtime = max(mtime, os.path.getmtime(
+                        os.path.join(dirpath, filename)))
+    return mtime
+
+
+def _in_packages(module):
+    return any(module == package or module.startswith(package + ".")
+               for package in PACKAGES)
+
+
+def make_manifest():
+    """Return manifest of plugins from PACKAGES.
+
+    Every entry contains name, namespace, base type (e.g. Scenario or
+    Context), full names of all plugin classes in MRO, module and
+    CONFIG_SCHEMA of a plugin. Modules of PACKAGES should be already
+    imported, see load().
+    """
+    entries = []
+    for p in discover.itersubclasses(plugin.Plugin):
+        if not p._meta_is_inited(raise_exc=False):
+            continue
+        module = getattr(p, "func_ref", p).__module__
+        if not _in_packages(module):
+            continue
+
+        schema = getattr(p, "CONFIG_SCHEMA", None)
+        try:
+            json.dumps(schema)
+        except (TypeError, ValueError):
+            schema = None
+
+        bases = [plugin.get_plugin_path(base) for base in p.__mro__
+                 if issubclass(base, plugin.Plugin)]
+        entries.append({"name": p.get_name(),
+                        "namespace": p.get_namespace(),
+                        "base": bases[-2],
+                        "bases": bases,
+                        "module": module,
+                        "schema": schema})
+
+    return {"path": os.path.dirname(rally.__file__),
+            "mtime": _get_packages_mtime(),
+            "plugins": entries}
+
+
+def _read_manifest():
+    """Return the cached manifest or None if it is missing or outdated."""
+    try:
+        with open(MANIFEST_PATH) as f:
+            manifest = json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+    if (manifest.get("path") != os.path.dirname(rally.__file__)
+            or manifest.get("mtime") != _get_packages_mtime()):
+        return None
+    return manifest
+
+
+def _write_manifest(manifest):
+    try:
+        directory = os.path.dirname(MANIFEST_PATH)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        # Write to a temporary file first, so concurrent rally commands
+        # never read a partially written manifest
+        tmp_path = "%s.%s.tmp" % (MANIFEST_PATH, os.getpid())
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.rename(tmp_path, MANIFEST_PATH)
+    except (IOError, OSError) as e:
+        LOG.debug("Failed to save manifest of plugins to %(path)s: %(e)s"
+                  % {"path": MANIFEST_PATH, "e": e})
+
+
+def load_lazily():
+    """Load plugins, importing modules of PACKAGES only when needed.
+
+    Manifest of plugins from PACKAGES is cached in MANIFEST_PATH, modules
+    with plugins are imported by Plugin.get() and Plugin.get_all() when the
+    plugins are requested. If any module of PACKAGES is changed, all the
+    plugins are loaded and the manifest is saved again.
+
+    Plugins from user directories are always loaded.
+    """
+    global LAZY_PLUGINS_LOADED
+
+    if PLUGINS_LOADED or LAZY_PLUGINS_LOADED:
+        return
+
+    manifest = _read_manifest()
+    if manifest is None:
+        load()
+        _write_manifest(make_manifest())
+    else:
+        plugin.set_lazy_plugins(manifest["plugins"])
+        _load_user_plugins()
+
+    LAZY_PLUGINS_LOADED = True
+
+
 @decorator.decorator
 def ensure_plugins_are_loaded(f, *args, **kwargs):
-    load()
+    load_lazily()
     return f(*args, **kwargs)
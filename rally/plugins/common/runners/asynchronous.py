@@ -0,0 +1,251 @@
+# Copyright 2015: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import multiprocessing
+import time
+
+try:
+    import asyncio
+    from concurrent import futures
+except ImportError:
+    # asyncio is available only in Python 3.4+
+    asyncio = None
+
+from rally.common.i18n import _
+from rally.common import log as logging
+from rally import consts
+from rally import exceptions
+from rally.task import runner
+from rally.task import utils
+
+LOG = logging.getLogger(__name__)
+
+# Default limit of threads that run iterations of scenarios which are not
+# coroutines
+DEFAULT_EXECUTOR_WORKERS = 100
+
+
+def _start_coroutine_iteration(loop, args):
+    """Start a single iteration of a coroutine scenario.
+
+    This is an event loop version of runner._run_scenario_once.
+
+    :param loop: asyncio event loop
+    :param args: the same args as for runner._run_scenario_once
+    :returns: asyncio.Task of the scenario coroutine and the future which
+              is resolved with the iteration result when the task is done
+    """
+    iteration, cls, method_name, context_obj, kwargs = args
+
+    LOG.info("Task %(task)s | ITER: %(iteration)s START" %
+             {"task": context_obj["task"]["uuid"], "iteration": iteration})
+
+    context_obj["iteration"] = iteration
+    scenario_inst = cls(context_obj)
+    result = asyncio.Future(loop=loop)
+    started_at = time.time()
+    task = loop.create_task(getattr(scenario_inst, method_name)(**kwargs))
+
+    def on_done(task):
+        duration = time.time() - started_at
+        error = []
+        scenario_output = {"errors": "", "data": {}}
+        if task.cancelled():
+            error = utils.format_exc(asyncio.CancelledError())
+        elif task.exception():
+            error = utils.format_exc(task.exception())
+        else:
+            scenario_output = task.result() or scenario_output
+
+        status = "Error %s: %s" % tuple(error[0:2]) if error else "OK"
+        LOG.info("Task %(task)s | ITER: %(iteration)s END: %(status)s" %
+                 {"task": context_obj["task"]["uuid"],
+                  "iteration": iteration, "status": status})
+
+        if result.cancelled():
+            # The run was interrupted and nobody waits for the result
+            return
+        result.set_result({
+            "duration": duration - scenario_inst.idle_duration(),
+            "timestamp": started_at,
+            "idle_duration": scenario_inst.idle_duration(),
+            "error": error,
+            "scenario_output": scenario_output,
+            "atomic_actions": scenario_inst.atomic_actions()})
+
+    task.add_done_callback(on_done)
+    return task, result
+
+
+@runner.configure(name="asyncio")
+class AsyncioScenarioRunner(runner.ScenarioRunner):
+    """Creates constant load using an asyncio event loop.
+
+    This runner executes the scenario a specified number of times keeping
+    "concurrency" iterations in flight. Iterations are driven by a single
+    asyncio event loop instead of a thread per iteration, so thousands of
+    iterations of I/O-bound scenarios can run concurrently from one process.
+
+    Scenarios which methods are coroutines run directly in the event loop,
+    other scenarios run in a pool of at most "executor_workers" threads
+    (by default min(concurrency, 100)). Scenarios shipped with Rally are
+    not coroutines, so for them the effective concurrency is limited by
+    "executor_workers" and the runner behaves like the constant runner in
+    a single process.
+
+    This runner requires Python 3.4 or newer.
+    """
+
+    CONFIG_SCHEMA = {
+        "type": "object",
+        "$schema": consts.JSON_SCHEMA,
+        "properties": {
+            "type": {
+                "type": "string"
+            },
+            "concurrency": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "times": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "timeout": {
+                "type": "number",
+                "minimum": 1
+            },
+            "executor_workers": {
+                "type": "integer",
+                "minimum": 1
+            }
+        },
+        "required": ["type"],
+        "additionalProperties": False
+    }
+
+    def _start_iteration(self, loop, executor, scenario_args, timeout):
+        """Start a single iteration.
+
+        :returns: the task (or the executor future) of the iteration and the
+                  future which is resolved with the iteration result. The
+                  result future is cancelled if the iteration runs in a
+                  thread and does not finish in time.
+        """
+        cls, method_name = scenario_args[1:3]
+        if asyncio.iscoroutinefunction(getattr(cls, method_name)):
+            task, result = _start_coroutine_iteration(loop, scenario_args)
+            if timeout:
+                loop.call_later(timeout, task.cancel)
+            return task, result
+
+        # Threads can not be interrupted, so a late iteration is reported as
+        # failed by timeout and its result is ignored.
+        result = loop.run_in_executor(
+            executor, runner._run_scenario_once, scenario_args)
+        if timeout:
+            loop.call_later(timeout, result.cancel)
+        return result, result
+
+    def _run_scenario(self, cls, method_name, context, args):
+        """Runs the specified benchmark scenario with given arguments.
+
+        :param cls: The Scenario class where the scenario is implemented
+        :param method_name: Name of the method that implements the scenario
+        :param context: Benchmark context that contains users, admin & other
+                        information, that was created before benchmark started.
+        :param args: Arguments to call the scenario method with
+
+        :returns: List of results fore each single scenario iteration,
+                  where each result is a dictionary
+        """
+        if asyncio is None:
+            raise exceptions.RallyException(
+                _("The asyncio runner requires Python 3.4 or newer."))
+
+        timeout = self.config.get("timeout", 0)  # 0 means no timeout
+        times = self.config.get("times", 1)
+        concurrency = self.config.get("concurrency", 1)
+        executor_workers = self.config.get(
+            "executor_workers", min(concurrency, DEFAULT_EXECUTOR_WORKERS))
+
+        self._log_debug_info(times=times, concurrency=concurrency,
+                             timeout=timeout,
+                             executor_workers=executor_workers)
+
+        loop = asyncio.new_event_loop()
+        executor = futures.ThreadPoolExecutor(executor_workers)
+        iterations = iter(range(times))
+        in_flight = set()
+        tasks = set()
+        # Set when the run is interrupted, results are not sent anymore
+        stopped = []
+        done = asyncio.Future(loop=loop)
+
+        def start_next():
+            if self.aborted.is_set() or stopped:
+                iteration = None
+            else:
+                iteration = next(iterations, None)
+
+            if iteration is None:
+                if not in_flight and not done.done():
+                    done.set_result(None)
+                return
+
+            scenario_args = (iteration, cls, method_name,
+                             runner._get_scenario_context(context), args)
+            try:
+                task, result = self._start_iteration(loop, executor,
+                                                     scenario_args, timeout)
+            except Exception as e:
+                # Scenario failed before its coroutine was started
+                if not done.done():
+                    done.set_exception(e)
+                return
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            in_flight.add(result)
+            result.add_done_callback(on_result)
+
+        def on_result(result):
+            in_flight.discard(result)
+            if stopped:
+                return
+            if result.cancelled():
+                iteration_result = runner.format_result_on_timeout(
+                    multiprocessing.TimeoutError(), timeout)
+                iteration_result["timestamp"] = time.time() - timeout
+            else:
+                iteration_result = result.result()
+            self._send_result(iteration_result)
+            start_next()
+
+        try:
+            for i in range(concurrency):
+                loop.call_soon(start_next)
+            loop.run_until_complete(done)
+        finally:
+            # Iterations which are still running are cancelled and awaited,
+            # so the loop is not closed with pending tasks
+            stopped.append(True)
+            pending = [f for f in tasks | in_flight if not f.done()]
+            for future in pending:
+                future.cancel()
+            if pending:
+                loop.run_until_complete(
+                    asyncio.gather(*pending, return_exceptions=True))
+            executor.shutdown(wait=False)
+            loop.close()
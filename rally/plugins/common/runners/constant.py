@@ -13,11 +13,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import collections
 import multiprocessing
 import threading
 import time
 
+from six import moves
+
 from rally.common import log as logging
 from rally.common import utils
 from rally import consts
@@ -28,14 +29,16 @@ LOG = logging.getLogger(__name__)
 
 
 def _worker_process(queue, iteration_gen, timeout, concurrency, times, context,
-                    cls, method_name, args, aborted, info):
+                    cls, method_name, args, aborted, warm_up, info):
     """Start the scenario within threads.
 
-    Spawn threads to support scenario execution for a fixed number of times.
-    This generates a constant load on the cloud under test by executing each
-    scenario iteration without pausing between iterations. Each thread runs
-    the scenario method once with passed scenario arguments and context.
-    After execution the result is appended to the queue.
+    Start a pool of threads to support scenario execution for a fixed number
+    of times. This generates a constant load on the cloud under test by
+    executing each scenario iteration without pausing between iterations.
+    Threads are reused: each of them takes scenario iterations from the
+    iterations queue and runs the scenario method with passed scenario
+    arguments and context. After execution the result is appended to the
+    queue.
 
     :param queue: queue object to append results
     :param iteration_gen: next iteration number generator
@@ -48,55 +51,45 @@ def _worker_process(queue, iteration_gen, timeout, concurrency, times, context,
     :param args: scenario args
     :param aborted: multiprocessing.Event that aborts load generation if
                     the flag is set
+    :param warm_up: warm up the process before the load, see
+                    Scenario.warm_up()
     :param info: info about all processes count and counter of launched process
     """
 
-    pool = collections.deque()
-    alive_threads_in_pool = 0
-    finished_threads_in_pool = 0
+    pool_size = min(concurrency, times)
+    iterations = moves.queue.Queue()
+    free_slots = threading.Semaphore(pool_size)
 
     runner._log_worker_info(times=times, concurrency=concurrency,
                             timeout=timeout, cls=cls, method_name=method_name,
                             args=args)
 
+    if warm_up:
+        runner._warm_up(cls, context)
+
+    pool = []
+    for i in range(pool_size):
+        thread = threading.Thread(target=runner._worker_pool_thread,
+                                  args=(queue, iterations, free_slots.release))
+        thread.start()
+        pool.append(thread)
+
+    # The next iteration is taken only when one of threads is free, so
+    # iterations are evenly distributed among all worker processes.
+    free_slots.acquire()
     iteration = next(iteration_gen)
     while iteration < times and not aborted.is_set():
         scenario_context = runner._get_scenario_context(context)
-        scenario_args = (iteration, cls, method_name, scenario_context, args)
-        worker_args = (queue, scenario_args)
+        iterations.put((iteration, cls, method_name, scenario_context, args))
 
-        thread = threading.Thread(target=runner._worker_thread,
-                                  args=worker_args)
-        thread.start()
-        pool.append((thread, time.time()))
-        alive_threads_in_pool += 1
-
-        while alive_threads_in_pool == concurrency:
-            prev_finished_threads_in_pool = finished_threads_in_pool
-            finished_threads_in_pool = 0
-            for t in pool:
-                if not t[0].isAlive():
-                    finished_threads_in_pool += 1
-
-            alive_threads_in_pool -= finished_threads_in_pool
-            alive_threads_in_pool += prev_finished_threads_in_pool
-
-            if alive_threads_in_pool < concurrency:
-                # NOTE(boris-42): cleanup pool array. This is required because
-                # in other case array length will be equal to times which
-                # is unlimited big
-                while pool and not pool[0][0].isAlive():
-                    pool.popleft()[0].join()
-                    finished_threads_in_pool -= 1
-                break
-
-            # we should wait to not create big noise with these checks
-            time.sleep(0.001)
+        free_slots.acquire()
         iteration = next(iteration_gen)
 
-    # Wait until all threads are done
-    while pool:
-        pool.popleft()[0].join()
+    # Stop all threads once they finish running iterations
+    for thread in pool:
+        iterations.put(None)
+    for thread in pool:
+        thread.join()
 
 
 @runner.configure(name="constant")
@@ -111,6 +104,10 @@ class ConstantScenarioRunner(runner.ScenarioRunner):
     number of concurrent scenarios which execute during a single
     iteration in order to simulate the activities of multiple users
     placing load on the cloud under test.
+
+    With "warm_up": true every worker process is prepared before the load
+    is started (e.g. OpenStack scenarios authenticate all users), so the
+    first iterations are not slower than the rest.
     """
 
     CONFIG_SCHEMA = {
@@ -135,6 +132,9 @@ class ConstantScenarioRunner(runner.ScenarioRunner):
             "max_cpu_count": {
                 "type": "integer",
                 "minimum": 1
+            },
+            "warm_up": {
+                "type": "boolean"
             }
         },
         "required": ["type"],
@@ -183,7 +183,8 @@ class ConstantScenarioRunner(runner.ScenarioRunner):
             while True:
                 yield (result_queue, iteration_gen, timeout,
                        concurrency_per_worker + (concurrency_overhead and 1),
-                       times, context, cls, method_name, args, self.aborted)
+                       times, context, cls, method_name, args, self.aborted,
+                       self.config.get("warm_up", False))
                 if concurrency_overhead:
                     concurrency_overhead -= 1
 
@@ -205,6 +206,10 @@ class ConstantForDurationScenarioRunner(runner.ScenarioRunner):
     number of concurrent scenarios which execute during a single
     iteration in order to simulate the activities of multiple users
     placing load on the cloud under test.
+
+    With "warm_up": true every worker process is prepared before the load
+    is started (e.g. OpenStack scenarios authenticate all users), so the
+    first iterations are not slower than the rest.
     """
 
     CONFIG_SCHEMA = {
@@ -225,6 +230,9 @@ class ConstantForDurationScenarioRunner(runner.ScenarioRunner):
             "timeout": {
                 "type": "number",
                 "minimum": 1
+            },
+            "warm_up": {
+                "type": "boolean"
             }
         },
         "required": ["type", "duration"],
@@ -255,7 +263,12 @@ class ConstantForDurationScenarioRunner(runner.ScenarioRunner):
         concurrency = self.config.get("concurrency", 1)
         duration = self.config.get("duration")
 
-        pool = multiprocessing.Pool(concurrency)
+        if self.config.get("warm_up", False):
+            pool = multiprocessing.Pool(concurrency,
+                                        initializer=runner._warm_up,
+                                        initargs=(cls, context))
+        else:
+            pool = multiprocessing.Pool(concurrency)
 
         run_args = butils.infinite_run_args_generator(
             self._iter_scenario_args(cls, method, context, args,
@@ -15,6 +15,7 @@
 
 import collections
 import multiprocessing
+import random
 import threading
 import time
 
@@ -26,19 +27,83 @@ from rally.task import runner
 LOG = logging.getLogger(__name__)
 
 
-def _worker_process(queue, iteration_gen, timeout, rps, times,
+def _iteration_schedule(profile, start, phase=0.0, poisson=False):
+    """Generate absolute start times of scenario iterations.
+
+    Start times depend only on the load profile, not on the time when
+    previous iterations finish, so the load is open-loop and the runner
+    does not drift from the requested rate.
+
+    :param profile: list of (rps, duration) steps. The rate of the last step
+                    is kept after the profile is over, duration of the last
+                    step may be None
+    :param start: timestamp of the load start
+    :param phase: part of the first interval (0..1) to shift start times by,
+                  so worker processes do not start iterations simultaneously
+    :param poisson: use exponentially distributed intervals between
+                    iterations (Poisson arrivals) instead of constant ones
+    """
+    steps = iter(profile)
+    rps, duration = next(steps)
+    step_end = start + duration if duration else None
+
+    if poisson:
+        deadline = start + random.expovariate(rps)
+    else:
+        deadline = start + phase / rps
+
+    while True:
+        while step_end is not None and deadline >= step_end:
+            try:
+                next_rps, duration = next(steps)
+            except StopIteration:
+                step_end = None
+                break
+            # Rescale the rest of the interval to the rate of the next step
+            deadline = step_end + (deadline - step_end) * rps / next_rps
+            rps = next_rps
+            step_end = step_end + duration if duration else None
+
+        yield deadline
+
+        if poisson:
+            deadline += random.expovariate(rps)
+        else:
+            deadline += 1.0 / rps
+
+
+def _worker_thread(queue, args, scheduled_at, on_done):
+    """Run the scenario once and record its start lag.
+
+    :param queue: queue object to append results
+    :param args: args of runner._run_scenario_once
+    :param scheduled_at: timestamp when the iteration was scheduled to start
+    :param on_done: callable that is called when the iteration is finished
+    """
+    try:
+        result = runner._run_scenario_once(args)
+        result["start_lag"] = max(result["timestamp"] - scheduled_at, 0.0)
+        queue.put(result)
+    finally:
+        on_done()
+
+
+def _worker_process(queue, iteration_gen, timeout, rps_profile, times,
                     max_concurrent, context, cls, method_name,
-                    args, aborted, info):
+                    args, aborted, poisson, warm_up, info):
     """Start scenario within threads.
 
-    Spawn N threads per second. Each thread runs the scenario once, and appends
-    result to queue. A maximum of max_concurrent threads will be ran
-    concurrently.
+    Start iterations in threads at moments defined by the rps profile.
+    Each thread runs the scenario once, and appends result to queue.
+    A maximum of max_concurrent threads will be ran concurrently, if all
+    of them are busy the next iteration starts late and its lag is
+    recorded in its result as start_lag.
 
     :param queue: queue object to append results
     :param iteration_gen: next iteration number generator
     :param timeout: operation's timeout
-    :param rps: number of scenario iterations to be run per one second
+    :param rps_profile: list of (rps, duration) steps of the load for this
+                        worker, see _iteration_schedule()
     :param times: total number of scenario iterations to be run
     :param max_concurrent: maximum worker concurrency
     :param context: scenario context object
@@ -47,47 +112,55 @@ def _worker_process(queue, iteration_gen, timeout, rps, times,
     :param args: scenario args
     :param aborted: multiprocessing.Event that aborts load generation if
                     the flag is set
+    :param poisson: whether to use Poisson arrivals of iterations
+    :param warm_up: warm up the process before the load, see
+                    Scenario.warm_up()
     :param info: info about all processes count and counter of runned process
     """
 
     pool = collections.deque()
-    sleep = 1.0 / rps
+    free_slots = threading.Semaphore(max_concurrent)
 
-    runner._log_worker_info(times=times, rps=rps, timeout=timeout,
-                            cls=cls, method_name=method_name, args=args)
+    runner._log_worker_info(times=times, rps_profile=rps_profile,
+                            timeout=timeout, cls=cls, method_name=method_name,
+                            args=args)
 
-    time.sleep(
-        (sleep * info["processes_counter"]) / info["processes_to_start"])
+    if warm_up:
+        runner._warm_up(cls, context)
 
     start = time.time()
+    schedule = _iteration_schedule(
+        rps_profile, start,
+        phase=float(info["processes_counter"]) / info["processes_to_start"],
+        poisson=poisson)
 
     i = 0
     while i < times and not aborted.is_set():
+        scheduled_at = next(schedule)
         scenario_context = runner._get_scenario_context(context)
         scenario_args = (next(iteration_gen), cls, method_name,
                          scenario_context, args)
-        worker_args = (queue, scenario_args)
-        thread = threading.Thread(target=runner._worker_thread,
-                                  args=worker_args)
+
+        delay = scheduled_at - time.time()
+        if delay > 0 and aborted.wait(delay):
+            break
+        free_slots.acquire()
+
+        thread = threading.Thread(
+            target=_worker_thread,
+            args=(queue, scenario_args, scheduled_at, free_slots.release))
         i += 1
         thread.start()
         pool.append(thread)
 
-        time_gap = time.time() - start
-        real_rps = i / time_gap if time_gap else "Infinity"
+        # Cleanup the pool, otherwise its length will be equal to times
+        while pool and not pool[0].is_alive():
+            pool.popleft().join()
 
-        LOG.debug("Worker: %s rps: %s (requested rps: %s)" %
-                  (i, real_rps, rps))
-
-        # try to join latest thread(s) until it finished, or until time to
-        # start new thread (if we have concurrent slots available)
-        while i / (time.time() - start) > rps or len(pool) >= max_concurrent:
-            if pool:
-                pool[0].join(0.001)
-                if not pool[0].isAlive():
-                    pool.popleft()
-            else:
-                time.sleep(0.001)
+    elapsed = time.time() - start
+    LOG.debug("Worker: %s iterations started, rps: %s (requested rps "
+              "profile: %s)" % (i, i / elapsed if elapsed else 0,
+                                rps_profile))
 
     while pool:
         thr = pool.popleft()
@@ -105,6 +178,27 @@ class RPSScenarioRunner(runner.ScenarioRunner):
     An example of a rps scenario is booting 1 VM per second. This
     execution type is thus very helpful in understanding the maximal load that
     a certain cloud can handle.
+
+    Iterations are started at moments computed in advance (open-loop load),
+    so a slow cloud does not reduce the rate of requests; the delay between
+    the scheduled and the actual start of each iteration is stored in its
+    result as start_lag. With "poisson": true intervals between iterations
+    are random (exponentially distributed) with the requested mean rate.
+
+    Instead of a single number "rps" may be a load profile that changes the
+    rate over time, which allows to find the saturation point of a cloud
+    in one run:
+
+    * a list of steps, e.g. [{"rps": 1, "duration": 60},
+      {"rps": 5, "duration": 60}]
+    * a ramp, e.g. {"start": 1, "end": 10, "step": 1, "duration": 60},
+      where duration is the length of each step in seconds
+
+    The rate of the last step is kept until all iterations are started.
+
+    With "warm_up": true every worker process is prepared before the load
+    is started (e.g. OpenStack scenarios authenticate all users), so the
+    first iterations are not slower than the rest.
     """
 
     CONFIG_SCHEMA = {
@@ -119,9 +213,64 @@ class RPSScenarioRunner(runner.ScenarioRunner):
                 "minimum": 1
             },
             "rps": {
-                "type": "number",
-                "exclusiveMinimum": True,
-                "minimum": 0
+                "anyOf": [
+                    {
+                        "type": "number",
+                        "exclusiveMinimum": True,
+                        "minimum": 0
+                    },
+                    {
+                        "type": "array",
+                        "minItems": 1,
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "rps": {
+                                    "type": "number",
+                                    "exclusiveMinimum": True,
+                                    "minimum": 0
+                                },
+                                "duration": {
+                                    "type": "number",
+                                    "exclusiveMinimum": True,
+                                    "minimum": 0
+                                }
+                            },
+                            "required": ["rps", "duration"],
+                            "additionalProperties": False
+                        }
+                    },
+                    {
+                        "type": "object",
+                        "properties": {
+                            "start": {
+                                "type": "number",
+                                "exclusiveMinimum": True,
+                                "minimum": 0
+                            },
+                            "end": {
+                                "type": "number",
+                                "exclusiveMinimum": True,
+                                "minimum": 0
+                            },
+                            "step": {
+                                "type": "number",
+                                "exclusiveMinimum": True,
+                                "minimum": 0
+                            },
+                            "duration": {
+                                "type": "number",
+                                "exclusiveMinimum": True,
+                                "minimum": 0
+                            }
+                        },
+                        "required": ["start", "end", "duration"],
+                        "additionalProperties": False
+                    }
+                ]
+            },
+            "poisson": {
+                "type": "boolean"
             },
             "timeout": {
                 "type": "number",
@@ -133,11 +282,32 @@ class RPSScenarioRunner(runner.ScenarioRunner):
             "max_cpu_count": {
                 "type": "integer",
                 "minimum": 1
+            },
+            "warm_up": {
+                "type": "boolean"
             }
         },
         "additionalProperties": False
     }
 
+    def _get_rps_profile(self):
+        """Return the load profile as a list of (rps, duration) steps."""
+        rps = self.config["rps"]
+        if isinstance(rps, list):
+            return [(float(s["rps"]), s["duration"]) for s in rps]
+        if isinstance(rps, dict):
+            step = rps.get("step", 1)
+            if rps["end"] < rps["start"]:
+                step = -step
+            profile = []
+            current = rps["start"]
+            while (current - rps["end"]) * step < 0:
+                profile.append((float(current), rps["duration"]))
+                current += step
+            profile.append((float(rps["end"]), rps["duration"]))
+            return profile
+        return [(float(rps), None)]
+
     def _run_scenario(self, cls, method_name, context, args):
         """Runs the specified benchmark scenario with given arguments.
 
@@ -165,7 +335,8 @@ class RPSScenarioRunner(runner.ScenarioRunner):
 
         processes_to_start = min(max_cpu_used, times,
                                  self.config.get("max_concurrency", times))
-        rps_per_worker = float(self.config["rps"]) / processes_to_start
+        rps_per_worker = [(rps / processes_to_start, duration)
+                          for rps, duration in self._get_rps_profile()]
         times_per_worker, times_overhead = divmod(times, processes_to_start)
 
         # Determine concurrency per worker
@@ -200,7 +371,9 @@ class RPSScenarioRunner(runner.ScenarioRunner):
                 yield (result_queue, iteration_gen, timeout, rps_per_worker,
                        times_per_worker + (times_overhead and 1),
                        concurrency_per_worker + (concurrency_overhead and 1),
-                       context, cls, method_name, args, self.aborted)
+                       context, cls, method_name, args, self.aborted,
+                       self.config.get("poisson", False),
+                       self.config.get("warm_up", False))
                 if times_overhead:
                     times_overhead -= 1
                 if concurrency_overhead:
@@ -0,0 +1,117 @@
+# Copyright 2015: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+"""
+SLA (Service-level agreement) is set of details for determining compliance
+with contracted values such as maximum error rate or minimum response time.
+"""
+
+import six
+
+from rally.common.i18n import _
+from rally.common import streaming_algorithms
+from rally import consts
+from rally.task import sla
+
+
+_PERCENTILES_SCHEMA = {
+    "type": "object",
+    "patternProperties": {
+        "^[1-9][0-9]?(\\.[0-9]+)?$": {"type": "number", "minimum": 0.0,
+                                      "exclusiveMinimum": True}
+    },
+    "additionalProperties": False,
+    "minProperties": 1
+}
+
+
+@sla.configure(name="max_percentile_duration")
+class MaxPercentileDuration(sla.SLA):
+    """Maximum percentiles of durations of iterations in seconds.
+
+    Percentiles are set as {"<percent>": <max seconds>}, e.g.
+    {"percentiles": {"50": 1.0, "99": 3.5}}. Percentiles of atomic actions
+    are set the same way by action name in "atomic_actions".
+
+    Percentiles are estimated with relative error not greater than 0.5%
+    in constant time and memory per iteration, so the check is done after
+    each iteration and the load can be aborted as soon as the tail latency
+    degrades. Failed iterations are not taken into account.
+    """
+    CONFIG_SCHEMA = {
+        "type": "object",
+        "$schema": consts.JSON_SCHEMA,
+        "properties": {
+            "percentiles": _PERCENTILES_SCHEMA,
+            "atomic_actions": {
+                "type": "object",
+                "additionalProperties": _PERCENTILES_SCHEMA
+            }
+        },
+        "additionalProperties": False
+    }
+
+    def __init__(self, criterion_value):
+        super(MaxPercentileDuration, self).__init__(criterion_value)
+        self.criteria = []
+        for percent, max_value in six.iteritems(
+                self.criterion_value.get("percentiles", {})):
+            self.criteria.append((None, float(percent), max_value))
+        for action, percentiles in six.iteritems(
+                self.criterion_value.get("atomic_actions", {})):
+            for percent, max_value in six.iteritems(percentiles):
+                self.criteria.append((action, float(percent), max_value))
+        self.criteria.sort(key=lambda c: (c[0] or "", c[1]))
+
+        self.sketches = dict((action, streaming_algorithms.QuantileSketch())
+                             for action, percent, max_value in self.criteria)
+        self.values = {}
+        # Criteria which are not met by the current percentiles
+        self.failed = set()
+
+    def add_iteration(self, iteration):
+        if not iteration.get("error"):
+            durations = dict(iteration.get("atomic_actions", {}))
+            durations[None] = iteration["duration"]
+            updated = set()
+            for action, sketch in six.iteritems(self.sketches):
+                if durations.get(action) is not None:
+                    sketch.add(durations[action])
+                    updated.add(action)
+
+            for action, percent, max_value in self.criteria:
+                if action in updated:
+                    value = self.sketches[action].quantile(percent / 100)
+                    self.values[(action, percent)] = value
+                    if value > max_value:
+                        self.failed.add((action, percent))
+                    else:
+                        self.failed.discard((action, percent))
+            self.success = not self.failed
+        return self.success
+
+    def details(self):
+        results = []
+        for action, percent, max_value in self.criteria:
+            value = self.values.get((action, percent))
+            results.append(_("%(percent)s%%ile duration%(action)s "
+                             "%(value)s <= %(max).2fs") % {
+                "percent": "%g" % percent,
+                "action": " of %s" % action if action else "",
+                "value": "n/a" if value is None else "%.2fs" % value,
+                "max": max_value})
+        return _("%(criteria)s - %(status)s") % {
+            "criteria": ", ".join(results), "status": self.status()}
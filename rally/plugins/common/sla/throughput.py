@@ -0,0 +1,101 @@
+# Copyright 2015: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+"""
+SLA (Service-level agreement) is set of details for determining compliance
+with contracted values such as maximum error rate or minimum response time.
+"""
+
+import bisect
+
+from rally.common.i18n import _
+from rally import consts
+from rally.task import sla
+
+
+@sla.configure(name="min_throughput")
+class MinThroughput(sla.SLA):
+    """Minimum rate of finished iterations per second.
+
+    The rate is measured over a sliding window of "window" seconds (10 by
+    default) of the iterations end time and the check fails if the rate
+    has fallen below "min_rate" at any moment of the load. The rate is not
+    checked until the load runs for at least one window, so the ramp-up
+    of concurrent iterations is not taken for a drop of throughput.
+
+    Results of concurrent iterations are not consumed exactly in order of
+    their end, so only windows which ended at least "lag" seconds (1 by
+    default) before the latest seen end of iteration are checked. Results
+    which are late for more than "lag" are not taken into account.
+    """
+    CONFIG_SCHEMA = {
+        "type": "object",
+        "$schema": consts.JSON_SCHEMA,
+        "properties": {
+            "min_rate": {"type": "number", "minimum": 0.0,
+                         "exclusiveMinimum": True},
+            "window": {"type": "number", "minimum": 0.0,
+                       "exclusiveMinimum": True},
+            "lag": {"type": "number", "minimum": 0.0}
+        },
+        "required": ["min_rate"],
+        "additionalProperties": False
+    }
+
+    def __init__(self, criterion_value):
+        super(MinThroughput, self).__init__(criterion_value)
+        self.min_rate = self.criterion_value["min_rate"]
+        self.window = self.criterion_value.get("window", 10.0)
+        self.lag = self.criterion_value.get("lag", 1.0)
+        self.started_at = None
+        self.last_end = None
+        # Sorted end times of iterations which are not checked yet or are
+        # within the last checked window
+        self.ends = []
+        self.rate = None
+
+    def add_iteration(self, iteration):
+        timestamp = iteration.get("timestamp")
+        if timestamp is None:
+            return self.success
+        if self.started_at is None or timestamp < self.started_at:
+            self.started_at = timestamp
+        end = (timestamp + iteration.get("duration", 0) +
+               iteration.get("idle_duration", 0))
+        if self.last_end is None or end > self.last_end:
+            self.last_end = end
+
+        # The window which ends at checked_until is not changed anymore
+        checked_until = self.last_end - self.lag
+        window_start = checked_until - self.window
+        if end > window_start:
+            bisect.insort(self.ends, end)
+        del self.ends[:bisect.bisect_right(self.ends, window_start)]
+
+        if checked_until - self.started_at >= self.window:
+            rate = (bisect.bisect_right(self.ends, checked_until) /
+                    float(self.window))
+            if self.rate is None or rate < self.rate:
+                self.rate = rate
+            self.success = self.rate >= self.min_rate
+        return self.success
+
+    def details(self):
+        rate = "n/a" if self.rate is None else "%.2f" % self.rate
+        return (_("Minimal throughput %(rate)s iterations/s >= %(min).2f "
+                  "iterations/s - %(status)s") %
+                {"rate": rate, "min": self.min_rate,
+                 "status": self.status()})
@@ -13,8 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-
 from oslo_config import cfg
+import six
 
 from rally.task import utils
 
@@ -33,7 +33,7 @@ CONF.register_opts(CLEANUP_OPTS, cleanup_group)
 def resource(service, resource, order=0, admin_required=False,
              perform_for_admin_only=False, tenant_resource=False,
              max_attempts=3, timeout=CONF.cleanup.resource_deletion_timeout,
-             interval=1, threads=20):
+             interval=1, threads=20, list_complete=False):
     """Decorator that overrides resource specification.
 
     Just put it on top of your resource class and specify arguments that you
@@ -53,6 +53,9 @@ def resource(service, resource, order=0, admin_required=False,
     :param interval: Resource status pooling interval
     :param threads: Amount of threads (workers) that are deleting resources
                     simultaneously
+    :param list_complete: list() returns all resources of the owner (it is
+                          not paginated or filtered), so resources missing
+                          from it are deleted
     """
 
     def inner(cls):
@@ -67,6 +70,7 @@ def resource(service, resource, order=0, admin_required=False,
         cls._interval = interval
         cls._threads = threads
         cls._tenant_resource = tenant_resource
+        cls._list_complete = list_complete
 
         return cls
 
@@ -82,6 +86,12 @@ class ResourceManager(object):
 
     If project python client is very specific, you can override delete(),
     list() and is_deleted() methods to make them fit to your case.
+
+    get_deleted() checks many resources with a single list() call. A
+    resource missing from list() is confirmed with is_deleted(), because
+    list() may return only a page or a filtered part of resources. If
+    list() of the resource always returns all resources of the owner, set
+    list_complete in @resource decorator to skip that check.
     """
 
     def __init__(self, resource=None, admin=None, user=None, tenant_uuid=None):
@@ -112,6 +122,37 @@ class ResourceManager(object):
 
         return utils.get_status(resource) in ("DELETED", "DELETE_COMPLETE")
 
+    def get_deleted(self, resources):
+        """Returns deleted resources from the passed ones.
+
+        Resources are checked with a single list() call: a listed resource
+        is deleted if it has DELETED or DELETE_COMPLETE status, a resource
+        which is not listed is checked with is_deleted() unless list() is
+        complete (see list_complete of @resource decorator). If is_deleted()
+        is overridden, resources are checked one by one.
+
+        :param resources: instances of this class initiated with resources
+                          of the same owner
+        """
+        if (six.get_unbound_function(type(self).is_deleted) is not
+                six.get_unbound_function(ResourceManager.is_deleted)):
+            return [res for res in resources if res.is_deleted()]
+
+        statuses = {}
+        for raw_resource in self.list():
+            resource_id = type(self)(resource=raw_resource).id()
+            statuses[resource_id] = utils.get_status(raw_resource)
+
+        deleted = []
+        for res in resources:
+            status = statuses.get(res.id())
+            if status is None:
+                if self._list_complete or res.is_deleted():
+                    deleted.append(res)
+            elif status in ("DELETED", "DELETE_COMPLETE"):
+                deleted.append(res)
+        return deleted
+
     def delete(self):
         """Delete resource that corresponds to instance of this class."""
         self._manager().delete(self.id())
@@ -13,6 +13,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import functools
+import itertools
+import threading
 import time
 
 from rally.common import broker
@@ -22,11 +26,125 @@ from rally.common.plugin import discover
 from rally.common import utils as rutils
 from rally import osclients
 from rally.plugins.openstack.context.cleanup import base
+# Resource managers are discovered as subclasses of base.ResourceManager,
+# so they should be imported even if plugins are loaded on demand
+from rally.plugins.openstack.context.cleanup import resources  # noqa
 
 
 LOG = logging.getLogger(__name__)
 
 
+class DeletionWatcher(object):
+
+    def __init__(self, manager_cls, get_client):
+        """Waits in background until deleted resources disappear.
+
+        Instead of polling every resource with is_deleted(), resources of
+        the same owner are checked together with get_deleted() of the
+        resource manager, that does one list() call per owner every
+        manager_cls._interval seconds (resources missing from the list are
+        confirmed with is_deleted()).
+
+        :param manager_cls: subclass of base.ResourceManager
+        :param get_client: function that returns clients for passed user,
+                           like SeekAndDestroy._get_cached_client
+        """
+        self.manager_cls = manager_cls
+        self._get_client = get_client
+        self._lock = threading.Lock()
+        # id of user (None for admin) -> list of (resource, started)
+        self._pending = {}
+        self._owners = {}
+        self._failures = collections.defaultdict(int)
+        self._finished = threading.Event()
+        self._thread = threading.Thread(target=self._run)
+
+    def start(self):
+        self._thread.start()
+
+    def add(self, admin, user, resource):
+        """Starts watching resource that should be deleted."""
+        key = user and user["id"]
+        with self._lock:
+            if key not in self._pending:
+                self._owners[key] = (admin, user)
+                self._pending[key] = []
+            self._pending[key].append((resource, time.time()))
+
+    def finish(self):
+        """Waits until all the watched resources are deleted or timed out."""
+        self._finished.set()
+        self._thread.join()
+
+    def _timed_out(self, resource):
+        LOG.warning(_("Resource deletion failed, timeout occurred for "
+                      "%(service)s.%(resource)s: %(uuid)s.")
+                    % {"uuid": resource.id(), "service": resource._service,
+                       "resource": resource._resource})
+
+    def _check(self, cache, key, pending):
+        admin, user = self._owners[key]
+        checker = self.manager_cls(
+            admin=self._get_client(admin, cache=cache),
+            user=self._get_client(user, cache=cache),
+            tenant_uuid=user and user["tenant_id"])
+
+        try:
+            deleted = set(map(id, checker.get_deleted(
+                [resource for resource, started in pending])))
+        except Exception as e:
+            LOG.warning(
+                _("Seems like %s.%s.get_deleted(self) method is broken "
+                  "It shouldn't raise any exceptions.")
+                % (checker.__module__, type(checker).__name__))
+            LOG.exception(e)
+
+            # Stop watching resources of the owner if the check keeps failing
+            self._failures[key] += 1
+            if self._failures[key] > self.manager_cls._max_attempts:
+                deleted = set()
+                for resource, started in pending:
+                    self._timed_out(resource)
+                    deleted.add(id(resource))
+            else:
+                deleted = set()
+
+        now = time.time()
+        done = set()
+        for resource, started in pending:
+            if id(resource) in deleted:
+                done.add(id(resource))
+            elif now - started >= resource._timeout:
+                self._timed_out(resource)
+                done.add(id(resource))
+
+        with self._lock:
+            self._pending[key] = [item for item in self._pending[key]
+                                  if id(item[0]) not in done]
+
+    def _run(self):
+        cache = {}
+        while True:
+            # All resources are added before finish(), so they are visible
+            # here if the flag is set
+            finished = self._finished.is_set()
+            with self._lock:
+                pending = dict((key, list(items))
+                               for key, items in self._pending.items()
+                               if items)
+
+            if not pending:
+                if finished:
+                    return
+                self._finished.wait(self.manager_cls._interval)
+                continue
+
+            for key, items in pending.items():
+                self._check(cache, key, items)
+
+            time.sleep(self.manager_cls._interval)
+
+
 class SeekAndDestroy(object):
 
     def __init__(self, manager_cls, admin, users):
@@ -59,7 +177,7 @@ class SeekAndDestroy(object):
 
         return cache[key]
 
-    def _delete_single_resource(self, resource):
+    def _delete_single_resource(self, resource, watch=None):
         """Safe resource deletion with retries and timeouts.
 
         Send request to delete resource, in case of failures repeat it few
@@ -69,6 +187,8 @@ class SeekAndDestroy(object):
 
         :param resource: instance of resource manager initiated with resource
                          that should be deleted.
+        :param watch: function that is called with resource instead of
+                      pulling its status, e.g. DeletionWatcher.add
         """
 
         msg_kw = {
@@ -91,6 +211,10 @@ class SeekAndDestroy(object):
             if logging.is_debug():
                 LOG.exception(e)
         else:
+            if watch is not None:
+                watch(resource)
+                return
+
             started = time.time()
             failures_count = 0
             while time.time() - started < resource._timeout:
@@ -128,6 +252,9 @@ class SeekAndDestroy(object):
 
         In case of tenant based resource, uuids are fetched only from one user
         per tenant.
+
+        Resources of different users are listed in parallel, jobs are
+        published as soon as resources of a user are listed.
         """
 
         def publisher(queue):
@@ -150,24 +277,32 @@ class SeekAndDestroy(object):
                 _publish(self.admin, None, manager)
 
             else:
-                visited_tenants = set()
-                admin_client = self._get_cached_client(self.admin)
-                for user in self.users:
-                    if (self.manager_cls._tenant_resource
-                       and user["tenant_id"] in visited_tenants):
-                        continue
-
-                    visited_tenants.add(user["tenant_id"])
+
+                def publish_users(users_queue):
+                    visited_tenants = set()
+                    for user in self.users:
+                        if (self.manager_cls._tenant_resource
+                           and user["tenant_id"] in visited_tenants):
+                            continue
+
+                        visited_tenants.add(user["tenant_id"])
+                        users_queue.append(user)
+
+                def list_resources(cache, user):
                     manager = self.manager_cls(
-                        admin=admin_client,
+                        admin=self._get_cached_client(self.admin,
+                                                      cache=cache),
                         user=self._get_cached_client(user),
                         tenant_uuid=user["tenant_id"])
 
                     _publish(self.admin, user, manager)
 
+                broker.run(publish_users, list_resources,
+                           consumers_count=self.manager_cls._threads)
+
         return publisher
 
-    def _gen_consumer(self):
+    def _gen_consumer(self, watcher=None):
         """Generate method that consumes single deletion job."""
 
         def consumer(cache, args):
@@ -180,15 +315,27 @@ class SeekAndDestroy(object):
                 user=self._get_cached_client(user, cache=cache),
                 tenant_uuid=user and user["tenant_id"])
 
-            self._delete_single_resource(manager)
+            if watcher is None:
+                self._delete_single_resource(manager)
+            else:
+                self._delete_single_resource(
+                    manager, watch=functools.partial(watcher.add, admin, user))
 
         return consumer
 
     def exterminate(self):
-        """Delete all resources for passed users, admin and resource_mgr."""
+        """Delete all resources for passed users, admin and resource_mgr.
 
-        broker.run(self._gen_publisher(), self._gen_consumer(),
-                   consumers_count=self.manager_cls._threads)
+        Consumers only send delete requests, waiting for deletion is done
+        by DeletionWatcher in background.
+        """
+        watcher = DeletionWatcher(self.manager_cls, self._get_cached_client)
+        watcher.start()
+        try:
+            broker.run(self._gen_publisher(), self._gen_consumer(watcher),
+                       consumers_count=self.manager_cls._threads)
+        finally:
+            watcher.finish()
 
 
 def list_resource_names(admin_required=None):
@@ -257,6 +404,10 @@ def cleanup(names=None, admin_required=None, admin=None, users=None):
     Then goes through all passed users and using cleaners cleans all related
     resources.
 
+    Resource managers are processed in order of their _order, managers with
+    the same _order are processed in parallel. Time spent on every resource
+    type is logged at the end.
+
     :param names: Use only resource manages that has name from this list.
                   There are in as _service or
                   (%s.%s % (_service, _resource)) from
@@ -275,8 +426,28 @@ def cleanup(names=None, admin_required=None, admin=None, users=None):
 
                   }
     """
-    for manager in find_resource_managers(names, admin_required):
+    timings = []
+
+    def exterminate(manager):
         LOG.debug("Cleaning up %(service)s %(resource)s objects" %
                   {"service": manager._service,
                    "resource": manager._resource})
+        started_at = time.time()
         SeekAndDestroy(manager, admin, users).exterminate()
+        timings.append(("%s.%s" % (manager._service, manager._resource),
+                        time.time() - started_at))
+
+    managers = find_resource_managers(names, admin_required)
+    for order, group in itertools.groupby(managers, lambda m: m._order):
+        # Resources with the same order do not depend on each other, so
+        # they are cleaned up at the same time
+        threads = [threading.Thread(target=exterminate, args=(manager,))
+                   for manager in group]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    if timings:
+        LOG.info(_("Cleanup durations: %s")
+                 % ", ".join("%s %.3fs" % timing for timing in timings))
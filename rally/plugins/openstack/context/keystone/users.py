@@ -13,7 +13,6 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import collections
 import random
 import uuid
 
@@ -40,6 +39,12 @@ USER_CONTEXT_OPTS = [
                default=30,
                help="How many concurrent threads use for serving users "
                     "context"),
+    cfg.IntOpt("resource_management_processes",
+               default=0,
+               help="How many processes run the threads serving users "
+                    "context, 0 means that threads are run by the main "
+                    "process. Processes are useful for big numbers of "
+                    "users when handling of requests is CPU bound"),
     cfg.StrOpt("project_domain",
                default="default",
                help="ID of domain in which projects will be created."),
@@ -94,6 +99,10 @@ class UserGenerator(UserContextMixin, context.Context):
                 "type": "integer",
                 "minimum": 1
             },
+            "resource_management_processes": {
+                "type": "integer",
+                "minimum": 0
+            },
             "project_domain": {
                 "type": "string",
             },
@@ -109,6 +118,8 @@ class UserGenerator(UserContextMixin, context.Context):
         "users_per_tenant": 1,
         "resource_management_workers":
             cfg.CONF.users_context.resource_management_workers,
+        "resource_management_processes":
+            cfg.CONF.users_context.resource_management_processes,
         "project_domain": cfg.CONF.users_context.project_domain,
         "user_domain": cfg.CONF.users_context.user_domain
     }
@@ -163,11 +174,12 @@ class UserGenerator(UserContextMixin, context.Context):
                                 "Exception: %(ex)s" %
                                 {"tenant_id": network_tenant_id, "ex": ex})
 
-    def _create_tenants(self):
-        threads = self.config["resource_management_workers"]
-
-        tenants = collections.deque()
+    def _run_broker(self, publish, consume):
+        return broker.run(publish, consume,
+                          self.config["resource_management_workers"],
+                          self.config["resource_management_processes"])
 
+    def _create_tenants(self):
         def publish(queue):
             for i in range(self.config["tenants"]):
                 args = (self.config["project_domain"], self.task["uuid"], i)
@@ -180,24 +192,18 @@ class UserGenerator(UserContextMixin, context.Context):
                 cache["client"] = keystone.wrap(clients.keystone())
             tenant = cache["client"].create_project(
                 self.generate_random_name(), domain)
-            tenant_dict = {"id": tenant.id, "name": tenant.name}
-            tenants.append(tenant_dict)
+            return {"id": tenant.id, "name": tenant.name}
 
-        # NOTE(msdubov): consume() will fill the tenants list in the closure.
-        broker.run(publish, consume, threads)
         tenants_dict = {}
-        for t in tenants:
+        for t in self._run_broker(publish, consume):
             tenants_dict[t["id"]] = t
 
         return tenants_dict
 
     def _create_users(self):
         # NOTE(msdubov): This should be called after _create_tenants().
-        threads = self.config["resource_management_workers"]
         users_per_tenant = self.config["users_per_tenant"]
 
-        users = collections.deque()
-
         def publish(queue):
             for tenant_id in self.context["tenants"]:
                 for user_id in range(users_per_tenant):
@@ -224,17 +230,13 @@ class UserGenerator(UserContextMixin, context.Context):
                 endpoint_type=self.endpoint.endpoint_type,
                 https_insecure=self.endpoint.insecure,
                 https_cacert=self.endpoint.cacert)
-            users.append({"id": user.id,
-                          "endpoint": user_endpoint,
-                          "tenant_id": tenant_id})
+            return {"id": user.id,
+                    "endpoint": user_endpoint,
+                    "tenant_id": tenant_id}
 
-        # NOTE(msdubov): consume() will fill the users list in the closure.
-        broker.run(publish, consume, threads)
-        return list(users)
+        return self._run_broker(publish, consume)
 
     def _delete_tenants(self):
-        threads = self.config["resource_management_workers"]
-
         self._remove_associated_networks()
 
         def publish(queue):
@@ -247,12 +249,10 @@ class UserGenerator(UserContextMixin, context.Context):
                 cache["client"] = keystone.wrap(clients.keystone())
             cache["client"].delete_project(tenant_id)
 
-        broker.run(publish, consume, threads)
+        self._run_broker(publish, consume)
         self.context["tenants"] = {}
 
     def _delete_users(self):
-        threads = self.config["resource_management_workers"]
-
         def publish(queue):
             for user in self.context["users"]:
                 queue.append(user["id"])
@@ -263,7 +263,7 @@ class UserGenerator(UserContextMixin, context.Context):
                 cache["client"] = keystone.wrap(clients.keystone())
             cache["client"].delete_user(user_id)
 
-        broker.run(publish, consume, threads)
+        self._run_broker(publish, consume)
         self.context["users"] = []
 
     @logging.log_task_wrapper(LOG.info, _("Enter context: `users`"))
@@ -28,22 +28,20 @@ class OpenStackScenario(scenario.Scenario):
     # remove it when they're using the new random name generator
     RESOURCE_NAME_PREFIX = "rally_"
 
+    # Clients created by warm_up() in the current process, they are reused
+    # by all scenario instances of the run instead of creating new ones per
+    # iteration
+    _clients_pool = {}
+
     def __init__(self, context=None, admin_clients=None, clients=None):
         super(OpenStackScenario, self).__init__(context)
         if context:
-            api_info = {}
-            if "api_versions" in context.get("config", {}):
-                api_versions = context["config"]["api_versions"]
-                for service in api_versions:
-                    api_info[service] = {
-                        "version": api_versions[service].get("version"),
-                        "service_type": api_versions[service].get(
-                            "service_type")}
+            api_info = self._get_api_info(context)
             if "admin" in context:
-                self._admin_clients = osclients.Clients(
+                self._admin_clients = self._get_clients(
                     context["admin"]["endpoint"], api_info)
             if "user" in context:
-                self._clients = osclients.Clients(context["user"]["endpoint"],
+                self._clients = self._get_clients(context["user"]["endpoint"],
                                                   api_info)
 
         if admin_clients:
@@ -59,6 +57,65 @@ class OpenStackScenario(scenario.Scenario):
                     " must be supplied")
             self._clients = clients
 
+    @staticmethod
+    def _get_api_info(context):
+        api_info = {}
+        if "api_versions" in context.get("config", {}):
+            api_versions = context["config"]["api_versions"]
+            for service in api_versions:
+                api_info[service] = {
+                    "version": api_versions[service].get("version"),
+                    "service_type": api_versions[service].get(
+                        "service_type")}
+        return api_info
+
+    @staticmethod
+    def _get_pool_key(endpoint, api_info):
+        # Context may be pickled on its way to a worker process, so
+        # endpoints are compared by value. SSL settings are skipped since
+        # Clients() changes them in place.
+        endpoint = endpoint.to_dict(include_permission=True)
+        endpoint.pop("https_insecure")
+        endpoint.pop("https_cacert")
+        return (tuple(sorted(endpoint.items())),
+                repr(sorted(api_info.items())))
+
+    @classmethod
+    def _get_clients(cls, endpoint, api_info):
+        pool = OpenStackScenario._clients_pool
+        if pool:
+            clients = pool.get(cls._get_pool_key(endpoint, api_info))
+            if clients is not None:
+                # Service clients keep the token they were created with
+                clients.clear_if_token_expires()
+                return clients
+        return osclients.Clients(endpoint, api_info)
+
+    @classmethod
+    def warm_up(cls, context):
+        """Authenticate admin and all users before the load.
+
+        Created Clients are shared by scenario instances in the current
+        process, so clients of services and their HTTP connections are
+        reused between iterations.
+        """
+        api_info = cls._get_api_info(context)
+        endpoints = [user["endpoint"] for user in context.get("users", [])]
+        if "admin" in context:
+            endpoints.append(context["admin"]["endpoint"])
+
+        pool = {}
+        for endpoint in endpoints:
+            clients = osclients.Clients(endpoint, api_info)
+            clients.keystone()
+            pool[cls._get_pool_key(endpoint, api_info)] = clients
+        OpenStackScenario._clients_pool = pool
+
+    @classmethod
+    def clear_warm_up(cls):
+        """Forget Clients created by warm_up()."""
+        OpenStackScenario._clients_pool = {}
+
     def clients(self, client_type, version=None):
         """Returns a python openstack client of the requested type.
 
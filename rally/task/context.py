@@ -134,6 +134,10 @@ class Context(plugin.Plugin, functional.FunctionalMixin,
         One of sample where this method is useful is users context.
         We have set of users and tenants but each scenario should have access
         to context of single user in single tenant.
+
+        context_obj is a shallow copy of global context, so its keys may be
+        replaced, but values that are taken from global context should not
+        be modified in place.
         """
         return context_obj
 
@@ -149,6 +153,7 @@ class ContextManager(object):
 
     def __init__(self, context_obj):
         self._visited = []
+        self._mappers = None
         self.context_obj = context_obj
 
     @staticmethod
@@ -191,15 +196,26 @@ class ContextManager(object):
         This method iterates over all context classes used in task
         and performs transformation of each of them to full context, order of
         transformation is the same as order of context creation.
+
+        Context classes are instantiated and sorted only once per
+        ContextManager. Only the result of transformation is copied, so the
+        cost of this method does not depend on the number of users and
+        tenants in full context.
         """
-        # NOTE(boris-42): Original context_obj is read only and should not
-        #                 be modified
-        context_obj = copy.deepcopy(self.context_obj)
+        if self._mappers is None:
+            self._mappers = self._get_sorted_context_lst()
 
-        for ctx in self._get_sorted_context_lst():
+        context_obj = dict(self.context_obj)
+        for ctx in self._mappers:
             context_obj = ctx.map_for_scenario(context_obj)
 
-        return context_obj
+        # NOTE(boris-42): Original context_obj is read only and should not
+        #                 be modified
+        # Task object is shared between iterations, scenarios do not modify it
+        memo = {}
+        if "task" in context_obj:
+            memo[id(context_obj["task"])] = context_obj["task"]
+        return copy.deepcopy(context_obj, memo)
 
     def __enter__(self):
         try:
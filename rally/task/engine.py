@@ -15,13 +15,19 @@
 
 import copy
 import json
+import multiprocessing
+import sys
 import threading
 import time
 import traceback
 
 import jsonschema
+from oslo_config import cfg
 import six
 
+from rally.common import aggregates
+from rally.common import broker
+from rally.common import columnar
 from rally.common.i18n import _
 from rally.common import log as logging
 from rally.common import objects
@@ -38,6 +44,25 @@ from rally.task import sla
 
 LOG = logging.getLogger(__name__)
 
+ENGINE_OPTS = [
+    cfg.IntOpt("max_parallel_subtasks", default=4,
+               help="Maximum number of subtasks marked with run_in_parallel "
+                    "that are executed at the same time. 0 means "
+                    "unlimited"),
+    cfg.IntOpt("result_chunk_size", default=1000,
+               help="Number of iteration results that are stored in the "
+                    "database at once while a scenario is running. 0 means "
+                    "that all results are stored when the scenario is "
+                    "finished"),
+    cfg.IntOpt("validation_threads", default=8,
+               help="Number of scenarios that are validated at the same "
+                    "time during the semantic validation of a task"),
+]
+
+CONF = cfg.CONF
+benchmark_group = cfg.OptGroup(name="benchmark", title="benchmark options")
+CONF.register_opts(ENGINE_OPTS, group=benchmark_group)
+
 
 class ResultConsumer(object):
     """ResultConsumer class stores results from ScenarioRunner, checks SLA."""
@@ -60,53 +85,182 @@ class ResultConsumer(object):
         self.abort_on_sla_failure = abort_on_sla_failure
         self.is_done = threading.Event()
         self.unexpected_failure = {}
-        self.results = []
+        self.results = columnar.IterationResults()
+        self.summary = aggregates.IterationsSummary()
+        # Protects the summary which is read by wait_and_abort thread to
+        # report progress
+        self.summary_lock = threading.Lock()
+        self._last_progress = None
+        self.chunk_size = CONF.benchmark.result_chunk_size
+        self.chunks_count = 0
+        self.results_id = None
+        # sys.exc_info() of the failure of the consumer thread
+        self.consumer_error = None
         self.thread = threading.Thread(
             target=self._consume_results
         )
         self.aborting_checker = threading.Thread(target=self.wait_and_abort)
 
     def __enter__(self):
+        if self.chunk_size:
+            self.results_id = self.task.create_results(self.key)
+        self.start = time.time()
         self.thread.start()
         self.aborting_checker.start()
-        self.start = time.time()
         return self
 
     def _consume_results(self):
+        try:
+            self._consume_results_loop()
+        except Exception as e:
+            LOG.exception(e)
+            self.consumer_error = sys.exc_info()
+            # Nobody consumes results anymore, so runners must not be
+            # blocked by the full results queue
+            self.runner.result_queue.close(discard=True)
+            self.runner.abort()
+
+    def _consume_results_loop(self):
         while True:
-            if self.runner.result_queue:
+            try:
                 result = self.runner.result_queue.popleft()
-                self.results.append(result)
-                success = self.sla_checker.add_iteration(result)
-                if self.abort_on_sla_failure and not success:
-                    self.sla_checker.set_aborted_on_sla()
-                    self.runner.abort()
-            elif self.is_done.isSet():
+            except IndexError:
+                # The queue is closed and all results are consumed
                 break
-            else:
-                time.sleep(0.1)
+            self.results.append(result)
+            with self.summary_lock:
+                self.summary.add(result)
+            success = self.sla_checker.add_iteration(result)
+            if self.abort_on_sla_failure and not success:
+                self.sla_checker.set_aborted_on_sla()
+                self.runner.abort()
+            if self.chunk_size and len(self.results) >= self.chunk_size:
+                try:
+                    self._store_chunk()
+                except Exception as e:
+                    # Results are kept and stored with the next chunk, the
+                    # runner must not be blocked by the full results queue
+                    LOG.exception(e)
+
+    def _store_chunk(self):
+        """Store consumed results in the database and forget them."""
+        self.task.append_results_chunk(self.results_id, self.chunks_count,
+                                       self.results)
+        self.chunks_count += 1
+        self.results = columnar.IterationResults()
+
+    def _store_last_chunk(self):
+        """Store the remaining results, retrying once on failure.
+
+        :returns: sys.exc_info() of the failure if the results could not be
+                  stored, None otherwise
+        """
+        for attempt in range(2):
+            try:
+                self._store_chunk()
+                return None
+            except Exception as e:
+                LOG.exception(e)
+                error = sys.exc_info()
+        self.sla_checker.set_unexpected_failure(error[1])
+        return error
 
     def __exit__(self, exc_type, exc_value, exc_traceback):
         self.finish = time.time()
         self.is_done.set()
+        self.runner.result_queue.close()
         self.aborting_checker.join()
         self.thread.join()
 
+        LOG.info("Task %(task)s | Results queue of %(name)s: max depth "
+                 "%(max_depth)s, runners throttled %(throttled).4fs, consume "
+                 "latency avg %(consume_latency_avg).4fs, max "
+                 "%(consume_latency_max).4fs"
+                 % dict(task=self.task["uuid"], name=self.key["name"],
+                        **self.runner.result_queue.stats()))
+
         if exc_type:
             self.sla_checker.set_unexpected_failure(exc_value)
+        elif self.consumer_error:
+            self.sla_checker.set_unexpected_failure(self.consumer_error[1])
 
         if objects.Task.get_status(
                 self.task["uuid"]) == consts.TaskStatus.ABORTED:
             self.sla_checker.set_aborted_manually()
 
-        # NOTE(boris-42): Sort in order of starting instead of order of ending
-        self.results.sort(key=lambda x: x["timestamp"])
-
-        self.task.append_results(self.key, {
-            "raw": self.results,
-            "load_duration": self.runner.run_duration,
-            "full_duration": self.finish - self.start,
-            "sla": self.sla_checker.results()})
+        store_error = None
+        if self.chunk_size:
+            if self.results:
+                store_error = self._store_last_chunk()
+            self.task.update_results(self.results_id, {
+                "load_duration": self.runner.run_duration,
+                "full_duration": self.finish - self.start,
+                "sla": self.sla_checker.results(),
+                "summary": self.summary.to_dict(),
+                "progress": self.get_progress()})
+        else:
+            # NOTE(boris-42): Sort in order of starting instead of order of
+            #                 ending
+            raw = sorted(self.results, key=lambda x: x["timestamp"])
+
+            self.task.append_results(self.key, {
+                "raw": raw,
+                "load_duration": self.runner.run_duration,
+                "full_duration": self.finish - self.start,
+                "sla": self.sla_checker.results(),
+                "summary": self.summary.to_dict()})
+
+        if self.consumer_error and not exc_type:
+            six.reraise(*self.consumer_error)
+        if store_error and not exc_type:
+            six.reraise(*store_error)
+
+    def get_progress(self):
+        """Return progress of the scenario run.
+
+        Rate of iterations is computed since the previous call.
+
+        :returns: dict with numbers of done and failed iterations, number
+                  of results waiting in the results queue, current rate of
+                  iterations (per second), 50 and 95 percentiles of
+                  iteration duration and elapsed time
+        """
+        now = time.time()
+        with self.summary_lock:
+            done = self.summary.iterations_count
+            failed = self.summary.iterations_failed
+            p50 = self.summary.duration.percentile(0.5)
+            p95 = self.summary.duration.percentile(0.95)
+
+        previous = self._last_progress or {"iterations_done": 0,
+                                           "timestamp": self.start}
+        elapsed = now - previous["timestamp"]
+        rate = ((done - previous["iterations_done"]) / elapsed
+                if elapsed > 0 else 0.0)
+
+        total = self.runner.config.get("times")
+
+        self._last_progress = {
+            "iterations_done": done,
+            "iterations_total": total,
+            "iterations_failed": failed,
+            "queue_depth": len(self.runner.result_queue),
+            "error_rate": float(failed) / done if done else 0.0,
+            "rate": rate,
+            "duration_p50": p50,
+            "duration_p95": p95,
+            "elapsed": now - self.start,
+            "timestamp": now}
+        return self._last_progress
+
+    def _update_progress(self):
+        if not self.results_id:
+            return
+        try:
+            self.task.update_progress(self.results_id, self.get_progress())
+        except Exception as e:
+            # Progress is informational, the run must go on anyway
+            LOG.exception(e)
 
     @staticmethod
     def is_task_in_aborting_status(task_uuid, check_soft=True):
@@ -125,6 +279,8 @@ class ResultConsumer(object):
     def wait_and_abort(self):
         """Waits until abort signal is received and aborts runner in this case.
 
+        Progress of the run is stored in the database meanwhile.
+
         Has to be run from different thread simultaneously with the
         runner.run method.
         """
@@ -135,6 +291,7 @@ class ResultConsumer(object):
                 self.runner.abort()
                 self.task.update_status(consts.TaskStatus.ABORTED)
                 break
+            self._update_progress()
             time.sleep(2.0)
 
 
@@ -192,16 +349,20 @@ class BenchmarkEngine(object):
     @logging.log_task_wrapper(LOG.info,
                               _("Task validation of scenarios names."))
     def _validate_config_scenarios_name(self, config):
-        available = set(s.get_name() for s in scenario.Scenario.get_all())
-
         specified = set()
         for subtask in config.subtasks:
             for s in subtask.scenarios:
                 specified.add(s["name"])
 
-        if not specified.issubset(available):
-            names = ", ".join(specified - available)
-            raise exceptions.NotFoundScenarios(names=names)
+        missing = []
+        for name in sorted(specified):
+            try:
+                scenario.Scenario.get(name)
+            except exceptions.PluginNotFound:
+                missing.append(name)
+
+        if missing:
+            raise exceptions.NotFoundScenarios(names=", ".join(missing))
 
     @logging.log_task_wrapper(LOG.info, _("Task validation of syntax."))
     def _validate_config_syntax(self, config):
@@ -221,11 +382,12 @@ class BenchmarkEngine(object):
                         reason=six.text_type(e)
                     )
 
-    def _validate_config_semantic_helper(self, admin, user, name, pos,
-                                         deployment, kwargs):
+    def _validate_config_semantic_helper(self, admin, users, name, pos,
+                                         deployment, kwargs, cache=None):
         try:
             scenario.Scenario.validate(
-                name, kwargs, admin=admin, users=[user], deployment=deployment)
+                name, kwargs, admin=admin, users=users, deployment=deployment,
+                cache=cache)
         except exceptions.InvalidScenarioArgument as e:
             kw = {"name": name, "pos": pos,
                   "config": kwargs, "reason": six.text_type(e)}
@@ -255,15 +417,40 @@ class BenchmarkEngine(object):
         with self._get_user_ctx_for_validation(ctx_conf) as ctx:
             ctx.setup()
             admin = osclients.Clients(self.admin)
-            user = osclients.Clients(ctx_conf["users"][0]["endpoint"])
-
-            for u in ctx_conf["users"]:
-                user = osclients.Clients(u["endpoint"])
-                for subtask in config.subtasks:
+            users = [osclients.Clients(u["endpoint"])
+                     for u in ctx_conf["users"]]
+            # Results of validators are shared between users of one tenant
+            # and between scenarios, see validation.invariant()
+            cache = scenario.ValidationCache()
+            started_at = time.time()
+
+            def publish(queue):
+                for i, subtask in enumerate(config.subtasks):
                     for pos, scenario_obj in enumerate(subtask.scenarios):
-                        self._validate_config_semantic_helper(
-                            admin, user, scenario_obj["name"],
-                            pos, deployment, scenario_obj)
+                        queue.append((i, pos, scenario_obj))
+
+            def consume(_cache, args):
+                i, pos, scenario_obj = args
+                try:
+                    self._validate_config_semantic_helper(
+                        admin, users, scenario_obj["name"], pos, deployment,
+                        scenario_obj, cache=cache)
+                except Exception as e:
+                    # Any failure of validation fails the task, so errors
+                    # are returned to be raised by the caller
+                    return (i, pos), e
+
+            errors = broker.run(
+                publish, consume,
+                consumers_count=max(1, CONF.benchmark.validation_threads))
+
+            LOG.info("Semantic validation took %(time).2f sec: "
+                     "%(calls)d validator calls, %(hits)d memoised results"
+                     % {"time": time.time() - started_at,
+                        "calls": cache.calls, "hits": cache.hits})
+            if errors:
+                # Report the first invalid scenario of the task
+                raise min(errors, key=lambda error: error[0])[1]
 
     @logging.log_task_wrapper(LOG.info, _("Task validation."))
     def validate(self):
@@ -278,9 +465,14 @@ class BenchmarkEngine(object):
             self.task.set_failed(log=log)
             raise exceptions.InvalidTaskException(str(e))
 
-    def _get_runner(self, config):
+    def _get_runner(self, config, max_cpu_count=None):
         conf = config.get("runner", {"type": "serial"})
-        return runner.ScenarioRunner.get(conf["type"])(self.task, conf)
+        runner_cls = runner.ScenarioRunner.get(conf["type"])
+        if (max_cpu_count and
+                "max_cpu_count" in runner_cls.CONFIG_SCHEMA["properties"]):
+            conf = dict(conf, max_cpu_count=min(
+                conf.get("max_cpu_count", max_cpu_count), max_cpu_count))
+        return runner_cls(self.task, conf)
 
     def _prepare_context(self, ctx, name, endpoint):
         scenario_context = copy.deepcopy(
@@ -300,41 +492,117 @@ class BenchmarkEngine(object):
 
         return context_obj
 
+    def _run_subtask(self, subtask, max_cpu_count=None):
+        """Run scenarios of the subtask one by one.
+
+        :param subtask: SubTask instance
+        :param max_cpu_count: limit of processes used by each runner
+        :returns: False if the task is aborted, otherwise True
+        """
+        for pos, scenario_obj in enumerate(subtask.scenarios):
+
+            if ResultConsumer.is_task_in_aborting_status(self.task["uuid"]):
+                LOG.info("Received aborting signal.")
+                self.task.update_status(consts.TaskStatus.ABORTED)
+                return False
+
+            name = scenario_obj["name"]
+            key = {"name": name, "pos": pos, "kw": scenario_obj}
+            LOG.info("Running benchmark with key: \n%s"
+                     % json.dumps(key, indent=2))
+            runner_obj = self._get_runner(scenario_obj, max_cpu_count)
+            context_obj = self._prepare_context(
+                scenario_obj.get("context", {}), name, self.admin)
+            try:
+                with ResultConsumer(key, self.task, runner_obj,
+                                    self.abort_on_sla_failure):
+                    with context.ContextManager(context_obj):
+                        runner_obj.run(name, context_obj,
+                                       scenario_obj.get("args", {}))
+            except Exception as e:
+                LOG.exception(e)
+
+        return True
+
+    def _run_subtasks_in_parallel(self, subtasks):
+        """Run subtasks at the same time, each one in a separate thread.
+
+        At most CONF.benchmark.max_parallel_subtasks subtasks are executed
+        at once and CPUs are shared equally between their runners.
+
+        :param subtasks: list of SubTask instances
+        :returns: False if the task is aborted, otherwise True
+        """
+        parallel = len(subtasks)
+        if CONF.benchmark.max_parallel_subtasks:
+            parallel = min(parallel, CONF.benchmark.max_parallel_subtasks)
+        max_cpu_count = max(multiprocessing.cpu_count() // parallel, 1)
+        semaphore = threading.Semaphore(parallel)
+        finished = []
+        errors = []
+
+        def run_subtask(subtask):
+            with semaphore:
+                try:
+                    finished.append(
+                        self._run_subtask(subtask, max_cpu_count))
+                except Exception as e:
+                    errors.append(e)
+
+        LOG.info("Running %(count)d subtasks in parallel, at most %(max)d "
+                 "at the same time" % {"count": len(subtasks),
+                                       "max": parallel})
+        threads = [threading.Thread(target=run_subtask, args=(subtask,))
+                   for subtask in subtasks]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            raise errors[0]
+        return all(finished)
+
+    @staticmethod
+    def _group_subtasks(subtasks):
+        """Split subtasks into groups of subtasks executed at the same time.
+
+        Each group is a sequence of consecutive subtasks marked with
+        run_in_parallel, other subtasks are groups of a single subtask.
+        """
+        group = []
+        for subtask in subtasks:
+            if not subtask.run_in_parallel:
+                if group:
+                    yield group
+                    group = []
+                yield [subtask]
+            else:
+                group.append(subtask)
+        if group:
+            yield group
+
     @logging.log_task_wrapper(LOG.info, _("Benchmarking."))
     def run(self):
         """Run the benchmark according to the test configuration.
 
         Test configuration is specified on engine initialization.
 
+        Consecutive subtasks marked with run_in_parallel are executed at the
+        same time, each with its own context, runner and results consumer.
+
         :returns: List of dicts, each dict containing the results of all the
                   corresponding benchmark test launches
         """
         self.task.update_status(consts.TaskStatus.RUNNING)
 
-        for subtask in self.config.subtasks:
-            for pos, scenario_obj in enumerate(subtask.scenarios):
-
-                if ResultConsumer.is_task_in_aborting_status(
-                        self.task["uuid"]):
-                    LOG.info("Received aborting signal.")
-                    self.task.update_status(consts.TaskStatus.ABORTED)
-                    return
-
-                name = scenario_obj["name"]
-                key = {"name": name, "pos": pos, "kw": scenario_obj}
-                LOG.info("Running benchmark with key: \n%s"
-                         % json.dumps(key, indent=2))
-                runner_obj = self._get_runner(scenario_obj)
-                context_obj = self._prepare_context(
-                    scenario_obj.get("context", {}), name, self.admin)
-                try:
-                    with ResultConsumer(key, self.task, runner_obj,
-                                        self.abort_on_sla_failure):
-                        with context.ContextManager(context_obj):
-                            runner_obj.run(name, context_obj,
-                                           scenario_obj.get("args", {}))
-                except Exception as e:
-                    LOG.exception(e)
+        for subtasks in self._group_subtasks(self.config.subtasks):
+            if len(subtasks) == 1:
+                completed = self._run_subtask(subtasks[0])
+            else:
+                completed = self._run_subtasks_in_parallel(subtasks)
+            if not completed:
+                return
 
         if objects.Task.get_status(
                 self.task["uuid"]) != consts.TaskStatus.ABORTED:
@@ -496,5 +764,6 @@ class SubTask(object):
         self.tags = config.get("tags", [])
         self.group = config.get("group")
         self.description = config.get("description")
+        self.run_in_parallel = config.get("run_in_parallel", False)
         self.scenarios = config["scenarios"]
         self.context = config.get("context", {})
@@ -13,10 +13,17 @@
 #    under the License.
 
 import abc
+import array
 import bisect
 import copy
 import math
 
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is optional, charts are computed iteration by iteration
+    # without it
+    np = None
 import six
 
 from rally.common import costilius
@@ -25,10 +32,103 @@ from rally import exceptions
 from rally.task.processing import utils
 
 
+_NAN = float("nan")
+
+
+def _append_number(column, value):
+    try:
+        column.append(value)
+    except TypeError:
+        column.append(_NAN)
+
+
+class IterationColumns(object):
+    """Iteration results of a scenario collected into typed columns.
+
+    Charts process the columns at once with NumPy array operations, see
+    Chart.add_columns(), which is much faster than processing iterations
+    one by one.
+
+    Missing and non numerical values are stored as NaN.
+    """
+
+    def __init__(self, benchmark_info, keep_iterations=False):
+        """Init empty columns.
+
+        :param benchmark_info: dict, generalized info about iterations
+        :param keep_iterations: bool, whether to keep the iterations as is,
+                                for charts which do not support columns
+        """
+        self.count = 0
+        self.duration = array.array("d")
+        self.idle_duration = array.array("d")
+        self.timestamp = array.array("d")
+        self.error = array.array("b")
+        self.atomic = costilius.OrderedDict(
+            (name, array.array("d")) for name in benchmark_info["atomic"])
+        self.atomic_present = dict(
+            (name, array.array("b")) for name in benchmark_info["atomic"])
+        self._atomic_columns = [
+            (name, column, self.atomic_present[name])
+            for name, column in self.atomic.items()]
+        self.output = costilius.OrderedDict(
+            (name, array.array("d"))
+            for name in benchmark_info["output_names"])
+        self.iterations = [] if keep_iterations else None
+
+    def append(self, iteration):
+        """Add iteration data.
+
+        :param iteration: dict, extended iteration result
+        """
+        self.count += 1
+        if self.iterations is not None:
+            self.iterations.append(iteration)
+        _append_number(self.duration, iteration["duration"])
+        _append_number(self.idle_duration, iteration["idle_duration"])
+        _append_number(self.timestamp, iteration["timestamp"])
+        self.error.append(1 if iteration["error"] else 0)
+
+        atomic_actions = iteration["atomic_actions"]
+        for name, column, present in self._atomic_columns:
+            value = atomic_actions.get(name, _NAN)
+            try:
+                column.append(value)
+            except TypeError:
+                column.append(_NAN)
+            present.append(value is not _NAN)
+
+        output = iteration["scenario_output"]["data"]
+        for name, column in self.output.items():
+            _append_number(column, output.get(name, 0))
+
+
+def _array(column, dtype=float):
+    return np.array(column, dtype=dtype)
+
+
+def _zero_nan(values):
+    return np.where(np.isnan(values), 0, values)
+
+
+def _percentiles(values, percents):
+    # The same algorithm as of streaming.PercentileComputation: exact
+    # percentiles up to EXACT_LIMIT values and estimated ones for more
+    if len(values) <= streaming.PercentileComputation.EXACT_LIMIT:
+        return [float(value) for value in
+                np.percentile(values, [p * 100 for p in percents])]
+    sketch = streaming.QuantileSketch()
+    sketch.add_many(values)
+    return [sketch.quantile(p) for p in percents]
+
+
 @six.add_metaclass(abc.ABCMeta)
 class Chart(object):
     """Base class for charts."""
 
+    # Whether the chart implements _map_columns() or add_columns()
+    supports_columns = False
+
     def __init__(self, benchmark_info, zipped_size=1000):
         """Setup initial values.
 
@@ -56,6 +156,35 @@ class Chart(object):
                                                      self.zipped_size)
             self._data[name].add_point(value)
 
+    def add_columns(self, columns):
+        """Add data of all iterations at once.
+
+        This is a batch version of add_iteration() which requires NumPy.
+        It must not be mixed with add_iteration(). Charts which do not
+        support columns process the iterations one by one, so the columns
+        must keep them.
+
+        :param columns: IterationColumns instance
+        """
+        if not columns.count:
+            return
+        if self.supports_columns:
+            self._add_mapped_columns(self._map_columns(columns))
+        elif columns.iterations is None:
+            raise exceptions.RallyException(
+                "%s does not support columns, iterations are required"
+                % self.__class__.__name__)
+        else:
+            for iteration in columns.iterations:
+                self.add_iteration(iteration)
+
+    def _add_mapped_columns(self, mapped):
+        """Add arrays of values returned by _map_columns()."""
+        for name, values in mapped:
+            self._data[name] = utils.GraphZipper(self.base_size,
+                                                 self.zipped_size)
+            self._data[name].add_points(values)
+
     def render(self):
         """Generate chart data ready for drawing."""
         return [(name, points.get_zipped_graph())
@@ -76,9 +205,18 @@ class Chart(object):
     def _map_iteration_values(self, iteration):
         """Get values for processing, from given iteration."""
 
+    def _map_columns(self, columns):
+        """Get arrays of values for processing, from given columns.
+
+        :returns: values in the format handled by _add_mapped_columns()
+        """
+        raise NotImplementedError()
+
 
 class MainStackedAreaChart(Chart):
 
+    supports_columns = True
+
     def _map_iteration_values(self, iteration):
         if iteration["error"]:
             result = [("duration", 0), ("idle_duration", 0)]
@@ -93,9 +231,22 @@ class MainStackedAreaChart(Chart):
                 result.append(("failed_duration", 0))
         return result
 
+    def _map_columns(self, columns):
+        error = _array(columns.error, bool)
+        duration = _array(columns.duration)
+        idle_duration = _array(columns.idle_duration)
+        result = [("duration", np.where(error, 0, duration)),
+                  ("idle_duration", np.where(error, 0, idle_duration))]
+        if self._benchmark_info["iterations_failed"]:
+            result.append(("failed_duration",
+                           np.where(error, duration + idle_duration, 0)))
+        return result
+
 
 class AtomicStackedAreaChart(Chart):
 
+    supports_columns = True
+
     def _map_iteration_values(self, iteration):
         iteration = self._fix_atomic_actions(iteration)
         atomics = list(iteration["atomic_actions"].items())
@@ -109,13 +260,32 @@ class AtomicStackedAreaChart(Chart):
             atomics.append(("failed_duration", failed_duration))
         return atomics
 
+    def _map_columns(self, columns):
+        atomics = [(name, _zero_nan(_array(values)))
+                   for name, values in columns.atomic.items()]
+        if self._benchmark_info["iterations_failed"]:
+            error = _array(columns.error, bool)
+            failed_duration = (_array(columns.duration) +
+                               _array(columns.idle_duration))
+            for name, values in atomics:
+                failed_duration = failed_duration - values
+            atomics.append(("failed_duration",
+                            np.where(error, failed_duration, 0)))
+        return atomics
+
 
 class OutputStackedAreaChart(Chart):
 
+    supports_columns = True
+
     def _map_iteration_values(self, iteration):
         return [(name, iteration["scenario_output"]["data"].get(name, 0))
                 for name in self._benchmark_info["output_names"]]
 
+    def _map_columns(self, columns):
+        return [(name, _zero_nan(_array(values)))
+                for name, values in columns.output.items()]
+
 
 class AvgChart(Chart):
     """Base class for charts with average results."""
@@ -126,20 +296,35 @@ class AvgChart(Chart):
                 self._data[name] = streaming.MeanComputation()
             self._data[name].add(value or 0)
 
+    def _add_mapped_columns(self, mapped):
+        for name, values in mapped:
+            if len(values):
+                self._data[name] = streaming.MeanComputation()
+                self._data[name].total = float(np.sum(values))
+                self._data[name].count = len(values)
+
     def render(self):
         return [(k, v.result()) for k, v in self._data.items()]
 
 
 class AtomicAvgChart(AvgChart):
 
+    supports_columns = True
+
     def _map_iteration_values(self, iteration):
         iteration = self._fix_atomic_actions(iteration)
         return list(iteration["atomic_actions"].items())
 
+    def _map_columns(self, columns):
+        return [(name, _zero_nan(_array(values)))
+                for name, values in columns.atomic.items()]
+
 
 class LoadProfileChart(Chart):
     """Chart for parallel durations."""
 
+    supports_columns = True
+
     def __init__(self, benchmark_info, name="parallel iterations",
                  scale=200):
         """Setup chart with graph name and scale.
@@ -184,6 +369,24 @@ class LoadProfileChart(Chart):
         self._started[bisect.bisect(self._time_axis, ts_start)] += 1
         self._stopped[bisect.bisect(self._time_axis, ts_stop)] += 1
 
+    def _map_columns(self, columns):
+        return (_array(columns.timestamp),
+                np.where(_array(columns.error, bool), 0,
+                         _array(columns.duration)))
+
+    def _count_bins(self, counts, values):
+        # The same as bisect.bisect() for each value
+        bins = np.searchsorted(self._time_axis, values, side="right")
+        return [count + int(new) for count, new in zip(
+            counts, np.bincount(bins, minlength=len(counts)))]
+
+    def _add_mapped_columns(self, mapped):
+        timestamp, duration = mapped
+        ts_start = timestamp - self._tstamp_start
+        ts_stop = ts_start + duration
+        self._started = self._count_bins(self._started, ts_start)
+        self._stopped = self._count_bins(self._stopped, ts_stop)
+
     def render(self):
         data = []
         running = 0
@@ -226,11 +429,23 @@ class HistogramChart(Chart):
         for name, value in self._map_iteration_values(iteration):
             if name not in self._data:
                 raise KeyError("Unexpected histogram name: %s" % name)
-            for i, view in enumerate(self._data[name]["views"]):
-                for bin_i, bin_v in enumerate(view["x"]):
-                    if (value or 0) <= bin_v:
-                        self._data[name]["views"][i]["y"][bin_i] += 1
-                        break
+            for view in self._data[name]["views"]:
+                # Bins are sorted by their upper bounds, so the bin of the
+                # value is the first one with the upper bound >= value
+                bin_i = bisect.bisect_left(view["x"], value or 0)
+                if bin_i < len(view["y"]):
+                    view["y"][bin_i] += 1
+
+    def _add_mapped_columns(self, mapped):
+        for name, values in mapped:
+            if name not in self._data:
+                raise KeyError("Unexpected histogram name: %s" % name)
+            for view in self._data[name]["views"]:
+                # The same as bisect.bisect_left() for each value, values
+                # beyond the last bin are skipped
+                bins = np.searchsorted(view["x"], values, side="left")
+                view["y"] = [y + int(new) for y, new in zip(
+                    view["y"], np.bincount(bins, minlength=len(view["y"])))]
 
     def render(self):
         data = []
@@ -244,6 +459,8 @@ class HistogramChart(Chart):
 
 class MainHistogramChart(HistogramChart):
 
+    supports_columns = True
+
     def __init__(self, benchmark_info):
         super(MainHistogramChart, self).__init__(benchmark_info)
         views = self._init_views(self._benchmark_info["min_duration"],
@@ -253,9 +470,15 @@ class MainHistogramChart(HistogramChart):
     def _map_iteration_values(self, iteration):
         return [("task", 0 if iteration["error"] else iteration["duration"])]
 
+    def _map_columns(self, columns):
+        return [("task", np.where(_array(columns.error, bool), 0,
+                                  _zero_nan(_array(columns.duration))))]
+
 
 class AtomicHistogramChart(HistogramChart):
 
+    supports_columns = True
+
     def __init__(self, benchmark_info):
         super(AtomicHistogramChart, self).__init__(benchmark_info)
         for i, atomic in enumerate(self._benchmark_info["atomic"].items()):
@@ -269,10 +492,29 @@ class AtomicHistogramChart(HistogramChart):
         iteration = self._fix_atomic_actions(iteration)
         return list(iteration["atomic_actions"].items())
 
+    def _map_columns(self, columns):
+        return [(name, _zero_nan(_array(values)))
+                for name, values in columns.atomic.items()]
+
+
+class _ComputedResult(streaming.StreamingAlgorithm):
+    """Result which is computed in advance."""
+
+    def __init__(self, value):
+        self._value = value
+
+    def add(self, value):
+        raise TypeError("The result is already computed")
+
+    def result(self):
+        return self._value
+
 
 class MainStatsTable(Chart):
 
-    def _init_row(self, name, iterations_count):
+    supports_columns = True
+
+    def _init_row(self, name):
 
         def round_3(stream, no_result):
             if no_result:
@@ -282,12 +524,9 @@ class MainStatsTable(Chart):
         return [
             ("Action", name),
             ("Min (sec)", streaming.MinComputation(), round_3),
-            ("Median (sec)",
-             streaming.PercentileComputation(0.5, iterations_count), round_3),
-            ("90%ile (sec)",
-             streaming.PercentileComputation(0.9, iterations_count), round_3),
-            ("95%ile (sec)",
-             streaming.PercentileComputation(0.95, iterations_count), round_3),
+            ("Median (sec)", streaming.PercentileComputation(0.5), round_3),
+            ("90%ile (sec)", streaming.PercentileComputation(0.9), round_3),
+            ("95%ile (sec)", streaming.PercentileComputation(0.95), round_3),
             ("Max (sec)", streaming.MaxComputation(), round_3),
             ("Avg (sec)", streaming.MeanComputation(), round_3),
             ("Success", streaming.MeanComputation(),
@@ -301,8 +540,7 @@ class MainStatsTable(Chart):
         self.rows = list(benchmark_info["atomic"].keys())
         self.rows.append("total")
         self.rows_index = dict((name, i) for i, name in enumerate(self.rows))
-        self.table = [self._init_row(name, benchmark_info["iterations_count"])
-                      for name in self.rows]
+        self.table = [self._init_row(name) for name in self.rows]
 
     def add_iteration(self, iteration):
         data = copy.copy(iteration["atomic_actions"])
@@ -315,9 +553,42 @@ class MainStatsTable(Chart):
                 self.table[index][-2][1].add(0)
             else:
                 self.table[index][-2][1].add(1)
+                if value is None:
+                    continue
                 for elem in self.table[index][1:-2]:
                     elem[1].add(value)
 
+    def _set_results(self, index, results):
+        for i, value in results.items():
+            title, stream, render = self.table[index][i]
+            self.table[index][i] = (title, _ComputedResult(value), render)
+
+    def add_columns(self, columns):
+        error = _array(columns.error, bool)
+        for index, name in enumerate(self.rows):
+            if name == "total":
+                values = _array(columns.duration)
+                present = np.ones(columns.count, dtype=bool)
+            else:
+                values = _array(columns.atomic[name])
+                present = _array(columns.atomic_present[name], bool)
+            count = int(np.sum(present))
+            if not count:
+                continue
+            passed = present & ~error
+            success = float(np.sum(passed)) / count
+            # Atomic actions without duration are not taken into account
+            values = values[passed & ~np.isnan(values)]
+
+            results = {-2: success, -1: count}
+            if len(values):
+                median, p90, p95 = _percentiles(values, [0.5, 0.9, 0.95])
+                results.update({1: float(np.min(values)), 2: median,
+                                3: p90, 4: p95,
+                                5: float(np.max(values)),
+                                6: float(np.mean(values))})
+            self._set_results(index, results)
+
     def render(self):
         rows = []
 
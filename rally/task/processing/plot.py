@@ -31,6 +31,19 @@ def _process_scenario(data, pos):
     atomic_hist = charts.AtomicHistogramChart(data["info"])
     output_area = charts.OutputStackedAreaChart(data["info"])
 
+    all_charts = (main_area, main_hist, main_stat, load_profile,
+                  atomic_pie, atomic_area, atomic_hist, output_area)
+    # With NumPy iterations are collected into columns and charts are
+    # computed at once, otherwise iterations are processed one by one
+    if charts.np is not None:
+        columns = charts.IterationColumns(data["info"])
+        columns_charts = [c for c in all_charts if c.supports_columns]
+        iteration_charts = [c for c in all_charts if not c.supports_columns]
+    else:
+        columns = None
+        columns_charts = []
+        iteration_charts = all_charts
+
     errors = []
     output_errors = []
     for idx, itr in enumerate(data["iterations"]):
@@ -42,10 +55,14 @@ def _process_scenario(data, pos):
         if itr["scenario_output"]["errors"]:
             output_errors.append((idx, itr["scenario_output"]["errors"]))
 
-        for chart in (main_area, main_hist, main_stat, load_profile,
-                      atomic_pie, atomic_area, atomic_hist, output_area):
+        if columns is not None:
+            columns.append(itr)
+        for chart in iteration_charts:
             chart.add_iteration(itr)
 
+    for chart in columns_charts:
+        chart.add_columns(columns)
+
     kw = data["key"]["kw"]
     cls, method = data["key"]["name"].split(".")
 
@@ -93,26 +110,29 @@ def _process_tasks(tasks_results):
     return source, sorted(tasks, key=lambda r: r["cls"] + r["name"])
 
 
-def plot(tasks_results):
+def _to_generic_result(result):
     # NOTE(amaretskiy): Transform generic results into extended
     #   results, so they can be processed by charts classes
-    extended_results = []
-    for result in tasks_results:
-        generic = {
-            "id": None,
-            "task_uuid": None,
-            "key": result["key"],
-            "data": {
-                "sla": result["sla"],
-                "raw": result["result"],
-                "full_duration": result[
-                    "full_duration"],
-                "load_duration": result[
-                    "load_duration"]},
-            "created_at": None,
-            "updated_at": None}
-        extended_results.extend(
-            objects.Task.extend_results([generic]))
+    return {
+        "id": None,
+        "task_uuid": None,
+        "key": result["key"],
+        "data": {
+            "sla": result["sla"],
+            "raw": result["result"],
+            "full_duration": result[
+                "full_duration"],
+            "load_duration": result[
+                "load_duration"]},
+        "created_at": None,
+        "updated_at": None}
+
+
+def plot(tasks_results):
+    # Results are extended and processed one by one, so only iterations of
+    # a single scenario are processed at once
+    extended_results = objects.Task.extend_results(
+        _to_generic_result(result) for result in tasks_results)
 
     template = ui_utils.get_template("task/report.html")
     source, data = _process_tasks(extended_results)
@@ -15,6 +15,12 @@
 
 import math
 
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is optional, it speeds up processing of large results
+    np = None
+
 from rally.common import costilius
 from rally.common.i18n import _
 from rally import exceptions
@@ -159,5 +165,58 @@ class GraphZipper(object):
             self.ratio_value_points = [[1 - rest, value]]
             self.cached_ratios_sum = self.ratio_value_points[0][0]
 
+    def add_points(self, values):
+        """Add all points of the graph at once.
+
+        This is a vectorized version of add_point() which requires NumPy
+        and the empty graph, otherwise points are added one by one.
+
+        :param values: sequence of values or NumPy array
+        """
+        if np is None or self.point_order:
+            for value in values:
+                self.add_point(value)
+            return
+
+        # Non numerical values are counted as 0, like in add_point()
+        if not isinstance(values, np.ndarray):
+            values = [v if isinstance(v, (int, float)) else 0
+                      for v in values]
+        values = np.asarray(values, dtype=float)
+        values = np.where(np.isnan(values), 0, values)
+        count = len(values)
+        if count > self.base_size:
+            raise RuntimeError("GraphZipper is already full. "
+                               "You can't add more points.")
+        self.point_order = count
+        if self.compression_ratio <= 1:
+            self.zipped_graph.extend(
+                [i + 1, value] for i, value in enumerate(values.tolist()))
+            return
+
+        # Each zipped point is the average of the step function of values
+        # over the interval [(k - 1) * ratio, k * ratio), it is emitted
+        # when the point which covers the end of the interval is added.
+        ratio = self.compression_ratio
+        ks = np.arange(1, int(math.ceil(count / ratio)) + 2)
+        orders = np.ceil(ks * ratio - 1e-9).astype(int)
+        ks, orders = ks[orders <= count], orders[orders <= count]
+
+        sums = np.concatenate(([0.0], np.cumsum(values)))
+        values = np.append(values, 0.0)
+
+        def integral(x):
+            floor = np.floor(x).astype(int)
+            return sums[floor] + (x - floor) * values[floor]
+
+        zipped = (integral(ks * ratio) - integral((ks - 1) * ratio)) / ratio
+        orders = np.where(
+            orders - ratio <= 1, 1,
+            np.where(orders == self.base_size, self.base_size,
+                     orders - int(ratio / 2.0)))
+        self.zipped_graph.extend(
+            [order, value]
+            for order, value in zip(orders.tolist(), zipped.tolist()))
+
     def get_zipped_graph(self):
         return self.zipped_graph
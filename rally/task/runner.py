@@ -16,12 +16,18 @@
 import abc
 import collections
 import multiprocessing
+from multiprocessing import connection as mp_connection
+from multiprocessing import queues as mp_queues
+import threading
 import time
 
 import jsonschema
+from oslo_config import cfg
+from six import moves
 
 from rally.common import log as logging
 from rally.common.plugin import plugin
+from rally.common import streaming_algorithms as streaming
 from rally.common import utils as rutils
 from rally import consts
 from rally.task import context
@@ -32,6 +38,33 @@ from rally.task import utils
 
 LOG = logging.getLogger(__name__)
 
+RUNNER_OPTS = [
+    cfg.IntOpt("runner_result_queue_size", default=10000,
+               help="Maximum number of iteration results buffered between "
+                    "a scenario runner and the results consumer. Runners "
+                    "are throttled when the limit is reached. 0 means "
+                    "unlimited"),
+]
+
+CONF = cfg.CONF
+benchmark_group = cfg.OptGroup(name="benchmark", title="benchmark options")
+CONF.register_opts(RUNNER_OPTS, group=benchmark_group)
+
+# Waits for any of connections and process sentinels, Python 3.3+ only
+_wait_for_objects = getattr(mp_connection, "wait", None)
+
+
+def _get_queue_reader(queue):
+    """Return the connection to wait for data of multiprocessing.Queue.
+
+    multiprocessing.Queue has no public way to wait for data together with
+    other objects, so the private read end of its pipe is used. If it is not
+    available, None is returned and the results collector polls the queue.
+    """
+    if _wait_for_objects is None or not isinstance(queue, mp_queues.Queue):
+        return None
+    return getattr(queue, "_reader", None)
+
 
 def format_result_on_timeout(exc, timeout):
     return {
@@ -43,8 +76,38 @@ def format_result_on_timeout(exc, timeout):
     }
 
 
+# ContextManager of the last used context object, see _get_scenario_context.
+# It is dropped by ScenarioRunner.run() when the scenario run is finished.
+_context_managers = {}
+
+
 def _get_scenario_context(context_obj):
-    return context.ContextManager(context_obj).map_for_scenario()
+    """Map global context to context of a single scenario iteration.
+
+    ContextManager is reused between calls with the same context_obj, so
+    context classes are instantiated only once per scenario run.
+    """
+    manager = _context_managers.get(id(context_obj))
+    if manager is None or manager.context_obj is not context_obj:
+        manager = context.ContextManager(context_obj)
+        _context_managers.clear()
+        _context_managers[id(context_obj)] = manager
+    return manager.map_for_scenario()
+
+
+def _warm_up(cls, context_obj):
+    """Warm up the worker process before the load, see Scenario.warm_up().
+
+    Failures are logged and ignored, iterations report them anyway.
+    """
+    with rutils.Timer() as timer:
+        try:
+            cls.warm_up(context_obj)
+        except Exception as e:
+            LOG.warning("Failed to warm up the worker: %s" % e)
+            if logging.is_debug():
+                LOG.exception(e)
+    LOG.debug("Worker is warmed up in %.3f sec" % timer.duration())
 
 
 def _run_scenario_once(args):
@@ -84,6 +147,26 @@ def _worker_thread(queue, args):
     queue.put(_run_scenario_once(args))
 
 
+def _worker_pool_thread(queue, iterations, on_done):
+    """Run scenario iterations taken from the iterations queue.
+
+    Unlike _worker_thread, this thread is reused for many iterations and
+    exits only when None is taken from the iterations queue.
+
+    :param queue: queue object to append results
+    :param iterations: queue with args of _run_scenario_once
+    :param on_done: callable that is called after each iteration
+    """
+    while True:
+        args = iterations.get()
+        if args is None:
+            break
+        try:
+            queue.put(_run_scenario_once(args))
+        finally:
+            on_done()
+
+
 def _log_worker_info(**info):
     """Log worker parameters for debugging.
 
@@ -110,6 +193,9 @@ class ScenarioRunnerResult(dict):
             "idle_duration": {
                 "type": "number"
             },
+            "start_lag": {
+                "type": "number"
+            },
             "scenario_output": {
                 "type": "object",
                 "properties": {
@@ -146,6 +232,105 @@ class ScenarioRunnerResult(dict):
         jsonschema.validate(result_list, self.RESULT_SCHEMA)
 
 
+class ResultQueue(object):
+    """Bounded FIFO of iteration results between a runner and a consumer.
+
+    Producers (runners) are blocked in append() while the queue holds
+    max_size results, the consumer is woken up as soon as a result is
+    appended. The queue also collects metrics of its depth, the time
+    results spend waiting for the consumer and the time producers were
+    throttled.
+
+    If the consumer fails, it closes the queue with discard=True, so the
+    producers are not blocked forever and their results are dropped.
+    """
+
+    def __init__(self, max_size=0):
+        """Queue constructor.
+
+        :param max_size: high-water mark, 0 means unlimited
+        """
+        self.max_size = max_size
+        self._items = collections.deque()
+        self._closed = False
+        self._discard = False
+        self._cond = threading.Condition()
+        self._max_depth = 0
+        self._latency_avg = streaming.MeanComputation()
+        self._latency_max = streaming.MaxComputation()
+        self._throttled = 0.0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index][0]
+
+    def __iter__(self):
+        with self._cond:
+            return iter([item for item, queued_at in self._items])
+
+    def append(self, item):
+        """Put result to the queue, wait while the queue is full."""
+        with self._cond:
+            if self.max_size and len(self._items) >= self.max_size:
+                started_at = time.time()
+                while (not self._closed and
+                       len(self._items) >= self.max_size):
+                    self._cond.wait()
+                self._throttled += time.time() - started_at
+            if self._discard:
+                return
+            self._items.append((item, time.time()))
+            self._max_depth = max(self._max_depth, len(self._items))
+            self._cond.notify_all()
+
+    def popleft(self, block=True):
+        """Take the oldest result from the queue.
+
+        :param block: wait for a result until the queue is closed
+        :raises IndexError: if the queue is empty (and closed, if block)
+        """
+        with self._cond:
+            while block and not self._items and not self._closed:
+                self._cond.wait()
+            item, queued_at = self._items.popleft()
+            latency = time.time() - queued_at
+            self._latency_avg.add(latency)
+            self._latency_max.add(latency)
+            self._cond.notify_all()
+            return item
+
+    def close(self, discard=False):
+        """Mark that no results are expected anymore and wake everyone.
+
+        :param discard: drop queued and further appended results
+        """
+        with self._cond:
+            self._closed = True
+            if discard:
+                self._discard = True
+                self._items.clear()
+            self._cond.notify_all()
+
+    def stats(self):
+        """Return queue metrics.
+
+        :returns: dict with max_depth, throttled (seconds the producers
+                  were blocked), consume_latency_avg and consume_latency_max
+                  (seconds results waited for the consumer)
+        """
+        with self._cond:
+            consumed = self._latency_avg.count
+            return {
+                "max_depth": self._max_depth,
+                "throttled": self._throttled,
+                "consume_latency_avg": (self._latency_avg.result()
+                                        if consumed else 0.0),
+                "consume_latency_max": (self._latency_max.result()
+                                        if consumed else 0.0)}
+
+
 def configure(name, namespace="default"):
     return plugin.configure(name=name, namespace=namespace)
 
@@ -163,20 +348,31 @@ class ScenarioRunner(plugin.Plugin):
 
     CONFIG_SCHEMA = {}
 
+    # Maximum time (seconds) the results collector blocks on the queue
+    # before checking that worker processes are still alive, and maximum
+    # number of results moved to the consumer in one batch.
+    COLLECTOR_WAIT = 0.1
+    COLLECTOR_BATCH_SIZE = 1000
+
     def __init__(self, task, config):
         """Runner constructor.
 
         It sets task and config to local variables. Also initialize
         result_queue, where results will be put by _send_result method.
+        The size of result_queue is limited by the
+        benchmark.runner_result_queue_size option.
 
         :param task: Instance of objects.Task
         :param config: Dict with runner section from benchmark configuration
         """
         self.task = task
         self.config = config
-        self.result_queue = collections.deque()
+        self.result_queue = ResultQueue(
+            CONF.benchmark.runner_result_queue_size)
         self.aborted = multiprocessing.Event()
         self.run_duration = 0
+        self._collector_lag_avg = streaming.MeanComputation()
+        self._collector_lag_max = streaming.MaxComputation()
 
     @staticmethod
     def validate(config):
@@ -205,8 +401,13 @@ class ScenarioRunner(plugin.Plugin):
         # NOTE(boris-42): processing @types decorators
         args = types.preprocess(name, context, args)
 
-        with rutils.Timer() as timer:
-            self._run_scenario(cls, method_name, context, args)
+        try:
+            with rutils.Timer() as timer:
+                self._run_scenario(cls, method_name, context, args)
+        finally:
+            cls.clear_warm_up()
+            # Don't keep the context of the scenario alive after the run
+            _context_managers.clear()
         self.run_duration = timer.duration()
         return self.run_duration
 
@@ -240,20 +441,91 @@ class ScenarioRunner(plugin.Plugin):
     def _join_processes(self, process_pool, result_queue):
         """Join the processes in the pool and send their results to the queue.
 
+        Results are collected in batches: the collector blocks until at
+        least one result arrives or any of processes exits, then drains
+        everything that is already queued without waiting and joins all the
+        finished processes. Without process sentinels (Python 2) or the
+        reader of the queue (see _get_queue_reader()) the collector blocks
+        on the queue for up to COLLECTOR_WAIT instead.
+
         :param process_pool: pool of processes to join
         :result_queue: multiprocessing.Queue that receives the results
         """
+        reader = _get_queue_reader(result_queue)
         while process_pool:
-            while process_pool and not process_pool[0].is_alive():
-                process_pool.popleft().join()
+            if reader is not None:
+                _wait_for_objects([reader] +
+                                  [p.sentinel for p in process_pool])
+                self._collect_results(result_queue, block=False)
+            else:
+                self._collect_results(result_queue, block=True)
+
+            for process in list(process_pool):
+                if not process.is_alive():
+                    process.join()
+                    process_pool.remove(process)
+
+        # All workers are finished, so their results are already flushed
+        # to the queue.
+        while self._collect_results(result_queue, block=False):
+            pass
+        result_queue.close()
 
-            if result_queue.empty():
-                # sleep a bit to avoid 100% usage of CPU by this method
-                time.sleep(0.001)
+        collector_lag = self.collector_lag()
+        if collector_lag:
+            LOG.info("Task %(task)s | Results collector lag: avg %(avg).4fs, "
+                     "max %(max).4fs (%(count)d results)"
+                     % dict(task=self.task["uuid"], **collector_lag))
 
-            while not result_queue.empty():
-                self._send_result(result_queue.get())
-        result_queue.close()
+    def _collect_results(self, result_queue, block):
+        """Move all available results from result_queue to the consumer.
+
+        :param result_queue: multiprocessing.Queue that receives the results
+        :param block: wait up to COLLECTOR_WAIT for the first result
+        :returns: number of collected results
+        """
+        collected = 0
+        try:
+            result = result_queue.get(block, self.COLLECTOR_WAIT)
+            while True:
+                self._track_collector_lag(result)
+                self._send_result(result)
+                collected += 1
+                if collected >= self.COLLECTOR_BATCH_SIZE:
+                    break
+                result = result_queue.get_nowait()
+        except moves.queue.Empty:
+            pass
+        return collected
+
+    def _track_collector_lag(self, result):
+        """Measure time between the end of the iteration and its collection.
+
+        :param result: raw iteration result taken from the workers queue
+        """
+        if "timestamp" not in result:
+            return
+        finished_at = (result["timestamp"] + result["duration"] +
+                       result["idle_duration"])
+        lag = max(time.time() - finished_at, 0.0)
+        self._collector_lag_avg.add(lag)
+        self._collector_lag_max.add(lag)
+
+    def collector_lag(self):
+        """Return statistics of the results collector lag.
+
+        Collector lag is the time between the moment an iteration finished
+        in a worker process and the moment the runner passed its result
+        to the consumer.
+
+        :returns: dict {"avg": float, "max": float, "count": int} or None if
+                  no results were collected from worker processes
+        """
+        if not self._collector_lag_avg.count:
+            return None
+        return {"avg": self._collector_lag_avg.result(),
+                "max": self._collector_lag_max.result(),
+                "count": self._collector_lag_avg.count}
 
     def _send_result(self, result):
         """Send partial result to consumer.
@@ -14,7 +14,10 @@
 #    under the License.
 
 
+import functools
+import json
 import random
+import threading
 import time
 
 import six
@@ -31,6 +34,61 @@ from rally.task import functional
 LOG = logging.getLogger(__name__)
 
 
+class ValidationCache(object):
+    """Thread safe memo of validators results.
+
+    Result of a validator is memoised by the validator function and its
+    arguments, the scenario config (unless the validator is config
+    invariant) and the tenant of clients (unless the validator is user
+    invariant), see rally.task.validation.invariant().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results = {}
+        self.calls = 0
+        self.hits = 0
+
+    @staticmethod
+    def get_key(validator, clients, config):
+        """Return memo key of validator call or None if it can't be cached."""
+        cache_key = getattr(validator, "cache_key", None)
+        if cache_key is None:
+            return None
+
+        scope = None
+        if not getattr(validator, "user_invariant", False):
+            endpoint = clients.endpoint
+            scope = (endpoint.auth_url, endpoint.tenant_name,
+                     endpoint.region_name, endpoint.permission)
+
+        config_key = None
+        if not getattr(validator, "config_invariant", False):
+            try:
+                config_key = json.dumps(config, sort_keys=True)
+            except (TypeError, ValueError):
+                return None
+
+        return cache_key, scope, config_key
+
+    def get_or_call(self, key, func):
+        """Return memoised result for the key, call func to get it once."""
+        with self._lock:
+            if key not in self._results:
+                self._results[key] = (threading.Lock(), [])
+            key_lock, result = self._results[key]
+
+        with key_lock:
+            if result:
+                with self._lock:
+                    self.hits += 1
+            else:
+                result.append(func())
+                with self._lock:
+                    self.calls += 1
+        return result[0]
+
+
 def configure(name=None, namespace="default", context=None):
     """Make from plain python method task scenario plugin.
 
@@ -109,21 +167,37 @@ class Scenario(plugin.Plugin,
         self._idle_duration = 0
 
     @staticmethod
-    def _validate_helper(validators, clients, config, deployment):
-        for validator in validators:
+    def _validate_helper(validators, clients, config, deployment, cache=None):
+
+        def call(validator):
             try:
                 result = validator(config, clients=clients,
                                    deployment=deployment)
             except Exception as e:
                 LOG.exception(e)
-                raise exceptions.InvalidScenarioArgument(e)
+                return e
+            return result
+
+        for validator in validators:
+            key = cache and ValidationCache.get_key(validator, clients, config)
+            if key is None:
+                result = call(validator)
             else:
-                if not result.is_valid:
-                    raise exceptions.InvalidScenarioArgument(result.msg)
+                result = cache.get_or_call(
+                    key, functools.partial(call, validator))
+
+            if isinstance(result, Exception):
+                raise exceptions.InvalidScenarioArgument(result)
+            if not result.is_valid:
+                raise exceptions.InvalidScenarioArgument(result.msg)
 
     @classmethod
-    def validate(cls, name, config, admin=None, users=None, deployment=None):
-        """Semantic check of benchmark arguments."""
+    def validate(cls, name, config, admin=None, users=None, deployment=None,
+                 cache=None):
+        """Semantic check of benchmark arguments.
+
+        :param cache: ValidationCache, memo of validators results
+        """
         validators = Scenario.get(name)._meta_get("validators", default=[])
 
         if not validators:
@@ -137,10 +211,31 @@ class Scenario(plugin.Plugin,
         # NOTE(boris-42): Potential bug, what if we don't have "admin" client
         #                 and scenario have "admin" validators.
         if admin:
-            cls._validate_helper(admin_validators, admin, config, deployment)
+            cls._validate_helper(admin_validators, admin, config, deployment,
+                                 cache)
         if users:
             for user in users:
-                cls._validate_helper(user_validators, user, config, deployment)
+                cls._validate_helper(user_validators, user, config,
+                                     deployment, cache)
+
+    @classmethod
+    def warm_up(cls, context):
+        """Prepare the current process to run iterations of the scenario.
+
+        Runners call it in every worker process before the load is started
+        if "warm_up" is enabled in the runner config, so the time spent here
+        is not included into durations of iterations.
+
+        :param context: benchmark context
+        """
+
+    @classmethod
+    def clear_warm_up(cls):
+        """Drop the state prepared by warm_up() in the current process.
+
+        Runners call it when the load is finished, so the state is not
+        reused by the next runs.
+        """
 
     def sleep_between(self, min_sleep, max_sleep):
         """Performs a time.sleep() call for a random amount of seconds.
@@ -42,6 +42,23 @@ class ValidationResult(object):
         self.msg = msg
 
 
+def invariant(user=False, config=False):
+    """Declare what result of the validator function doesn't depend on.
+
+    Results of validators are memoised during task validation. By default
+    result depends on the scenario config and on the tenant of user.
+
+    :param user: result is the same for all users, it doesn't use clients
+    :param config: result doesn't depend on the scenario config
+    """
+    def decorator(fn):
+        fn.user_invariant = user
+        fn.config_invariant = config
+        return fn
+
+    return decorator
+
+
 def validator(fn):
     """Decorator that constructs a scenario validator from given function.
 
@@ -68,6 +85,13 @@ def validator(fn):
             # TODO(boris-42): remove this in future.
             wrap_validator.permission = getattr(fn, "permission",
                                                 consts.EndpointPermission.USER)
+            wrap_validator.user_invariant = getattr(fn, "user_invariant",
+                                                    False)
+            wrap_validator.config_invariant = getattr(fn, "config_invariant",
+                                                      False)
+            wrap_validator.cache_key = (
+                "%s.%s" % (fn.__module__, fn.__name__),
+                repr(args), repr(sorted(kwargs.items())))
 
             scenario._meta_setdefault("validators", [])
             scenario._meta_get("validators").append(wrap_validator)
@@ -79,6 +103,7 @@ def validator(fn):
 
 
 @validator
+@invariant(user=True)
 def number(config, clients, deployment, param_name, minval=None, maxval=None,
            nullable=False, integer_only=False):
     """Checks that parameter is number that pass specified condition.
@@ -144,6 +169,7 @@ def _file_access_ok(filename, mode, param_name, required=True):
 
 
 @validator
+@invariant(user=True)
 def file_exists(config, clients, deployment, param_name, mode=os.R_OK,
                 required=True):
     """Validator checks parameter is proper path to file with proper mode.
@@ -199,6 +225,7 @@ def check_command_dict(command):
 
 
 @validator
+@invariant(user=True)
 def valid_command(config, clients, deployment, param_name, required=True):
     """Checks that parameter is a proper command-specifying dictionary.
 
@@ -295,6 +322,7 @@ def _get_validated_flavor(config, clients, param_name):
 
 
 @validator
+@invariant(user=True)
 def validate_share_proto(config, clients, deployment):
     """Validates value of share protocol for creation of Manila share."""
     allowed = ("NFS", "CIFS", "GLUSTERFS", "HDFS", )
@@ -405,6 +433,7 @@ def external_network_exists(config, clients, deployment, network_name):
 
 
 @validator
+@invariant(user=True)
 def tempest_tests_exists(config, clients, deployment):
     """Validator checks that specified test exists."""
     args = config.get("args", {})
@@ -444,6 +473,7 @@ def tempest_tests_exists(config, clients, deployment):
 
 
 @validator
+@invariant(user=True)
 def tempest_set_exists(config, clients, deployment):
     """Validator that check that tempest set_name is valid."""
     set_name = config.get("args", {}).get("set_name")
@@ -458,6 +488,7 @@ def tempest_set_exists(config, clients, deployment):
 
 
 @validator
+@invariant(user=True)
 def required_parameters(config, clients, deployment, *required_params):
     """Validator for checking required parameters are specified.
 
@@ -471,6 +502,7 @@ def required_parameters(config, clients, deployment, *required_params):
 
 
 @validator
+@invariant(config=True)
 def required_services(config, clients, deployment, *required_services):
     """Validator checks if specified OpenStack services are available.
 
@@ -495,6 +527,7 @@ def required_services(config, clients, deployment, *required_services):
 
 
 @validator
+@invariant(config=True)
 def required_neutron_extensions(config, clients, deployment,
                                 *required_extensions):
     """Validator checks if the specified Neutron extension is available
@@ -510,6 +543,7 @@ def required_neutron_extensions(config, clients, deployment,
 
 
 @validator
+@invariant(user=True, config=True)
 def required_cinder_services(config, clients, deployment, service_name):
     """Validator checks that specified Cinder service is available.
 
@@ -532,6 +566,7 @@ def required_cinder_services(config, clients, deployment, service_name):
 
 
 @validator
+@invariant(config=True)
 def required_clients(config, clients, deployment, *components, **kwargs):
     """Validator checks if specified OpenStack clients are available.
 
@@ -554,6 +589,7 @@ def required_clients(config, clients, deployment, *components, **kwargs):
 
 
 @validator
+@invariant(user=True)
 def required_contexts(config, clients, deployment, *context_names):
     """Validator checks if required benchmark contexts are specified.
 
@@ -568,6 +604,7 @@ def required_contexts(config, clients, deployment, *context_names):
 
 
 @validator
+@invariant(user=True)
 def required_openstack(config, clients, deployment, admin=False, users=False):
     """Validator that requires OpenStack admin or (and) users.
 
@@ -615,6 +652,7 @@ def volume_type_exists(config, clients, deployment, param_name):
 
 
 @validator
+@invariant(user=True)
 def restricted_parameters(config, clients, deployment, param_names,
                           subdict=None):
     """Validates that parameters is not set.
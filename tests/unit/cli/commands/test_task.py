@@ -20,6 +20,7 @@ import os.path
 import mock
 
 from rally.cli.commands import task
+from rally.common import aggregates
 from rally import consts
 from rally import exceptions
 from tests.unit import fakes
@@ -259,8 +260,9 @@ class TaskCommandsTestCase(test.TestCase):
         self.assertRaises(exceptions.InvalidArgumentsException,
                           self.task.status, None)
 
+    @mock.patch("rally.cli.commands.task.objects.Task.get_results")
     @mock.patch("rally.cli.commands.task.db")
-    def test_detailed(self, mock_db):
+    def test_detailed(self, mock_db, mock_task_get_results):
         test_uuid = "c0d874d4-7195-4fd5-8688-abe82bfad36f"
         value = {
             "id": "task",
@@ -327,12 +329,96 @@ class TaskCommandsTestCase(test.TestCase):
                 }
             ]
         }
-        mock_db.task_get_detailed = mock.MagicMock(return_value=value)
+        mock_db.task_get = mock.MagicMock(return_value=value)
+        mock_task_get_results.return_value = value["results"]
         self.task.detailed(test_uuid)
-        mock_db.task_get_detailed.assert_called_once_with(test_uuid)
+        mock_db.task_get.assert_called_once_with(test_uuid)
+        mock_task_get_results.assert_called_once_with(lazy=True)
 
         self.task.detailed(test_uuid, iterations_data=True)
 
+    @mock.patch("rally.cli.commands.task.time.sleep")
+    @mock.patch("rally.cli.commands.task.cliutils.print_list")
+    @mock.patch("rally.cli.commands.task.db")
+    def test_watch(self, mock_db, mock_print_list, mock_sleep):
+        mock_db.task_get.side_effect = [
+            {"status": consts.TaskStatus.RUNNING},
+            {"status": consts.TaskStatus.FINISHED}]
+        progress = {"iterations_done": 5, "iterations_total": 10,
+                    "iterations_failed": 1, "queue_depth": 2,
+                    "error_rate": 0.2, "rate": 2.5, "duration_p50": 1.0,
+                    "duration_p95": 1.5, "elapsed": 2.0, "timestamp": 42}
+        mock_db.task_result_get_all_by_uuid.return_value = [
+            {"key": {"name": "Foo.bar", "pos": 0},
+             "data": {"progress": progress}},
+            {"key": {"name": "Foo.baz", "pos": 1},
+             "data": {"summary": {"iterations_count": 7}}},
+            {"key": {"name": "Foo.spam", "pos": 2}, "data": {}}]
+
+        self.task.watch("task_uuid", interval=5)
+
+        self.assertEqual(2, mock_db.task_get.call_count)
+        mock_sleep.assert_called_once_with(5)
+        self.assertEqual(2, mock_print_list.call_count)
+        rows = mock_print_list.call_args[0][0]
+        self.assertEqual(["Foo.bar [0]", "Foo.baz [1]", "Foo.spam [2]"],
+                         [row.scenario for row in rows])
+        self.assertEqual("5/10", rows[0].iterations)
+        self.assertEqual("20.0%", rows[0].errors)
+        self.assertEqual(2, rows[0].queued)
+        self.assertEqual(2.5, rows[0].rate)
+        self.assertEqual("7", rows[1].iterations)
+        self.assertIsNone(rows[2].rate)
+
+    @mock.patch("rally.cli.commands.task.time.sleep")
+    @mock.patch("rally.cli.commands.task.db")
+    def test_watch_finished_task(self, mock_db, mock_sleep):
+        mock_db.task_get.return_value = {"status": consts.TaskStatus.FAILED}
+        mock_db.task_result_get_all_by_uuid.return_value = []
+
+        self.task.watch("task_uuid")
+
+        self.assertFalse(mock_sleep.called)
+
+    @mock.patch("rally.cli.commands.task.cliutils.print_list")
+    @mock.patch("rally.cli.commands.task.objects.Task.get_results")
+    @mock.patch("rally.cli.commands.task.db")
+    def test_detailed_with_summary(self, mock_db, mock_task_get_results,
+                                   mock_print_list):
+        summary = aggregates.IterationsSummary()
+        for i in range(1, 5):
+            summary.add({"duration": i, "timestamp": i, "error": [],
+                         "atomic_actions": {"a": i * 0.5},
+                         "scenario_output": {"data": {"x": i},
+                                             "errors": ""}})
+        summary.add({"duration": 5, "timestamp": 5, "error": ["E"],
+                     "atomic_actions": {"a": 1, "c": 2},
+                     "scenario_output": {"data": {}, "errors": ""}})
+        raw = mock.MagicMock()
+        mock_db.task_get.return_value = {
+            "uuid": "task_uuid", "status": "finished"}
+        mock_task_get_results.return_value = [
+            {"key": {"name": "fake_name", "pos": 0, "kw": {}},
+             "data": {"load_duration": 1.0, "full_duration": 2.0,
+                      "raw": raw, "summary": summary.to_dict()}}]
+
+        self.task.detailed("task_uuid")
+
+        self.assertFalse(raw.__iter__.called)
+        self.assertFalse(raw.__len__.called)
+        rows = mock_print_list.call_args_list[0][0][0]
+        self.assertEqual(["a", "total"], [row.action for row in rows])
+        self.assertEqual([5, 5], [row.count for row in rows])
+        self.assertEqual(["100.0%", "80.0%"],
+                         [row.success for row in rows])
+        self.assertEqual(1, rows[1].min)
+        self.assertEqual(4, rows[1].max)
+        self.assertEqual(2.5, rows[1].avg)
+        self.assertEqual(2.5, rows[1].median)
+        self.assertEqual(3.7, getattr(rows[1], "90%ile"))
+        ssrs = mock_print_list.call_args_list[1][0][0]
+        self.assertEqual(["x"], [row.key for row in ssrs])
+
     @mock.patch("rally.cli.commands.task.db")
     @mock.patch("rally.cli.commands.task.logging")
     def test_detailed_task_failed(self, mock_logging, mock_db):
@@ -343,7 +429,7 @@ class TaskCommandsTestCase(test.TestCase):
             "results": [],
             "verification_log": "['1', '2', '3']"
         }
-        mock_db.task_get_detailed = mock.MagicMock(return_value=value)
+        mock_db.task_get = mock.MagicMock(return_value=value)
 
         mock_logging.is_debug.return_value = False
         self.task.detailed("task_uuid")
@@ -360,9 +446,10 @@ class TaskCommandsTestCase(test.TestCase):
     @mock.patch("rally.cli.commands.task.db")
     def test_detailed_wrong_id(self, mock_db):
         test_uuid = "eb290c30-38d8-4c8f-bbcc-fc8f74b004ae"
-        mock_db.task_get_detailed = mock.MagicMock(return_value=None)
-        self.task.detailed(test_uuid)
-        mock_db.task_get_detailed.assert_called_once_with(test_uuid)
+        mock_db.task_get.side_effect = exceptions.TaskNotFound(
+            uuid=test_uuid)
+        self.assertEqual(1, self.task.detailed(test_uuid))
+        mock_db.task_get.assert_called_once_with(test_uuid)
 
     @mock.patch("json.dumps")
     @mock.patch("rally.cli.commands.task.objects.Task.get")
@@ -18,6 +18,8 @@
 from six import moves
 
 from rally.common import db
+from rally.common.db.sqlalchemy import api as sa_api
+from rally.common.db.sqlalchemy import models as sa_models
 from rally import consts
 from rally import exceptions
 from tests.unit import test
@@ -176,6 +178,61 @@ class TasksTestCase(test.DBTestCase):
             self.assertEqual(res[0]["key"], data)
             self.assertEqual(res[0]["data"], data)
 
+    def test_task_result_update(self):
+        task_id = self._create_task()["uuid"]
+        result = db.task_result_create(task_id, {"name": "a"}, {"raw": []})
+
+        db.task_result_update(result["id"], {"raw": [], "sla": []})
+
+        res = db.task_result_get_all_by_uuid(task_id)
+        self.assertEqual({"raw": [], "sla": []}, res[0]["data"])
+
+    def test_task_result_update_not_found(self):
+        self.assertRaises(exceptions.NotFoundException,
+                          db.task_result_update, 42, {})
+
+    def test_task_result_chunk_get_all(self):
+        task_id = self._create_task()["uuid"]
+        result1 = db.task_result_create(task_id, {"name": "a"}, {})
+        result2 = db.task_result_create(task_id, {"name": "b"}, {})
+        for position in (1, 0, 2):
+            db.task_result_chunk_create(result1["id"], position,
+                                        {"raw": [position]})
+        db.task_result_chunk_create(result2["id"], 0, {"raw": [42]})
+
+        chunks = db.task_result_chunk_get_all(result1["id"])
+
+        self.assertEqual([{"raw": [0]}, {"raw": [1]}, {"raw": [2]}],
+                         [chunk["data"] for chunk in chunks])
+        self.assertEqual(
+            [{"raw": [42]}],
+            [chunk["data"]
+             for chunk in db.task_result_chunk_get_all(result2["id"])])
+
+    def test_task_delete_with_result_chunks(self):
+        task_id = self._create_task()["uuid"]
+        result = db.task_result_create(task_id, {"name": "a"}, {})
+        db.task_result_chunk_create(result["id"], 0, {"raw": [1]})
+
+        db.task_delete(task_id)
+
+        self.assertEqual([],
+                         list(db.task_result_chunk_get_all(result["id"])))
+
+    def test_task_result_chunks_table_created_on_first_use(self):
+        # Databases of previous versions have no table of result chunks
+        sa_models.TaskResultChunk.__table__.drop(bind=sa_api.get_engine())
+        task_id = self._create_task()["uuid"]
+        result = db.task_result_create(task_id, {"name": "a"}, {})
+
+        db.task_delete(task_id)
+
+        db.task_result_chunk_create(result["id"], 0, {"raw": [1]})
+        self.assertEqual(
+            [{"raw": [1]}],
+            [chunk["data"]
+             for chunk in db.task_result_chunk_get_all(result["id"])])
+
     def test_task_get_detailed(self):
         task1 = self._create_task()
         key = {"name": "atata"}
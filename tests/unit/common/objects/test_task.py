@@ -22,6 +22,8 @@ import ddt
 import jsonschema
 import mock
 
+from rally.common import aggregates
+from rally.common import columnar
 from rally.common import objects
 from rally import consts
 from rally import exceptions
@@ -197,21 +199,23 @@ class TaskTestCase(test.TestCase):
              "tstamp_start": 2, "full_duration": 40, "load_duration": 32}}]
 
         # serializable is default
-        results = objects.Task.extend_results(obsolete)
+        results = list(objects.Task.extend_results(obsolete))
         self.assertIsInstance(results[0]["iterations"], type(iter([])))
         self.assertEqual(list(results[0]["iterations"]), iterations)
         results[0]["iterations"] = "foo_iterations"
         self.assertEqual(results, expected)
 
         # serializable is False
-        results = objects.Task.extend_results(obsolete, serializable=False)
+        results = list(
+            objects.Task.extend_results(obsolete, serializable=False))
         self.assertIsInstance(results[0]["iterations"], type(iter([])))
         self.assertEqual(list(results[0]["iterations"]), iterations)
         results[0]["iterations"] = "foo_iterations"
         self.assertEqual(results, expected)
 
         # serializable is True
-        results = objects.Task.extend_results(obsolete, serializable=True)
+        results = list(
+            objects.Task.extend_results(obsolete, serializable=True))
         self.assertEqual(list(results[0]["iterations"]), iterations)
         expected[0]["created_at"] = now.strftime("%Y-%d-%mT%H:%M:%S")
         expected[0]["updated_at"] = None
@@ -220,14 +224,122 @@ class TaskTestCase(test.TestCase):
         results[0]["iterations"] = "foo_iterations"
         self.assertEqual(results, expected)
 
-    @mock.patch("rally.common.objects.task.db.task_result_get_all_by_uuid",
-                return_value="foo_results")
-    def test_get_results(self, mock_task_result_get_all_by_uuid):
+    def test_extend_results_is_lazy(self):
+        iterations = mock.MagicMock()
+        iterations.__iter__.return_value = iter([
+            {"timestamp": 2, "error": [], "duration": 1,
+             "scenario_output": {"errors": "", "data": {}},
+             "idle_duration": 0, "atomic_actions": {}}])
+        results = iter([
+            {"task_uuid": "foo_uuid", "created_at": None, "updated_at": None,
+             "id": 11, "key": {"kw": {}, "name": "Foo.bar", "pos": 0},
+             "data": {"raw": iterations, "sla": [],
+                      "full_duration": 40, "load_duration": 32}},
+            None])
+
+        extended = objects.Task.extend_results(results)
+        result = next(extended)
+
+        self.assertEqual(1, result["info"]["iterations_count"])
+        self.assertFalse(iterations.__len__.called)
+        # the next result is not touched until it is requested
+        self.assertRaises(TypeError, next, extended)
+
+    def test_extend_results_with_summary(self):
+        summary = aggregates.IterationsSummary()
+        for i in range(10):
+            summary.add({"timestamp": i + 2, "duration": i + 5,
+                         "error": ["Error"] if i == 9 else [],
+                         "scenario_output": {"errors": "",
+                                             "data": {"foo": i}},
+                         "atomic_actions": {"a": i + 10, "b": None}})
+        iterations = mock.Mock(side_effect=AssertionError)
+        results = [
+            {"task_uuid": "foo_uuid", "created_at": None, "updated_at": None,
+             "id": 11, "key": {"kw": {}, "name": "Foo.bar", "pos": 0},
+             "data": {"raw": (iterations() for i in range(1)), "sla": [],
+                      "summary": json.loads(json.dumps(summary.to_dict())),
+                      "full_duration": 40, "load_duration": 32}}]
+
+        result = list(objects.Task.extend_results(results))[0]
+
+        self.assertFalse(iterations.called)
+        self.assertEqual(
+            {"atomic": {"a": {"min_duration": 10, "max_duration": 19},
+                        "b": {"min_duration": 0, "max_duration": 0}},
+             "output_names": ["foo"],
+             "iterations_count": 10, "iterations_failed": 1,
+             "min_duration": 5, "max_duration": 13,
+             "tstamp_start": 2, "full_duration": 40, "load_duration": 32},
+            result["info"])
+
+    @mock.patch("rally.common.objects.task.db.task_result_chunk_get_all")
+    def test_chunked_iterations(self, mock_task_result_chunk_get_all):
+        chunk1 = columnar.IterationResults()
+        for timestamp in (5, 1, 3):
+            chunk1.append({"timestamp": timestamp})
+        chunk2 = columnar.IterationResults()
+        for timestamp in (2, 6):
+            chunk2.append({"timestamp": timestamp})
+        mock_task_result_chunk_get_all.return_value = [
+            {"data": {"columnar": chunk1.to_dict()}},
+            {"data": {"raw": [{"timestamp": 4}, {"timestamp": 0}]}},
+            {"data": {"columnar": chunk2.to_dict()}}]
+
+        iterations = objects.task.ChunkedIterations(42)
+
+        expected = [{"timestamp": t} for t in range(7)]
+        self.assertEqual(expected, list(iterations))
+        self.assertEqual(expected, list(iterations))
+        self.assertEqual(7, len(iterations))
+        mock_task_result_chunk_get_all.assert_called_once_with(42)
+
+    @mock.patch("rally.common.objects.task.ChunkedIterations")
+    @mock.patch("rally.common.objects.task.db.task_result_get_all_by_uuid")
+    def test_get_results_lazy(self, mock_task_result_get_all_by_uuid,
+                              mock_chunked_iterations):
+        mock_task_result_get_all_by_uuid.return_value = [
+            {"id": 1, "key": "foo_key", "data": {"raw": ["foo_raw"]}},
+            {"id": 2, "key": "bar_key",
+             "data": {"raw": [], "sla": [], "chunked": True}}]
+        task = objects.Task(task=self.task)
+
+        results = list(task.get_results(lazy=True))
+
+        self.assertEqual(["foo_raw"], results[0]["data"]["raw"])
+        self.assertEqual(mock_chunked_iterations.return_value,
+                         results[1]["data"]["raw"])
+        mock_chunked_iterations.assert_called_once_with(2)
+
+    @mock.patch("rally.common.objects.task.db.task_result_chunk_get_all")
+    @mock.patch("rally.common.objects.task.db.task_result_get_all_by_uuid")
+    def test_get_results(self, mock_task_result_get_all_by_uuid,
+                         mock_task_result_chunk_get_all):
+        mock_task_result_get_all_by_uuid.return_value = [
+            {"id": 1, "key": "foo_key", "data": {"raw": ["foo_raw"]}},
+            {"id": 2, "key": "bar_key",
+             "data": {"raw": [], "sla": [], "chunked": True}}]
+        iterations = columnar.IterationResults()
+        iterations.append({"timestamp": 3})
+        iterations.append({"timestamp": 2})
+        mock_task_result_chunk_get_all.return_value = [
+            {"data": {"columnar": iterations.to_dict()}},
+            {"data": {"raw": [{"timestamp": 1}]}}]
         task = objects.Task(task=self.task)
+
         results = task.get_results()
+
+        self.assertFalse(mock_task_result_get_all_by_uuid.called)
+        self.assertEqual(
+            [{"id": 1, "key": "foo_key", "data": {"raw": ["foo_raw"]}},
+             {"id": 2, "key": "bar_key",
+              "data": {"raw": [{"timestamp": 1}, {"timestamp": 2},
+                               {"timestamp": 3}],
+                       "sla": [], "chunked": True}}],
+            list(results))
         mock_task_result_get_all_by_uuid.assert_called_once_with(
             self.task["uuid"])
-        self.assertEqual(results, "foo_results")
+        mock_task_result_chunk_get_all.assert_called_once_with(2)
 
     @mock.patch("rally.common.objects.task.db.task_result_create")
     def test_append_results(self, mock_task_result_create):
@@ -236,6 +348,41 @@ class TaskTestCase(test.TestCase):
         mock_task_result_create.assert_called_once_with(
             self.task["uuid"], "opt", "val")
 
+    @mock.patch("rally.common.objects.task.db.task_result_create")
+    def test_create_results(self, mock_task_result_create):
+        mock_task_result_create.return_value = {"id": 42}
+        task = objects.Task(task=self.task)
+
+        self.assertEqual(42, task.create_results("foo_key"))
+        mock_task_result_create.assert_called_once_with(
+            self.task["uuid"], "foo_key",
+            {"raw": [], "load_duration": 0, "full_duration": 0, "sla": [],
+             "chunked": True})
+
+    @mock.patch("rally.common.objects.task.db.task_result_chunk_create")
+    def test_append_results_chunk(self, mock_task_result_chunk_create):
+        task = objects.Task(task=self.task)
+        iterations = mock.MagicMock()
+        task.append_results_chunk(42, 1, iterations)
+        mock_task_result_chunk_create.assert_called_once_with(
+            42, 1, {"columnar": iterations.to_dict.return_value})
+
+    @mock.patch("rally.common.objects.task.db.task_result_update")
+    def test_update_results(self, mock_task_result_update):
+        task = objects.Task(task=self.task)
+        task.update_results(42, {"sla": []})
+        mock_task_result_update.assert_called_once_with(
+            42, {"raw": [], "sla": [], "chunked": True})
+
+    @mock.patch("rally.common.objects.task.db.task_result_update")
+    def test_update_progress(self, mock_task_result_update):
+        task = objects.Task(task=self.task)
+        task.update_progress(42, {"iterations_done": 3})
+        mock_task_result_update.assert_called_once_with(
+            42, {"raw": [], "load_duration": 0, "full_duration": 0,
+                 "sla": [], "chunked": True,
+                 "progress": {"iterations_done": 3}})
+
     @mock.patch("rally.common.objects.task.db.task_update")
     def test_set_failed(self, mock_task_update):
         mock_task_update.return_value = self.task
@@ -13,6 +13,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import threading
+
+import mock
+
 from rally.common.plugin import plugin
 from rally import exceptions
 from tests.unit import test
@@ -146,6 +150,153 @@ class PluginTestCase(test.TestCase):
         self.assertRaises(exceptions.PluginWithSuchNameExists,
                           plugin.configure("test_2_plugins_with_same_name"), B)
 
+    def test_get_by_namespace(self):
+
+        @plugin.configure("test_get_by_namespace", namespace="foo")
+        class Foo(BasePlugin):
+            pass
+
+        @plugin.configure("test_get_by_namespace", namespace="bar")
+        class Bar(BasePlugin):
+            pass
+
+        self.assertEqual(Foo, BasePlugin.get("test_get_by_namespace",
+                                             namespace="foo"))
+        self.assertEqual(Bar, BasePlugin.get("test_get_by_namespace",
+                                             namespace="bar"))
+        self.assertIn(BasePlugin.get("test_get_by_namespace"), (Foo, Bar))
+        self.assertRaises(exceptions.PluginNotFound, BasePlugin.get,
+                          "test_get_by_namespace", namespace="baz")
+
+    def test_get_only_subclasses(self):
+
+        @plugin.configure("test_get_only_subclasses")
+        class OtherPlugin(plugin.Plugin):
+            pass
+
+        self.assertEqual(OtherPlugin,
+                         plugin.Plugin.get("test_get_only_subclasses"))
+        self.assertRaises(exceptions.PluginNotFound, BasePlugin.get,
+                          "test_get_only_subclasses")
+        self.assertRaises(exceptions.PluginNotFound, OtherPlugin.get,
+                          "test_get_only_subclasses")
+
+    def test_get_func_plugin(self):
+
+        @plugin.configure(name="test_get_func_plugin")
+        @plugin.from_func(BasePlugin)
+        def func():
+            return 42
+
+        self.assertEqual(func, BasePlugin.get("test_get_func_plugin"))
+
+    @mock.patch("rally.common.plugin.plugin.importutils.import_module")
+    def test_get_lazy_plugin(self, mock_import_module):
+        loaded = []
+
+        def import_module(name):
+            @plugin.configure(name="test_get_lazy_plugin")
+            class LazyPlugin(BasePlugin):
+                pass
+
+            self.addCleanup(LazyPlugin.unregister)
+            loaded.append(LazyPlugin)
+
+        mock_import_module.side_effect = import_module
+        self.addCleanup(plugin.set_lazy_plugins, [])
+        plugin.set_lazy_plugins([
+            {"name": "test_get_lazy_plugin", "module": "fake_module",
+             "bases": [plugin.get_plugin_path(BasePlugin)]},
+            {"name": "other", "module": "other_module",
+             "bases": [plugin.get_plugin_path(BasePlugin)]}])
+
+        lazy_plugin = BasePlugin.get("test_get_lazy_plugin")
+
+        self.assertEqual([lazy_plugin], loaded)
+        self.assertEqual(loaded[0], BasePlugin.get("test_get_lazy_plugin"))
+        mock_import_module.assert_called_once_with("fake_module")
+
+    @mock.patch("rally.common.plugin.plugin.importutils.import_module")
+    def test_get_lazy_plugin_imported_by_other_thread(self,
+                                                      mock_import_module):
+        importing = threading.Event()
+        imported = threading.Event()
+
+        def import_module(name):
+            importing.set()
+            imported.wait()
+
+            @plugin.configure(name="test_get_lazy_plugin_thread")
+            class LazyPlugin(BasePlugin):
+                pass
+
+            self.addCleanup(LazyPlugin.unregister)
+
+        mock_import_module.side_effect = import_module
+        self.addCleanup(plugin.set_lazy_plugins, [])
+        plugin.set_lazy_plugins([
+            {"name": "test_get_lazy_plugin_thread", "module": "fake_module",
+             "bases": [plugin.get_plugin_path(BasePlugin)]}])
+        thread = threading.Thread(
+            target=BasePlugin.get, args=("test_get_lazy_plugin_thread",))
+        thread.start()
+        self.addCleanup(thread.join)
+        importing.wait()
+        # The module is imported by the thread while this get() waits
+        threading.Timer(0.1, imported.set).start()
+
+        lazy_plugin = BasePlugin.get("test_get_lazy_plugin_thread")
+
+        self.assertEqual("test_get_lazy_plugin_thread",
+                         lazy_plugin.get_name())
+        mock_import_module.assert_called_once_with("fake_module")
+
+    def test_configure_name_of_lazy_plugin(self):
+        self.addCleanup(plugin.set_lazy_plugins, [])
+        plugin.set_lazy_plugins([
+            {"name": "test_lazy_name", "namespace": "default",
+             "module": "other_module",
+             "bases": [plugin.get_plugin_path(BasePlugin)]},
+            {"name": "test_lazy_name_same_module", "namespace": "default",
+             "module": __name__,
+             "bases": [plugin.get_plugin_path(BasePlugin)]}])
+
+        class DuplicatePlugin(BasePlugin):
+            pass
+
+        self.addCleanup(DuplicatePlugin.unregister)
+        self.assertRaises(exceptions.PluginWithSuchNameExists,
+                          plugin.configure(name="test_lazy_name"),
+                          DuplicatePlugin)
+
+        @plugin.configure(name="test_lazy_name", namespace="other")
+        class OtherNamespacePlugin(BasePlugin):
+            pass
+
+        self.addCleanup(OtherNamespacePlugin.unregister)
+
+        @plugin.configure(name="test_lazy_name_same_module")
+        class SameModulePlugin(BasePlugin):
+            pass
+
+        self.addCleanup(SameModulePlugin.unregister)
+
+    @mock.patch("rally.common.plugin.plugin.importutils.import_module")
+    def test_get_all_imports_lazy_plugins(self, mock_import_module):
+        self.addCleanup(plugin.set_lazy_plugins, [])
+        plugin.set_lazy_plugins([
+            {"name": "a", "module": "module_a",
+             "bases": [plugin.get_plugin_path(BasePlugin)]},
+            {"name": "b", "module": "module_b",
+             "bases": [plugin.get_plugin_path(plugin.Plugin)]}])
+
+        BasePlugin.get_all()
+        mock_import_module.assert_called_once_with("module_a")
+
+        mock_import_module.reset_mock()
+        self.assertRaises(exceptions.PluginNotFound, BasePlugin.get, "a")
+        self.assertFalse(mock_import_module.called)
+
     def test_get_name(self):
         self.assertEqual("test_some_plugin", SomePlugin.get_name())
 
@@ -0,0 +1,183 @@
+# Copyright 2015: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+
+import ddt
+import mock
+
+from rally.common import aggregates
+from rally.common import costilius
+from rally.task.processing import utils
+from tests.unit import test
+
+PERCENTILE_COMPUTATION = (
+    "rally.common.streaming_algorithms.PercentileComputation")
+
+
+def _iteration(i, error=False):
+    return {"duration": i + 1.0, "timestamp": 100 + i, "idle_duration": 0,
+            "error": ["Error", "msg", "trace"] if error else [],
+            "atomic_actions": costilius.OrderedDict(
+                [("foo", i * 0.5), ("bar", None if i % 3 else i)]),
+            "scenario_output": {"errors": "err" if i == 7 else "",
+                                "data": {"x": i, "y": "n/a"}}}
+
+
+ITERATIONS = [_iteration(i, error=(i % 4 == 0)) for i in range(1, 101)]
+
+
+class ValuesSummaryTestCase(test.TestCase):
+
+    def test_empty(self):
+        summary = aggregates.ValuesSummary()
+        self.assertEqual(0, summary.count)
+        self.assertIsNone(summary.min)
+        self.assertIsNone(summary.max)
+        self.assertIsNone(summary.mean())
+        self.assertIsNone(summary.percentile(0.5))
+
+    def test_add(self):
+        values = [float(i) for i in range(1, 1001)]
+        summary = aggregates.ValuesSummary()
+        for value in values:
+            summary.add(value)
+
+        self.assertEqual(1000, summary.count)
+        self.assertEqual(1.0, summary.min)
+        self.assertEqual(1000.0, summary.max)
+        self.assertEqual(utils.mean(values), summary.mean())
+        for percent in (0.5, 0.9, 0.95):
+            self.assertEqual(utils.percentile(values, percent),
+                             summary.percentile(percent))
+
+    def test_add_estimated(self):
+        values = [float(i) for i in range(1, 1001)]
+        summary = aggregates.ValuesSummary()
+        with mock.patch(PERCENTILE_COMPUTATION + ".EXACT_LIMIT", 100):
+            for value in values:
+                summary.add(value)
+
+        self.assertIsNone(summary.values)
+        self.assertEqual(1000, summary.count)
+        for percent in (0.5, 0.9, 0.95):
+            expected = utils.percentile(values, percent)
+            self.assertAlmostEqual(expected, summary.percentile(percent),
+                                   delta=expected * 0.01)
+
+    def test_merge_and_to_dict(self):
+        first = aggregates.ValuesSummary()
+        second = aggregates.ValuesSummary()
+        for i in range(10):
+            first.add(i)
+            second.add(i + 10)
+
+        first.merge(aggregates.ValuesSummary.from_dict(
+            json.loads(json.dumps(second.to_dict()))))
+
+        self.assertEqual(20, first.count)
+        self.assertEqual(0, first.min)
+        self.assertEqual(19, first.max)
+        self.assertEqual(9.5, first.mean())
+        self.assertEqual(9.5, first.percentile(0.5))
+        self.assertEqual(list(range(10, 20)), second.values)
+
+    def test_merge_estimated(self):
+        first = aggregates.ValuesSummary()
+        second = aggregates.ValuesSummary()
+        for i in range(10):
+            first.add(i)
+            second.add(i + 10)
+
+        with mock.patch(PERCENTILE_COMPUTATION + ".EXACT_LIMIT", 15):
+            first.merge(second)
+
+        self.assertIsNone(first.values)
+        self.assertEqual(20, first.count)
+        self.assertEqual(first.sketch.quantile(0.5), first.percentile(0.5))
+
+
+@ddt.ddt
+class IterationsSummaryTestCase(test.TestCase):
+
+    def _summary(self, iterations):
+        summary = aggregates.IterationsSummary()
+        for iteration in iterations:
+            summary.add(iteration)
+        return summary
+
+    def test_get_info_empty(self):
+        self.assertEqual(
+            {"atomic": {}, "output_names": [], "iterations_count": 0,
+             "iterations_failed": 0, "min_duration": 0, "max_duration": 0,
+             "tstamp_start": 0},
+            aggregates.IterationsSummary().get_info())
+
+    def test_add(self):
+        summary = self._summary(ITERATIONS)
+
+        self.assertEqual(
+            {"atomic": {"foo": {"min_duration": 0.5, "max_duration": 50.0},
+                        "bar": {"min_duration": 0, "max_duration": 99}},
+             "output_names": ["x", "y"],
+             "iterations_count": 100,
+             "iterations_failed": 25,
+             "min_duration": 2.0,
+             "max_duration": 100.0,
+             "tstamp_start": 101},
+            summary.get_info())
+        self.assertEqual(["foo", "bar"], list(summary.get_info()["atomic"]))
+        self.assertEqual(75, summary.duration.count)
+        self.assertEqual(67, summary.atomic_missed["bar"])
+        self.assertEqual(set(["foo", "bar"]), summary.atomic_passed)
+        self.assertEqual(100, summary.output["x"].count)
+        self.assertEqual(0, summary.output["y"].count)
+        self.assertEqual(1, summary.output_errors)
+
+    def test_add_failed_atomic_actions(self):
+        summary = self._summary([_iteration(1, error=True)])
+
+        self.assertEqual(["foo", "bar"], list(summary.atomic))
+        self.assertEqual(set(), summary.atomic_passed)
+
+    def test_add_incomplete_iteration(self):
+        summary = self._summary([{"duration": None}])
+
+        self.assertEqual(1, summary.iterations_count)
+        self.assertEqual(0, summary.duration.min)
+
+    @ddt.data(0, 1, 37, 99, 100)
+    def test_merge(self, split):
+        expected = self._summary(ITERATIONS)
+
+        summary = self._summary(ITERATIONS[:split])
+        summary.merge(self._summary(ITERATIONS[split:]))
+
+        self.assertEqual(expected.get_info(), summary.get_info())
+        self.assertEqual(expected.duration.mean(), summary.duration.mean())
+        self.assertEqual(expected.atomic_missed, summary.atomic_missed)
+        self.assertEqual(expected.atomic_passed, summary.atomic_passed)
+        self.assertEqual(expected.output_errors, summary.output_errors)
+
+    def test_to_dict_from_dict(self):
+        summary = self._summary(ITERATIONS)
+
+        loaded = aggregates.IterationsSummary.from_dict(
+            json.loads(json.dumps(summary.to_dict())))
+
+        self.assertEqual(summary.get_info(), loaded.get_info())
+        self.assertEqual(summary.to_dict(), loaded.to_dict())
+        self.assertEqual(summary.duration.percentile(0.9),
+                         loaded.duration.percentile(0.9))
@@ -13,7 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import collections
+import os
+import threading
 
 import mock
 
@@ -21,21 +22,89 @@ from rally.common import broker
 from tests.unit import test
 
 
+class JobQueueTestCase(test.TestCase):
+
+    def test_append_and_popleft(self):
+        queue = broker.JobQueue()
+        queue.append(1)
+        queue.extend([2, 3])
+
+        self.assertEqual(3, len(queue))
+        self.assertEqual([1, 2, 3], list(queue))
+        self.assertEqual(1, queue.popleft())
+        queue.close()
+        self.assertEqual(2, queue.popleft())
+        self.assertEqual(3, queue.popleft())
+        self.assertRaises(IndexError, queue.popleft)
+
+    def test_popleft_waits_for_jobs(self):
+        queue = broker.JobQueue()
+        consumed = []
+
+        def consume():
+            while True:
+                try:
+                    consumed.append(queue.popleft())
+                except IndexError:
+                    break
+
+        consumer = threading.Thread(target=consume)
+        consumer.start()
+        queue.append(1)
+        queue.append(2)
+        queue.close()
+        consumer.join(5)
+
+        self.assertFalse(consumer.is_alive())
+        self.assertEqual([1, 2], consumed)
+
+    def test_append_waits_while_queue_is_full(self):
+        queue = broker.JobQueue(max_size=2)
+        max_depth = []
+
+        def publish():
+            for i in range(10):
+                queue.append(i)
+                max_depth.append(len(queue))
+            queue.close()
+
+        publisher = threading.Thread(target=publish)
+        publisher.start()
+        consumed = []
+        while True:
+            try:
+                consumed.append(queue.popleft())
+            except IndexError:
+                break
+        publisher.join(5)
+
+        self.assertEqual(list(range(10)), consumed)
+        self.assertLessEqual(max(max_depth), 2)
+
+
 class BrokerTestCase(test.TestCase):
 
+    def _make_queue(self, items):
+        queue = broker.JobQueue()
+        queue.extend(items)
+        queue.close()
+        return queue
+
     def test__publisher(self):
         mock_publish = mock.MagicMock()
-        queue = collections.deque()
+        queue = mock.Mock()
         broker._publisher(mock_publish, queue)
         mock_publish.assert_called_once_with(queue)
+        queue.close.assert_called_once_with()
 
     def test__publisher_fails(self):
         mock_publish = mock.MagicMock(side_effect=Exception())
-        queue = collections.deque()
+        queue = mock.Mock()
         broker._publisher(mock_publish, queue)
+        queue.close.assert_called_once_with()
 
     def test__consumer(self):
-        queue = collections.deque([1, 2, 3])
+        queue = self._make_queue([1, 2, 3])
         mock_consume = mock.MagicMock()
         broker._consumer(mock_consume, queue)
         self.assertEqual(3, mock_consume.call_count)
@@ -48,21 +117,50 @@ class BrokerTestCase(test.TestCase):
             cache[item] = True
             cache_keys_history.append(list(cache))
 
-        queue = collections.deque([1, 2, 3])
+        queue = self._make_queue([1, 2, 3])
         broker._consumer(consume, queue)
         self.assertEqual([[1], [1, 2], [1, 2, 3]], cache_keys_history)
 
     def test__consumer_fails(self):
-        queue = collections.deque([1, 2, 3])
+        queue = self._make_queue([1, 2, 3])
         mock_consume = mock.MagicMock(side_effect=Exception())
-        broker._consumer(mock_consume, queue)
+        stats = broker._JobStats()
+        broker._consumer(mock_consume, queue, stats=stats)
         self.assertEqual(0, len(queue))
+        self.assertEqual(3, stats.count)
+        self.assertEqual(3, stats.failed)
+        self.assertEqual(0, stats.retried)
+
+    @mock.patch("rally.common.broker.time.sleep")
+    def test__consumer_retries(self, mock_sleep):
+        queue = self._make_queue([1, 2])
+        mock_consume = mock.MagicMock(
+            side_effect=[Exception(), Exception(), "r1",
+                         Exception(), Exception(), Exception()])
+        results = []
+        stats = broker._JobStats()
+        broker._consumer(mock_consume, queue, results, stats, retries=2,
+                         retry_interval=0.5)
+        self.assertEqual(["r1"], results)
+        self.assertEqual(6, mock_consume.call_count)
+        self.assertEqual([mock.call(0.5), mock.call(1.0)] * 2,
+                         mock_sleep.mock_calls)
+        self.assertEqual(1, stats.failed)
+        self.assertEqual(4, stats.retried)
+        self.assertEqual(2, stats.count)
+
+    def test__consumer_results(self):
+        queue = self._make_queue([1, 2, 3])
+        results = []
+        broker._consumer(lambda cache, item: item * 2 if item != 2 else None,
+                         queue, results)
+        self.assertEqual([2, 6], results)
 
     @mock.patch("rally.common.broker.LOG")
     def test__consumer_indexerror(self, mock_log):
         consume = mock.Mock()
         consume.side_effect = IndexError()
-        queue = collections.deque([1, 2, 3])
+        queue = self._make_queue([1, 2, 3])
         broker._consumer(consume, queue)
         self.assertTrue(mock_log.warning.called)
         self.assertFalse(queue)
@@ -84,3 +182,100 @@ class BrokerTestCase(test.TestCase):
         consumer_count = 2
         broker.run(publish, consume, consumer_count)
         self.assertEqual(set([1, 2, 3]), consumed)
+
+    def test_run_returns_results(self):
+
+        def publish(queue):
+            queue.extend(range(10))
+
+        def consume(cache, item):
+            if item % 3:
+                return item * 10
+
+        results = broker.run(publish, consume, 3)
+        self.assertEqual([10, 20, 40, 50, 70, 80], sorted(results))
+
+    def test_run_with_processes(self):
+
+        def publish(queue):
+            queue.extend(range(100))
+
+        def consume(cache, item):
+            # every consumer thread has its own cache
+            cache.setdefault("pid", os.getpid())
+            if item == 42:
+                raise Exception("Failed to consume")
+            return item, cache["pid"]
+
+        results = broker.run(publish, consume, 4, processes_count=3,
+                             batch_size=7)
+
+        self.assertEqual(sorted(set(range(100)) - set([42])),
+                         sorted(item for item, pid in results))
+        pids = set(pid for item, pid in results)
+        self.assertEqual(3, len(pids))
+        self.assertNotIn(os.getpid(), pids)
+
+    def test_run_with_processes_and_few_items(self):
+        self.assertEqual([], broker.run(lambda queue: None,
+                                        lambda cache, item: item, 2, 4))
+        self.assertEqual([1], broker.run(lambda queue: queue.append(1),
+                                         lambda cache, item: item, 2, 4))
+
+    @mock.patch("rally.common.broker.multiprocessing.Process")
+    @mock.patch("rally.common.broker.multiprocessing.Queue")
+    def test_run_with_processes_died(self, mock_queue, mock_process):
+        mock_queue.return_value.get.side_effect = [
+            [1, 2], broker.Queue.Empty, broker.Queue.Empty]
+        mock_process.return_value.is_alive.side_effect = [True, False]
+
+        results = broker.run(lambda queue: queue.extend([1, 2]),
+                             mock.Mock(), 2, 1)
+
+        self.assertEqual([1, 2], results)
+        mock_process.assert_called_once_with(
+            target=broker._process_consumer,
+            args=(mock.ANY, [1, 2], 2, mock_queue.return_value, 100, 0, 1.0))
+        mock_process.return_value.join.assert_called_once_with()
+
+    def test_run_publishes_and_consumes_at_once(self):
+        published = threading.Event()
+
+        def publish(queue):
+            queue.append(1)
+            # the first job is consumed while publish() is still running
+            self.assertTrue(consumed.wait(5))
+            queue.append(2)
+            published.set()
+
+        consumed = threading.Event()
+
+        def consume(cache, item):
+            consumed.set()
+            return item
+
+        self.assertEqual([1, 2], broker.run(publish, consume, 1))
+        self.assertTrue(published.is_set())
+
+    def test_run_bounded_queue(self):
+        depth = []
+
+        def publish(queue):
+            for i in range(50):
+                queue.append(i)
+                depth.append(len(queue))
+
+        results = broker.run(publish, lambda cache, item: item, 2,
+                             queue_size=3)
+
+        self.assertEqual(list(range(50)), sorted(results))
+        self.assertLessEqual(max(depth), 3)
+
+    @mock.patch("rally.common.broker.LOG")
+    def test_run_logs_stats(self, mock_log):
+        broker.run(lambda queue: queue.extend([1, 2, 3]),
+                   lambda cache, item: 1 / (item - 2), 2)
+
+        msg = mock_log.debug.call_args[0][0]
+        self.assertIn("consumed 3 jobs", msg)
+        self.assertIn("1 failed, 0 retries", msg)
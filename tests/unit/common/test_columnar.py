@@ -0,0 +1,100 @@
+# Copyright 2015: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+
+import ddt
+
+from rally.common import columnar
+from tests.unit import test
+
+
+ITERATIONS = [
+    {"duration": 1.5, "timestamp": 10.0, "idle_duration": 0.0,
+     "scenario_output": {"errors": "", "data": {}},
+     "atomic_actions": {"a": 0.5, "b": 1.0}, "error": []},
+    {"duration": 2, "timestamp": 11, "idle_duration": 0.5,
+     "scenario_output": {"errors": "", "data": {"foo": 42}},
+     "atomic_actions": {"a": 0.7, "b": None},
+     "error": ["KeyError", "message", "traceback"]},
+    {"duration": 3.0, "timestamp": 12.0, "idle_duration": 0,
+     "scenario_output": {"errors": "", "data": {}},
+     "atomic_actions": {"c": 0.2}, "error": ["KeyError"]},
+    {"duration": 10.0, "idle_duration": 0, "start_lag": 0.1,
+     "scenario_output": {"errors": "error", "data": {}},
+     "atomic_actions": {}, "timestamp": 13.0,
+     "error": ["TimeoutException", "message", "traceback"]},
+    {"duration": None, "foo": "bar"}
+]
+
+
+@ddt.ddt
+class IterationResultsTestCase(test.TestCase):
+
+    def _make_results(self, iterations):
+        results = columnar.IterationResults()
+        for iteration in iterations:
+            results.append(iteration)
+        return results
+
+    def test_empty(self):
+        results = columnar.IterationResults()
+        self.assertEqual(0, len(results))
+        self.assertEqual([], list(results))
+        self.assertRaises(IndexError, results.__getitem__, 0)
+
+    @ddt.data(ITERATIONS, ITERATIONS[::-1], ITERATIONS[2:4], ITERATIONS[4:])
+    def test_append(self, iterations):
+        results = self._make_results(iterations)
+
+        self.assertEqual(len(iterations), len(results))
+        self.assertEqual(iterations, list(results))
+        self.assertEqual(iterations[-1], results[-1])
+        self.assertEqual(iterations[0], results[0])
+
+    def test_getitem_out_of_range(self):
+        results = self._make_results(ITERATIONS)
+
+        self.assertRaises(IndexError, results.__getitem__, len(ITERATIONS))
+        self.assertRaises(IndexError, results.__getitem__,
+                          -len(ITERATIONS) - 1)
+
+    @ddt.data(ITERATIONS, ITERATIONS[::-1], [])
+    def test_to_dict_from_dict(self, iterations):
+        results = self._make_results(iterations)
+
+        data = json.loads(json.dumps(results.to_dict()))
+        loaded = columnar.IterationResults.from_dict(data)
+
+        self.assertEqual(iterations, list(loaded))
+        loaded.append(ITERATIONS[1])
+        self.assertEqual(iterations + [ITERATIONS[1]], list(loaded))
+
+    def test_to_dict_stores_names_once(self):
+        results = self._make_results(ITERATIONS[:2] * 10)
+
+        data = results.to_dict()
+
+        self.assertEqual(["a", "b"], data["atomic_names"])
+        self.assertEqual([[0, 1]], data["atomic_layouts"])
+        self.assertEqual(["KeyError"], data["error_types"])
+        self.assertEqual(20, len(data["numeric"]["duration"]))
+
+    def test_iter_sorted(self):
+        results = self._make_results(ITERATIONS[::-1] + [{"duration": 1}])
+
+        self.assertEqual(ITERATIONS[:4] + [ITERATIONS[4], {"duration": 1}],
+                         list(results.iter_sorted("timestamp")))
+        self.assertEqual(list(results), list(results.iter_sorted("foo")))
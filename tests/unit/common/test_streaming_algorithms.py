@@ -13,12 +13,16 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import ddt
-
+import json
 import math
 
+import ddt
+import mock
+import testtools
+
 from rally.common import streaming_algorithms as algo
 from rally import exceptions
+from rally.task.processing import utils
 from tests.unit import test
 
 
@@ -121,7 +125,7 @@ class PercentileComputationTestCase(test.TestCase):
                26.27, 97.3, 56.6, 19.75, 69, 25.03, 10.76, 17.71, 29.4, 15.75,
                19.88, 90.16, 82.0, 63.4, 14.84, 49.07, 72.06, 41, 1.48, 82.19,
                48.45, 53, 88.33, 52.31, 62, 15.96, 21.17, 25.33, 53.27]
-    mixed5000 = mixed50 * 1000
+    mixed50000 = mixed50 * 1000
     range5000 = range(5000)
 
     @ddt.data(
@@ -138,11 +142,6 @@ class PercentileComputationTestCase(test.TestCase):
         {"stream": "mixed50", "percent": 0.50, "expected": 51.89},
         {"stream": "mixed50", "percent": 0.90, "expected":
             82.81300000000002},
-        {"stream": "mixed5000", "percent": 0.25, "expected":
-            35.54600000000001},
-        {"stream": "mixed5000", "percent": 0.50, "expected": 48.351},
-        {"stream": "mixed5000", "percent": 0.90, "expected":
-            66.05880000000437},
         {"stream": "range5000", "percent": 0.25, "expected": 1249.75},
         {"stream": "range5000", "percent": 0.50, "expected": 2499.5},
         {"stream": "range5000", "percent": 0.90, "expected": 4499.1})
@@ -153,6 +152,17 @@ class PercentileComputationTestCase(test.TestCase):
         [comp.add(i) for i in getattr(self, stream)]
         self.assertEqual(expected, comp.result())
 
+    @ddt.data(
+        {"percent": 0.25, "expected": 25.03},
+        {"percent": 0.50, "expected": 51.89},
+        {"percent": 0.90, "expected": 82.813})
+    @ddt.unpack
+    def test_add_and_result_long_stream(self, percent, expected):
+        comp = algo.PercentileComputation(percent=percent)
+        [comp.add(i) for i in self.mixed50000]
+        self.assertAlmostEqual(expected, comp.result(),
+                               delta=expected * 0.005)
+
     def test_add_raises(self):
         comp = algo.PercentileComputation(0.50, 100)
         self.assertRaises(TypeError, comp.add)
@@ -162,6 +172,158 @@ class PercentileComputationTestCase(test.TestCase):
         comp = algo.PercentileComputation(0.50, 100)
         self.assertRaises(ValueError, comp.result)
 
+    def test_add_without_length(self):
+        comp = algo.PercentileComputation(0.5)
+        for i in self.range5000:
+            comp.add(i)
+        self.assertEqual(2499.5, comp.result())
+
+    def test_add_non_numerical(self):
+        comp = algo.PercentileComputation(0.5)
+        for value in (None, 2, None):
+            comp.add(value)
+        self.assertEqual(0, comp.result())
+
+    def test_result_of_long_stream(self):
+        comp = algo.PercentileComputation(0.9)
+        values = [i / 10.0 for i in range(1, 30001)]
+        for value in values:
+            comp.add(value)
+        self.assertIsNotNone(comp._sketch)
+        self.assertIsNone(comp._values)
+        self.assertAlmostEqual(2700.0, comp.result(), delta=2700.0 * 0.005)
+
+    @ddt.data((10, 20), (10, 20000), (20000, 10), (20000, 30000))
+    @ddt.unpack
+    def test_merge(self, count1, count2):
+        comp1 = algo.PercentileComputation(0.5)
+        comp2 = algo.PercentileComputation(0.5)
+        for i in range(count1):
+            comp1.add(1)
+        for i in range(count2):
+            comp2.add(2)
+
+        comp1.merge(comp2)
+
+        expected = 1 if count1 > count2 else 2
+        self.assertAlmostEqual(expected, comp1.result(),
+                               delta=expected * 0.005)
+
+
+@ddt.ddt
+class QuantileSketchTestCase(test.TestCase):
+
+    def _make_sketch(self, values, **kwargs):
+        sketch = algo.QuantileSketch(**kwargs)
+        for value in values:
+            sketch.add(value)
+        return sketch
+
+    @ddt.data(0, 1, -0.1, 2)
+    def test___init___raises(self, relative_accuracy):
+        self.assertRaises(ValueError, algo.QuantileSketch, relative_accuracy)
+
+    def test_empty(self):
+        sketch = algo.QuantileSketch()
+        self.assertEqual(0, sketch.count)
+        self.assertIsNone(sketch.quantile(0.5))
+
+    @ddt.data(
+        {"values": [float(i) for i in range(1, 10001)]},
+        {"values": [1.0 / i for i in range(1, 10001)]},
+        {"values": [math.exp(i / 1000.0) for i in range(10000)]},
+        {"values": [0.0, 0.0, 1.0, 5.0, 0.0], "relative_accuracy": 0.01},
+        {"values": [i - 500.0 for i in range(1000)],
+         "relative_accuracy": 0.01})
+    @ddt.unpack
+    def test_quantile(self, values, relative_accuracy=0.005):
+        sketch = self._make_sketch(values,
+                                   relative_accuracy=relative_accuracy)
+        self.assertEqual(len(values), sketch.count)
+        self.assertEqual(min(values), sketch.min)
+        self.assertEqual(max(values), sketch.max)
+        self.assertEqual(min(values), sketch.quantile(0))
+        self.assertEqual(max(values), sketch.quantile(1))
+        for percent in (0.01, 0.25, 0.5, 0.9, 0.95, 0.99):
+            expected = utils.percentile(list(values), percent)
+            self.assertAlmostEqual(
+                expected, sketch.quantile(percent),
+                delta=abs(expected) * relative_accuracy + 1e-9)
+
+    def test_max_bins(self):
+        values = [2.0 ** i for i in range(100)]
+        sketch = self._make_sketch(values, relative_accuracy=0.01,
+                                   max_bins=10)
+
+        self.assertEqual(10, len(sketch._positive))
+        self.assertEqual(sorted(sketch._positive), sketch._positive_keys)
+        self.assertEqual(100, sketch.count)
+        expected = utils.percentile(list(values), 0.95)
+        self.assertAlmostEqual(expected, sketch.quantile(0.95),
+                               delta=expected * 0.01)
+
+    def test_keys_are_sorted(self):
+        values = [((i * 37) % 101 - 50) / 3.0 for i in range(101)]
+        sketch = self._make_sketch(values)
+
+        self.assertEqual(sorted(sketch._positive), sketch._positive_keys)
+        self.assertEqual(sorted(sketch._negative), sketch._negative_keys)
+        for percent in (0.1, 0.5, 0.9):
+            expected = utils.percentile(list(values), percent)
+            self.assertAlmostEqual(expected, sketch.quantile(percent),
+                                   delta=abs(expected) * 0.005 + 1e-9)
+
+    @testtools.skipIf(algo.np is None, "NumPy is not installed")
+    def test_add_many(self):
+        values = [((i * 37) % 101 - 50) / 3.0 for i in range(101)]
+        sketch = algo.QuantileSketch()
+        sketch.add_many(algo.np.array(values))
+        sketch.add_many(algo.np.array([]))
+
+        self.assertEqual(self._make_sketch(values).to_dict(),
+                         sketch.to_dict())
+
+    def test_add_many_without_numpy(self):
+        values = [((i * 37) % 101 - 50) / 3.0 for i in range(101)]
+        sketch = algo.QuantileSketch()
+        with mock.patch("rally.common.streaming_algorithms.np", None):
+            sketch.add_many(values)
+
+        self.assertEqual(self._make_sketch(values).to_dict(),
+                         sketch.to_dict())
+
+    def test_merge(self):
+        values = [i / 7.0 for i in range(1, 1001)]
+        sketch = self._make_sketch(values[::2])
+        sketch.merge(self._make_sketch(values[1::2]))
+        sketch.merge(algo.QuantileSketch())
+        whole = self._make_sketch(values)
+
+        self.assertEqual(whole.count, sketch.count)
+        self.assertEqual(whole.min, sketch.min)
+        self.assertEqual(whole.max, sketch.max)
+        for percent in (0.1, 0.5, 0.9, 0.99):
+            self.assertEqual(whole.quantile(percent),
+                             sketch.quantile(percent))
+
+    def test_to_dict_from_dict(self):
+        sketch = self._make_sketch([-2.5, 0, 0.1, 1, 7, 7.01, 1000])
+
+        data = json.loads(json.dumps(sketch.to_dict()))
+        loaded = algo.QuantileSketch.from_dict(data)
+
+        self.assertEqual(sketch.to_dict(), loaded.to_dict())
+        for percent in (0, 0.1, 0.5, 0.9, 1):
+            self.assertEqual(sketch.quantile(percent),
+                             loaded.quantile(percent))
+        loaded.add(5)
+        self.assertEqual(8, loaded.count)
+
+    def test_merge_different_accuracy(self):
+        sketch = algo.QuantileSketch(relative_accuracy=0.01)
+        self.assertRaises(ValueError, sketch.merge,
+                          algo.QuantileSketch(relative_accuracy=0.02))
+
 
 class IncrementComputationTestCase(test.TestCase):
 
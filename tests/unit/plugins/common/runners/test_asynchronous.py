@@ -0,0 +1,156 @@
+# Copyright 2015: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import jsonschema
+import mock
+import testtools
+
+from rally import exceptions
+from rally.plugins.common.runners import asynchronous
+from rally.task import runner
+from tests.unit import fakes
+from tests.unit import test
+
+
+RUNNERS = "rally.plugins.common.runners."
+
+
+class AsyncioScenarioRunnerTestCase(test.TestCase):
+
+    def setUp(self):
+        super(AsyncioScenarioRunnerTestCase, self).setUp()
+        self.config = {"times": 4, "concurrency": 2, "type": "asyncio"}
+        self.context = fakes.FakeContext({"task": {"uuid": "uuid"}}).context
+        self.task = mock.MagicMock()
+
+    def _coroutine_method(self, sleep=0):
+        return mock.patch.object(
+            fakes.FakeScenario, "do_it",
+            side_effect=lambda **kwargs: asynchronous.asyncio.sleep(sleep))
+
+    def test_validate(self):
+        self.config.update({"timeout": 10, "executor_workers": 4})
+        asynchronous.AsyncioScenarioRunner.validate(self.config)
+
+    def test_validate_failed(self):
+        self.config["executor_workers"] = 0
+        self.assertRaises(jsonschema.ValidationError,
+                          runner.ScenarioRunner.validate, self.config)
+
+    def test__run_scenario_without_asyncio(self):
+        runner_obj = asynchronous.AsyncioScenarioRunner(self.task,
+                                                        self.config)
+        with mock.patch(RUNNERS + "asynchronous.asyncio", None):
+            self.assertRaises(exceptions.RallyException,
+                              runner_obj._run_scenario, fakes.FakeScenario,
+                              "do_it", self.context, {})
+
+    @testtools.skipIf(asynchronous.asyncio is None, "asyncio is missing")
+    def test__run_scenario_in_executor(self):
+        runner_obj = asynchronous.AsyncioScenarioRunner(self.task,
+                                                        self.config)
+
+        runner_obj._run_scenario(fakes.FakeScenario, "do_it",
+                                 self.context, {})
+
+        self.assertEqual(self.config["times"], len(runner_obj.result_queue))
+        for result in runner_obj.result_queue:
+            self.assertIsNotNone(runner.ScenarioRunnerResult(result))
+            self.assertEqual([], result["error"])
+
+    @testtools.skipIf(asynchronous.asyncio is None, "asyncio is missing")
+    def test__run_scenario_exception(self):
+        runner_obj = asynchronous.AsyncioScenarioRunner(self.task,
+                                                        self.config)
+
+        runner_obj._run_scenario(fakes.FakeScenario, "something_went_wrong",
+                                 self.context, {})
+
+        self.assertEqual(self.config["times"], len(runner_obj.result_queue))
+        for result in runner_obj.result_queue:
+            self.assertEqual(["Exception", "Something went wrong"],
+                             result["error"][:2])
+
+    @testtools.skipIf(asynchronous.asyncio is None, "asyncio is missing")
+    @mock.patch(RUNNERS + "asynchronous.asyncio.iscoroutinefunction",
+                return_value=True)
+    def test__run_scenario_coroutine(self, mock_iscoroutinefunction):
+        runner_obj = asynchronous.AsyncioScenarioRunner(self.task,
+                                                        self.config)
+
+        with self._coroutine_method() as mock_do_it:
+            runner_obj._run_scenario(fakes.FakeScenario, "do_it",
+                                     self.context, {"a": 1})
+
+        self.assertEqual([mock.call(a=1)] * self.config["times"],
+                         mock_do_it.mock_calls)
+        self.assertEqual(self.config["times"], len(runner_obj.result_queue))
+        for result in runner_obj.result_queue:
+            self.assertIsNotNone(runner.ScenarioRunnerResult(result))
+            self.assertEqual([], result["error"])
+
+    @testtools.skipIf(asynchronous.asyncio is None, "asyncio is missing")
+    @mock.patch(RUNNERS + "asynchronous.asyncio.iscoroutinefunction",
+                return_value=True)
+    def test__run_scenario_coroutine_timeout(self, mock_iscoroutinefunction):
+        self.config["timeout"] = 0.01
+        runner_obj = asynchronous.AsyncioScenarioRunner(self.task,
+                                                        self.config)
+
+        with self._coroutine_method(sleep=10):
+            runner_obj._run_scenario(fakes.FakeScenario, "do_it",
+                                     self.context, {})
+
+        self.assertEqual(self.config["times"], len(runner_obj.result_queue))
+        for result in runner_obj.result_queue:
+            self.assertEqual("CancelledError", result["error"][0])
+
+    @testtools.skipIf(asynchronous.asyncio is None, "asyncio is missing")
+    @mock.patch(RUNNERS + "asynchronous.asyncio.iscoroutinefunction",
+                return_value=True)
+    def test__run_scenario_failed_cancels_pending(
+            self, mock_iscoroutinefunction):
+        runner_obj = asynchronous.AsyncioScenarioRunner(self.task,
+                                                        self.config)
+        started = []
+        real_start = asynchronous._start_coroutine_iteration
+
+        def start(loop, args):
+            if started:
+                raise ValueError()
+            started.append(real_start(loop, args))
+            return started[-1]
+
+        with self._coroutine_method(sleep=10):
+            with mock.patch(RUNNERS + "asynchronous."
+                            "_start_coroutine_iteration", side_effect=start):
+                self.assertRaises(ValueError, runner_obj._run_scenario,
+                                  fakes.FakeScenario, "do_it",
+                                  self.context, {})
+
+        task, result = started[0]
+        self.assertTrue(task.cancelled())
+        self.assertEqual(0, len(runner_obj.result_queue))
+
+    @testtools.skipIf(asynchronous.asyncio is None, "asyncio is missing")
+    def test__run_scenario_aborted(self):
+        runner_obj = asynchronous.AsyncioScenarioRunner(self.task,
+                                                        self.config)
+
+        runner_obj.abort()
+        runner_obj._run_scenario(fakes.FakeScenario, "do_it",
+                                 self.context, {})
+
+        self.assertEqual(0, len(runner_obj.result_queue))
@@ -13,8 +13,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import threading
+
 import jsonschema
 import mock
+from six import moves
 
 from rally.plugins.common.runners import constant
 from rally.task import runner
@@ -46,17 +49,13 @@ class ConstantScenarioRunnerTestCase(test.TestCase):
                           runner.ScenarioRunner.validate,
                           self.config)
 
-    @mock.patch(RUNNERS + "constant.time")
-    @mock.patch(RUNNERS + "constant.threading.Thread")
-    @mock.patch(RUNNERS + "constant.multiprocessing.Queue")
-    @mock.patch(RUNNERS + "constant.runner")
-    def test__worker_process(self, mock_runner, mock_queue, mock_thread,
-                             mock_time):
-
-        mock_thread_instance = mock.MagicMock(
-            isAlive=mock.MagicMock(return_value=False))
-        mock_thread.return_value = mock_thread_instance
-
+    @mock.patch(RUNNERS_BASE + "_run_scenario_once")
+    @mock.patch(RUNNERS + "constant.threading.Thread",
+                side_effect=threading.Thread)
+    @mock.patch(RUNNERS + "constant.runner._get_scenario_context")
+    def test__worker_process(self, mock__get_scenario_context, mock_thread,
+                             mock__run_scenario_once):
+        mock_queue = mock.MagicMock()
         mock_event = mock.MagicMock(
             is_set=mock.MagicMock(return_value=False))
 
@@ -70,20 +69,66 @@ class ConstantScenarioRunnerTestCase(test.TestCase):
 
         constant._worker_process(mock_queue, fake_ram_int, 1, 2, times,
                                  context, "Dummy", "dummy", (), mock_event,
+                                 False, info)
+
+        # Threads are reused, so only a pool of 2 threads is created
+        self.assertEqual(2, mock_thread.call_count)
+        self.assertEqual(times, mock__get_scenario_context.call_count)
+        self.assertEqual(times, mock_queue.put.call_count)
+
+        scenario_context = mock__get_scenario_context.return_value
+        self.assertEqual(
+            sorted([mock.call((i, "Dummy", "dummy", scenario_context, ()))
+                    for i in range(times)]),
+            sorted(mock__run_scenario_once.mock_calls))
+
+    @mock.patch(RUNNERS_BASE + "_run_scenario_once")
+    @mock.patch(RUNNERS + "constant.runner._get_scenario_context")
+    def test__worker_process_aborted(self, mock__get_scenario_context,
+                                     mock__run_scenario_once):
+        mock_queue = mock.MagicMock()
+        mock_event = mock.MagicMock(
+            is_set=mock.MagicMock(return_value=True))
+        info = {"processes_to_start": 1, "processes_counter": 1}
+
+        constant._worker_process(mock_queue, iter(range(10)), 1, 2, 4,
+                                 {}, "Dummy", "dummy", (), mock_event, False,
                                  info)
 
-        self.assertEqual(times, mock_thread.call_count)
-        self.assertEqual(times, mock_thread_instance.start.call_count)
-        self.assertEqual(times, mock_thread_instance.join.call_count)
-        self.assertEqual(times, mock_runner._get_scenario_context.call_count)
+        self.assertFalse(mock__run_scenario_once.called)
+        self.assertFalse(mock_queue.put.called)
+
+    @mock.patch(RUNNERS_BASE + "_warm_up")
+    @mock.patch(RUNNERS_BASE + "_run_scenario_once")
+    @mock.patch(RUNNERS + "constant.runner._get_scenario_context")
+    def test__worker_process_warm_up(self, mock__get_scenario_context,
+                                     mock__run_scenario_once, mock__warm_up):
+        mock_event = mock.MagicMock(
+            is_set=mock.MagicMock(return_value=False))
+        context = {"users": []}
+        info = {"processes_to_start": 1, "processes_counter": 1}
+
+        constant._worker_process(mock.MagicMock(), iter(range(10)), 1, 2, 4,
+                                 context, "Dummy", "dummy", (), mock_event,
+                                 True, info)
+
+        mock__warm_up.assert_called_once_with("Dummy", context)
+        self.assertEqual(4, mock__run_scenario_once.call_count)
+
+    @mock.patch(RUNNERS_BASE + "_run_scenario_once")
+    def test__worker_pool_thread(self, mock__run_scenario_once):
+        mock_queue = mock.MagicMock()
+        on_done = mock.MagicMock()
+        iterations = moves.queue.Queue()
+        for args in [("a",), ("b",), None, ("c",)]:
+            iterations.put(args)
+
+        runner._worker_pool_thread(mock_queue, iterations, on_done)
 
-        for i in range(times):
-            scenario_context = mock_runner._get_scenario_context(context)
-            call = mock.call(args=(mock_queue,
-                                   (i, "Dummy", "dummy",
-                                    scenario_context, ())),
-                             target=mock_runner._worker_thread)
-            self.assertIn(call, mock_thread.mock_calls)
+        self.assertEqual([mock.call(("a",)), mock.call(("b",))],
+                         mock__run_scenario_once.mock_calls)
+        self.assertEqual(2, mock_queue.put.call_count)
+        self.assertEqual(2, on_done.call_count)
 
     @mock.patch(RUNNERS_BASE + "_run_scenario_once")
     def test__worker_thread(self, mock__run_scenario_once):
@@ -284,6 +329,16 @@ class ConstantForDurationScenarioRunnerTestCase(test.TestCase):
             self.assertIsNotNone(runner.ScenarioRunnerResult(result))
         self.assertIn("error", runner_obj.result_queue[0])
 
+    def test_run_scenario_constantly_for_duration_warm_up(self):
+        self.config["warm_up"] = True
+        runner_obj = constant.ConstantForDurationScenarioRunner(
+            None, self.config)
+
+        runner_obj._run_scenario(fakes.FakeScenario, "do_it",
+                                 self.context, self.args)
+        self.assertEqual(1, len(runner_obj.result_queue))
+        self.assertEqual([], runner_obj.result_queue[0]["error"])
+
     def test__run_scenario_constantly_aborted(self):
         runner_obj = constant.ConstantForDurationScenarioRunner(None,
                                                                 self.config)
@@ -63,29 +63,66 @@ class RPSScenarioRunnerTestCase(test.TestCase):
         self.assertRaises(jsonschema.ValidationError,
                           rps.RPSScenarioRunner.validate, config)
 
-    @mock.patch(RUNNERS + "rps.LOG")
+    def test_rps_profile_validate(self):
+        for rps_value in ([{"rps": 1, "duration": 10},
+                           {"rps": 5, "duration": 10}],
+                          {"start": 1, "end": 10, "step": 2, "duration": 5},
+                          {"start": 10, "end": 1, "duration": 5}):
+            rps.RPSScenarioRunner.validate(
+                {"type": "rps", "rps": rps_value, "poisson": True})
+
+    def test_rps_profile_validate_failed(self):
+        for rps_value in ([], [{"rps": 1}], {"start": 1, "end": 10},
+                          {"start": 0, "end": 10, "duration": 1}):
+            self.assertRaises(jsonschema.ValidationError,
+                              rps.RPSScenarioRunner.validate,
+                              {"type": "rps", "rps": rps_value})
+
+    def test__get_rps_profile(self):
+        samples = [
+            (10, [(10.0, None)]),
+            ([{"rps": 1, "duration": 10}, {"rps": 3, "duration": 5}],
+             [(1.0, 10), (3.0, 5)]),
+            ({"start": 1, "end": 4, "step": 2, "duration": 5},
+             [(1.0, 5), (3.0, 5), (4.0, 5)]),
+            ({"start": 3, "end": 1, "duration": 5},
+             [(3.0, 5), (2.0, 5), (1.0, 5)]),
+            ({"start": 2, "end": 2, "duration": 5}, [(2.0, 5)])
+        ]
+        for rps_value, expected in samples:
+            runner_obj = rps.RPSScenarioRunner(self.task, {"rps": rps_value})
+            self.assertEqual(expected, runner_obj._get_rps_profile())
+
+    def test__iteration_schedule(self):
+        schedule = rps._iteration_schedule([(2.0, None)], 100, phase=0.5)
+        self.assertEqual([100.25, 100.75, 101.25, 101.75],
+                         [next(schedule) for i in range(4)])
+
+    def test__iteration_schedule_profile(self):
+        schedule = rps._iteration_schedule(
+            [(1.0, 2), (4.0, 1), (2.0, 1)], 0)
+        self.assertEqual([0, 1, 2, 2.25, 2.5, 2.75, 3, 3.5, 4, 4.5],
+                         [next(schedule) for i in range(10)])
+
+    @mock.patch(RUNNERS + "rps.random.expovariate", return_value=0.5)
+    def test__iteration_schedule_poisson(self, mock_expovariate):
+        schedule = rps._iteration_schedule([(2.0, None)], 0, poisson=True)
+        self.assertEqual([0.5, 1, 1.5], [next(schedule) for i in range(3)])
+        mock_expovariate.assert_called_with(2.0)
+
     @mock.patch(RUNNERS + "rps.time")
     @mock.patch(RUNNERS + "rps.threading.Thread")
-    @mock.patch(RUNNERS + "rps.multiprocessing.Queue")
     @mock.patch(RUNNERS + "rps.runner")
-    def test__worker_process(self, mock_runner, mock_queue, mock_thread,
-                             mock_time, mock_log):
-
-        def time_side():
-            time_side.last += 0.03
-            time_side.count += 1
-            return time_side.last
-        time_side.last = 0
-        time_side.count = 0
-
-        mock_time.time = time_side
-
+    def test__worker_process(self, mock_runner, mock_thread, mock_time):
+        mock_time.time.return_value = 0
         mock_thread_instance = mock.MagicMock(
-            isAlive=mock.MagicMock(return_value=False))
+            is_alive=mock.MagicMock(return_value=False))
         mock_thread.return_value = mock_thread_instance
 
+        mock_queue = mock.MagicMock()
         mock_event = mock.MagicMock(
-            is_set=mock.MagicMock(return_value=False))
+            is_set=mock.MagicMock(return_value=False),
+            wait=mock.MagicMock(return_value=False))
 
         times = 4
         max_concurrent = 3
@@ -94,42 +131,95 @@ class RPSScenarioRunnerTestCase(test.TestCase):
 
         context = {"users": [{"tenant_id": "t1", "endpoint": "e1",
                               "id": "uuid1"}]}
-        info = {"processes_to_start": 1, "processes_counter": 1}
+        info = {"processes_to_start": 1, "processes_counter": 0}
 
-        rps._worker_process(mock_queue, fake_ram_int, 1, 10, times,
-                            max_concurrent, context, "Dummy", "dummy",
-                            (), mock_event, info)
+        with mock.patch(RUNNERS + "rps.threading.Semaphore") as mock_sem:
+            rps._worker_process(mock_queue, fake_ram_int, 1, [(10, None)],
+                                times, max_concurrent, context, "Dummy",
+                                "dummy", (), mock_event, False, False,
+                                info)
+            mock_sem.assert_called_once_with(max_concurrent)
+            self.assertEqual(times, mock_sem.return_value.acquire.call_count)
 
-        self.assertEqual(times, mock_log.debug.call_count)
         self.assertEqual(times, mock_thread.call_count)
         self.assertEqual(times, mock_thread_instance.start.call_count)
         self.assertEqual(times, mock_thread_instance.join.call_count)
-        self.assertEqual(times - 1, mock_time.sleep.call_count)
-        self.assertEqual(times, mock_thread_instance.isAlive.call_count)
-        self.assertEqual(times * 4 - 1, mock_time.time.count)
         self.assertEqual(times, mock_runner._get_scenario_context.call_count)
+        # Iterations are scheduled at 0, 0.1, 0.2, 0.3 while time is 0
+        self.assertEqual([mock.call(round(0.1 * i, 6))
+                          for i in range(1, times)],
+                         [mock.call(round(c[1][0], 6))
+                          for c in mock_event.wait.mock_calls])
 
         for i in range(times):
             scenario_context = mock_runner._get_scenario_context(context)
-            call = mock.call(args=(mock_queue,
-                                   (i, "Dummy", "dummy",
-                                    scenario_context, ())),
-                             target=mock_runner._worker_thread)
-            self.assertIn(call, mock_thread.mock_calls)
+            args = mock_thread.call_args_list[i][1]["args"]
+            self.assertEqual((i, "Dummy", "dummy", scenario_context, ()),
+                             args[1])
+            self.assertEqual(rps._worker_thread,
+                             mock_thread.call_args_list[i][1]["target"])
+
+    @mock.patch(RUNNERS + "rps.time")
+    @mock.patch(RUNNERS + "rps.threading.Thread")
+    @mock.patch(RUNNERS + "rps.runner")
+    def test__worker_process_aborted_while_waiting(
+            self, mock_runner, mock_thread, mock_time):
+        mock_time.time.return_value = 0
+        mock_event = mock.MagicMock(
+            is_set=mock.MagicMock(return_value=False),
+            wait=mock.MagicMock(return_value=True))
+        info = {"processes_to_start": 2, "processes_counter": 1}
+
+        rps._worker_process(mock.MagicMock(), iter(range(10)), 1,
+                            [(10, None)], 4, 3, {}, "Dummy", "dummy", (),
+                            mock_event, False, False, info)
+
+        mock_event.wait.assert_called_once_with(0.05)
+        self.assertFalse(mock_thread.called)
+
+    @mock.patch(RUNNERS + "rps.time")
+    @mock.patch(RUNNERS + "rps.threading.Thread")
+    @mock.patch(RUNNERS + "rps.runner")
+    def test__worker_process_warm_up(self, mock_runner, mock_thread,
+                                     mock_time):
+        mock_time.time.return_value = 0
+        mock_event = mock.MagicMock(
+            is_set=mock.MagicMock(return_value=True))
+        context = {"users": []}
+        info = {"processes_to_start": 1, "processes_counter": 0}
+
+        rps._worker_process(mock.MagicMock(), iter(range(10)), 1,
+                            [(10, None)], 4, 3, context, "Dummy", "dummy", (),
+                            mock_event, False, True, info)
+
+        mock_runner._warm_up.assert_called_once_with("Dummy", context)
 
     @mock.patch(RUNNERS + "rps.runner._run_scenario_once")
     def test__worker_thread(self, mock__run_scenario_once):
+        mock__run_scenario_once.return_value = {"timestamp": 12}
         mock_queue = mock.MagicMock()
+        on_done = mock.MagicMock()
 
         args = ("some_args",)
 
-        runner._worker_thread(mock_queue, args)
+        rps._worker_thread(mock_queue, args, 10, on_done)
 
-        self.assertEqual(1, mock_queue.put.call_count)
+        mock_queue.put.assert_called_once_with(
+            {"timestamp": 12, "start_lag": 2})
+        on_done.assert_called_once_with()
 
         expected_calls = [mock.call(("some_args",))]
         self.assertEqual(expected_calls, mock__run_scenario_once.mock_calls)
 
+    @mock.patch(RUNNERS + "rps.runner._run_scenario_once",
+                side_effect=RuntimeError)
+    def test__worker_thread_failed(self, mock__run_scenario_once):
+        on_done = mock.MagicMock()
+
+        self.assertRaises(RuntimeError, rps._worker_thread,
+                          mock.MagicMock(), ("some_args",), 10, on_done)
+        on_done.assert_called_once_with()
+
     @mock.patch(RUNNERS + "rps.time.sleep")
     def test__run_scenario(self, mock_sleep):
         config = {"times": 20, "rps": 20, "timeout": 5, "max_concurrency": 15}
@@ -189,7 +279,7 @@ class RPSScenarioRunnerTestCase(test.TestCase):
                     # processes_to_start equals to
                     # min(max_cpu_used, times, max_concurrency))
                     "processes_to_start": 1,
-                    "rps_per_worker": 20,
+                    "rps_per_worker": [(20, None)],
                     "times_per_worker": 20,
                     "times_overhead": 0,
                     "concurrency_per_worker": 10,
@@ -203,7 +293,7 @@ class RPSScenarioRunnerTestCase(test.TestCase):
                 "expected": {
                     "max_cpu_used": 3,
                     "processes_to_start": 3,
-                    "rps_per_worker": 3,
+                    "rps_per_worker": [(3, None)],
                     "times_per_worker": 6,
                     "times_overhead": 2,
                     "concurrency_per_worker": 1,
@@ -217,7 +307,7 @@ class RPSScenarioRunnerTestCase(test.TestCase):
                 "expected": {
                     "max_cpu_used": 20,
                     "processes_to_start": 10,
-                    "rps_per_worker": 2,
+                    "rps_per_worker": [(2, None)],
                     "times_per_worker": 1,
                     "times_overhead": 0,
                     "concurrency_per_worker": 1,
@@ -231,7 +321,7 @@ class RPSScenarioRunnerTestCase(test.TestCase):
                 "expected": {
                     "max_cpu_used": 20,
                     "processes_to_start": 10,
-                    "rps_per_worker": 2,
+                    "rps_per_worker": [(2, None)],
                     "times_per_worker": 2,
                     "times_overhead": 0,
                     "concurrency_per_worker": 1,
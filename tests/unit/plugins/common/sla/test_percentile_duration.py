@@ -0,0 +1,112 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import ddt
+import jsonschema
+import mock
+
+from rally.plugins.common.sla import percentile_duration
+from tests.unit import test
+
+
+@ddt.ddt
+class MaxPercentileDurationTestCase(test.TestCase):
+
+    @ddt.data({"percentiles": {"50": 1.0, "99.9": 2}},
+              {"atomic_actions": {"foo": {"90": 1.0}}},
+              {})
+    def test_config_schema(self, config):
+        percentile_duration.MaxPercentileDuration.validate(
+            {"max_percentile_duration": config})
+
+    @ddt.data({"percentiles": {"0": 1.0}},
+              {"percentiles": {"100": 1.0}},
+              {"percentiles": {"p50": 1.0}},
+              {"percentiles": {"50": 0}},
+              {"percentiles": {}},
+              {"atomic_actions": {"foo": {"50": -1}}},
+              {"foo": {"50": 1.0}})
+    def test_config_schema_invalid(self, config):
+        self.assertRaises(jsonschema.ValidationError,
+                          percentile_duration.MaxPercentileDuration.validate,
+                          {"max_percentile_duration": config})
+
+    def test_result(self):
+        sla1 = percentile_duration.MaxPercentileDuration(
+            {"percentiles": {"50": 6.0, "90": 10.0}})
+        sla2 = percentile_duration.MaxPercentileDuration(
+            {"percentiles": {"50": 6.0, "90": 8.0}})
+        for sla in [sla1, sla2]:
+            for duration in range(1, 11):
+                sla.add_iteration({"duration": duration})
+        self.assertTrue(sla1.result()["success"])   # 90%ile ~ 9.1
+        self.assertFalse(sla2.result()["success"])
+        self.assertEqual("Passed", sla1.status())
+        self.assertEqual("Failed", sla2.status())
+        self.assertIn("90%ile duration 9.08s <= 8.00s",
+                      sla2.result()["detail"])
+
+    def test_result_no_iterations(self):
+        sla = percentile_duration.MaxPercentileDuration(
+            {"percentiles": {"50": 1.0}})
+        self.assertTrue(sla.result()["success"])
+        self.assertEqual("50%ile duration n/a <= 1.00s - Passed",
+                         sla.details())
+
+    def test_add_iteration(self):
+        sla = percentile_duration.MaxPercentileDuration(
+            {"percentiles": {"50": 4.0}})
+        self.assertTrue(sla.add_iteration({"duration": 3.5}))
+        self.assertTrue(sla.add_iteration({"duration": 2.5}))
+        self.assertTrue(sla.add_iteration({"duration": 7.0}))   # p50 = 3.5
+        self.assertFalse(sla.add_iteration({"duration": 5.0}))  # p50 = 4.25
+        self.assertFalse(sla.add_iteration({"duration": 9.0,
+                                            "error": ["Error"]}))
+        self.assertTrue(sla.add_iteration({"duration": 1.0}))   # p50 = 3.5
+
+    def test_add_iteration_atomic_actions(self):
+        sla = percentile_duration.MaxPercentileDuration(
+            {"percentiles": {"99": 10.0},
+             "atomic_actions": {"foo": {"50": 1.0, "99": 2.0},
+                                "bar": {"50": 1.0}}})
+        self.assertTrue(sla.add_iteration(
+            {"duration": 3.0, "atomic_actions": {"foo": 1.0, "bar": None}}))
+        self.assertTrue(sla.add_iteration(
+            {"duration": 3.0, "atomic_actions": {"foo": 0.5}}))
+        self.assertFalse(sla.add_iteration(
+            {"duration": 3.0, "atomic_actions": {"foo": 2.5}}))
+        self.assertEqual(
+            "99%ile duration 3.00s <= 10.00s, "
+            "50%ile duration of bar n/a <= 1.00s, "
+            "50%ile duration of foo 1.00s <= 1.00s, "
+            "99%ile duration of foo 2.47s <= 2.00s - Failed", sla.details())
+
+    def test_add_iteration_evaluates_updated_criteria(self):
+        sla = percentile_duration.MaxPercentileDuration(
+            {"percentiles": {"50": 10.0},
+             "atomic_actions": {"foo": {"50": 1.0, "99": 2.0}}})
+        sla.add_iteration({"duration": 3.0, "atomic_actions": {"foo": 3.0}})
+        self.assertFalse(sla.success)
+
+        with mock.patch.object(sla.sketches["foo"],
+                               "quantile") as mock_quantile:
+            self.assertFalse(sla.add_iteration({"duration": 3.0}))
+            self.assertFalse(sla.add_iteration({"duration": 3.0,
+                                                "error": ["Error"]}))
+        self.assertFalse(mock_quantile.called)
+
+        sla.add_iteration({"duration": 3.0, "atomic_actions": {"foo": 0.5}})
+        sla.add_iteration({"duration": 3.0, "atomic_actions": {"foo": 0.5}})
+        self.assertEqual(set([("foo", 99.0)]), sla.failed)
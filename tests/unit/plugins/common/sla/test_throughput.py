@@ -0,0 +1,100 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import jsonschema
+
+from rally.plugins.common.sla import throughput
+from tests.unit import test
+
+
+class MinThroughputTestCase(test.TestCase):
+
+    def test_config_schema(self):
+        throughput.MinThroughput.validate(
+            {"min_throughput": {"min_rate": 2.5, "window": 5, "lag": 0}})
+        self.assertRaises(jsonschema.ValidationError,
+                          throughput.MinThroughput.validate,
+                          {"min_throughput": {"min_rate": 0}})
+        self.assertRaises(jsonschema.ValidationError,
+                          throughput.MinThroughput.validate,
+                          {"min_throughput": {"window": 5}})
+        self.assertRaises(jsonschema.ValidationError,
+                          throughput.MinThroughput.validate,
+                          {"min_throughput": {"min_rate": 1, "window": 0}})
+        self.assertRaises(jsonschema.ValidationError,
+                          throughput.MinThroughput.validate,
+                          {"min_throughput": {"min_rate": 1, "lag": -1}})
+
+    def _iterations(self, count, rate, start=0.0):
+        return [{"timestamp": start + i / float(rate), "duration": 0.5,
+                 "idle_duration": 0, "error": []} for i in range(count)]
+
+    def test_result(self):
+        sla1 = throughput.MinThroughput({"min_rate": 2, "window": 5})
+        sla2 = throughput.MinThroughput({"min_rate": 5, "window": 5})
+        for sla in [sla1, sla2]:
+            for iteration in self._iterations(40, 4):
+                sla.add_iteration(iteration)
+        self.assertTrue(sla1.result()["success"])
+        self.assertFalse(sla2.result()["success"])
+        self.assertEqual("Passed", sla1.status())
+        self.assertEqual("Failed", sla2.status())
+        self.assertEqual(
+            "Minimal throughput 3.80 iterations/s >= 5.00 iterations/s - "
+            "Failed", sla2.details())
+
+    def test_result_no_iterations(self):
+        sla = throughput.MinThroughput({"min_rate": 1})
+        self.assertTrue(sla.result()["success"])
+        self.assertEqual(
+            "Minimal throughput n/a iterations/s >= 1.00 iterations/s - "
+            "Passed", sla.details())
+
+    def test_add_iteration(self):
+        sla = throughput.MinThroughput({"min_rate": 2, "window": 2,
+                                        "lag": 0})
+        # The rate is not checked until the load lasts a whole window
+        self.assertTrue(sla.add_iteration(
+            {"timestamp": 0, "duration": 1.5, "idle_duration": 0}))
+        for iteration in self._iterations(8, 4, start=0.5):
+            self.assertTrue(sla.add_iteration(iteration))
+        self.assertEqual(3, sla.rate)
+        # The throughput drops
+        self.assertFalse(sla.add_iteration(
+            {"timestamp": 5.0, "duration": 0.5, "idle_duration": 0}))
+        self.assertEqual(0.5, sla.rate)
+        for iteration in self._iterations(8, 4, start=5.5):
+            self.assertFalse(sla.add_iteration(iteration))
+
+    def test_add_iteration_out_of_order(self):
+        sla = throughput.MinThroughput({"min_rate": 2, "window": 2,
+                                        "lag": 1})
+        iterations = self._iterations(20, 4)
+        # Results of every pair of iterations are swapped
+        for i in range(0, len(iterations), 2):
+            iterations[i], iterations[i + 1] = (iterations[i + 1],
+                                                iterations[i])
+        for iteration in iterations:
+            self.assertTrue(sla.add_iteration(iteration))
+        self.assertEqual(4, sla.rate)
+        # The result is late for more than lag and is ignored
+        sla.add_iteration({"timestamp": 0.1, "duration": 0.5,
+                           "idle_duration": 0})
+        self.assertEqual(4, sla.rate)
+
+    def test_add_iteration_without_timestamp(self):
+        sla = throughput.MinThroughput({"min_rate": 1})
+        self.assertTrue(sla.add_iteration({"duration": 1.0}))
+        self.assertIsNone(sla.rate)
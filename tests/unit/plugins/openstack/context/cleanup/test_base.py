@@ -32,6 +32,7 @@ class ResourceDecoratorTestCase(test.TestCase):
 
         self.assertEqual(Fake._service, "service")
         self.assertEqual(Fake._resource, "res")
+        self.assertFalse(Fake._list_complete)
 
 
 class ResourceManagerTestCase(test.TestCase):
@@ -99,6 +100,61 @@ class ResourceManagerTestCase(test.TestCase):
         self.assertFalse(manager.is_deleted())
         self.assertTrue(manager.is_deleted())
 
+    @mock.patch("%s.ResourceManager._manager" % BASE)
+    @mock.patch("%s.ResourceManager.list" % BASE)
+    def test_get_deleted(self, mock_resource_manager_list,
+                         mock_resource_manager__manager):
+        mock_resource_manager_list.return_value = [
+            mock.MagicMock(id="a", status="ACTIVE"),
+            mock.MagicMock(id="b", status="DELETE_COMPLETE"),
+            mock.MagicMock(id="c", status="DELETING")]
+
+        class Fake404Exc(Exception):
+            code = 404
+
+        # "d" is deleted, "e" is on the next page of list()
+        mock_resource_manager__manager.return_value.get.side_effect = [
+            Fake404Exc(), mock.MagicMock(status="ACTIVE")]
+        resources = [base.ResourceManager(resource=mock.MagicMock(id=x))
+                     for x in ("a", "b", "c", "d", "e")]
+
+        deleted = base.ResourceManager().get_deleted(resources)
+
+        self.assertEqual([resources[1], resources[3]], deleted)
+        mock_resource_manager_list.assert_called_once_with()
+        self.assertEqual(
+            [mock.call("d"), mock.call("e")],
+            mock_resource_manager__manager.return_value.get.mock_calls)
+
+    @mock.patch("%s.ResourceManager._manager" % BASE)
+    @mock.patch("%s.ResourceManager.list" % BASE)
+    def test_get_deleted_list_complete(self, mock_resource_manager_list,
+                                       mock_resource_manager__manager):
+
+        @base.resource("service", "res", list_complete=True)
+        class Fake(base.ResourceManager):
+            pass
+
+        mock_resource_manager_list.return_value = [
+            mock.MagicMock(id="a", status="ACTIVE")]
+        resources = [Fake(resource=mock.MagicMock(id=x)) for x in ("a", "b")]
+
+        self.assertEqual(resources[1:], Fake().get_deleted(resources))
+        self.assertFalse(mock_resource_manager__manager.called)
+
+    def test_get_deleted_custom_is_deleted(self):
+
+        class Fake(base.ResourceManager):
+            def is_deleted(self):
+                return self.raw_resource == "deleted"
+
+            list = mock.Mock()
+
+        resources = [Fake(resource="deleted"), Fake(resource="active")]
+
+        self.assertEqual(resources[:1], Fake().get_deleted(resources))
+        self.assertFalse(Fake.list.called)
+
     @mock.patch("%s.ResourceManager._manager" % BASE)
     def test_delete(self, mock_resource_manager__manager):
         res = mock.MagicMock(id="test_id")
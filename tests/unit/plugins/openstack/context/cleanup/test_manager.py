@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import threading
+
 import mock
 import six
 
@@ -141,7 +143,7 @@ class SeekAndDestroyTestCase(test.TestCase):
         mock_mgr = self._manager([Exception, Exception, [1, 2, 3],
                                   Exception, Exception, [4, 5]],
                                  _perform_for_admin_only=False,
-                                 _tenant_resource=True)
+                                 _tenant_resource=True, _threads=1)
 
         admin = mock.MagicMock()
         users = [{"tenant_id": 1, "id": 1}, {"tenant_id": 2, "id": 2}]
@@ -164,8 +166,9 @@ class SeekAndDestroyTestCase(test.TestCase):
             mock.call().list()
         ])
         mock__get_cached_client.assert_has_calls([
-            mock.call(admin),
+            mock.call(admin, cache={}),
             mock.call(users[0]),
+            mock.call(admin, cache={}),
             mock.call(users[1])
         ])
         expected_queue = [(admin, users[0], x) for x in range(1, 4)]
@@ -178,7 +181,7 @@ class SeekAndDestroyTestCase(test.TestCase):
                                   Exception, Exception, Exception,
                                   ["this shouldn't be in results"]],
                                  _perform_for_admin_only=False,
-                                 _tenant_resource=True)
+                                 _tenant_resource=True, _threads=1)
         users = [{"tenant_id": 1, "id": 1},
                  {"tenant_id": 1, "id": 2},
                  {"tenant_id": 2, "id": 3}]
@@ -202,12 +205,34 @@ class SeekAndDestroyTestCase(test.TestCase):
             mock.call().list()
         ])
         mock__get_cached_client.assert_has_calls([
-            mock.call(None),
+            mock.call(None, cache={}),
             mock.call(users[0]),
+            mock.call(None, cache={}),
             mock.call(users[2])
         ])
         self.assertEqual(queue, [(None, users[0], x) for x in range(1, 4)])
 
+    @mock.patch("%s.SeekAndDestroy._get_cached_client" % BASE)
+    def test__gen_publisher_users_in_parallel(self, mock__get_cached_client):
+        users = [{"tenant_id": i, "id": i} for i in range(10)]
+        mock_mgr = mock.MagicMock(_perform_for_admin_only=False,
+                                  _tenant_resource=False, _threads=4)
+        mock_mgr.side_effect = lambda admin, user, tenant_uuid: (
+            mock.MagicMock(**{"list.return_value": [tenant_uuid] * 3}))
+
+        publish = manager.SeekAndDestroy(
+            mock_mgr, None, users)._gen_publisher()
+
+        queue = []
+        publish(queue)
+
+        self.assertEqual(10, mock_mgr.call_count)
+        self.assertEqual(
+            sorted([(None, user, user["tenant_id"])
+                    for user in users] * 3,
+                   key=lambda x: x[2]),
+            sorted(queue, key=lambda x: x[2]))
+
     @mock.patch("%s.SeekAndDestroy._get_cached_client" % BASE)
     @mock.patch("%s.SeekAndDestroy._delete_single_resource" % BASE)
     def test__gen_consumer(self, mock__delete_single_resource,
@@ -251,21 +276,139 @@ class SeekAndDestroyTestCase(test.TestCase):
         mock__delete_single_resource.assert_called_once_with(
             mock_mgr.return_value)
 
+    @mock.patch("%s.SeekAndDestroy._get_cached_client" % BASE)
+    @mock.patch("%s.SeekAndDestroy._delete_single_resource" % BASE)
+    def test__gen_consumer_with_watcher(self, mock__delete_single_resource,
+                                        mock__get_cached_client):
+        mock_mgr = mock.MagicMock(__name__="Test")
+        watcher = mock.MagicMock()
+        consumer = manager.SeekAndDestroy(
+            mock_mgr, None, None)._gen_consumer(watcher)
+
+        admin = mock.MagicMock()
+        user = {"id": "a", "tenant_id": "uuid1"}
+        consumer({}, (admin, user, "res"))
+
+        mock__delete_single_resource.assert_called_once_with(
+            mock_mgr.return_value, watch=mock.ANY)
+        watch = mock__delete_single_resource.call_args[1]["watch"]
+        watch("resource")
+        watcher.add.assert_called_once_with(admin, user, "resource")
+
+    @mock.patch("%s.LOG" % BASE)
+    def test__delete_single_resource_with_watch(self, mock_log):
+        mock_resource = mock.MagicMock(_max_attempts=3, _timeout=10,
+                                       _interval=0)
+        watch = mock.MagicMock()
+
+        manager.SeekAndDestroy(None, None, None)._delete_single_resource(
+            mock_resource, watch=watch)
+
+        mock_resource.delete.assert_called_once_with()
+        watch.assert_called_once_with(mock_resource)
+        self.assertFalse(mock_resource.is_deleted.called)
+        self.assertFalse(mock_log.warning.called)
+
+    @mock.patch("%s.DeletionWatcher" % BASE)
     @mock.patch("%s.SeekAndDestroy._gen_consumer" % BASE)
     @mock.patch("%s.SeekAndDestroy._gen_publisher" % BASE)
     @mock.patch("%s.broker.run" % BASE)
     def test_exterminate(self, mock_broker_run, mock__gen_publisher,
-                         mock__gen_consumer):
+                         mock__gen_consumer, mock_deletion_watcher):
 
         manager_cls = mock.MagicMock(_threads=5)
         manager.SeekAndDestroy(manager_cls, None, None).exterminate()
 
+        mock_deletion_watcher.assert_called_once_with(
+            manager_cls, manager.SeekAndDestroy._get_cached_client)
+        watcher = mock_deletion_watcher.return_value
         mock__gen_publisher.assert_called_once_with()
-        mock__gen_consumer.assert_called_once_with()
+        mock__gen_consumer.assert_called_once_with(watcher)
         mock_broker_run.assert_called_once_with(
             mock__gen_publisher.return_value,
             mock__gen_consumer.return_value,
             consumers_count=5)
+        watcher.start.assert_called_once_with()
+        watcher.finish.assert_called_once_with()
+
+
+class DeletionWatcherTestCase(test.TestCase):
+
+    def _resource(self, name, timeout=10):
+        return mock.MagicMock(_timeout=timeout, **{"id.return_value": name})
+
+    def _manager_cls(self, get_deleted, max_attempts=3):
+        manager_cls = mock.MagicMock(_interval=0, _max_attempts=max_attempts)
+        manager_cls.return_value.get_deleted.side_effect = get_deleted
+        return manager_cls
+
+    @mock.patch("%s.LOG" % BASE)
+    def test_watch(self, mock_log):
+        checks = []
+
+        def get_deleted(resources):
+            checks.append([r.id() for r in resources])
+            # resources are deleted one by one
+            return resources[:1]
+
+        manager_cls = self._manager_cls(get_deleted)
+        get_client = mock.MagicMock()
+        watcher = manager.DeletionWatcher(manager_cls, get_client)
+
+        admin = {"endpoint": "admin"}
+        user = {"id": "u1", "tenant_id": "t1", "endpoint": "user"}
+        for name in ("a", "b", "c"):
+            watcher.add(admin, user, self._resource(name))
+        watcher.start()
+        watcher.finish()
+
+        self.assertEqual([["a", "b", "c"], ["b", "c"], ["c"]], checks)
+        manager_cls.assert_called_with(
+            admin=get_client.return_value, user=get_client.return_value,
+            tenant_uuid="t1")
+        self.assertFalse(mock_log.warning.called)
+
+    @mock.patch("%s.LOG" % BASE)
+    def test_watch_groups_by_user(self, mock_log):
+        checks = []
+
+        def get_deleted(resources):
+            checks.append(sorted(r.id() for r in resources))
+            return resources
+
+        watcher = manager.DeletionWatcher(self._manager_cls(get_deleted),
+                                          mock.MagicMock())
+        users = [{"id": "u%s" % i, "tenant_id": "t%s" % i} for i in range(2)]
+        for i in range(6):
+            watcher.add(None, users[i % 2], self._resource(str(i)))
+        watcher.start()
+        watcher.finish()
+
+        self.assertEqual([["0", "2", "4"], ["1", "3", "5"]], sorted(checks))
+
+    @mock.patch("%s.LOG" % BASE)
+    def test_watch_timeout(self, mock_log):
+        watcher = manager.DeletionWatcher(
+            self._manager_cls(lambda resources: []), mock.MagicMock())
+        watcher.add(None, None, self._resource("a", timeout=0))
+        watcher.start()
+        watcher.finish()
+
+        self.assertEqual(1, mock_log.warning.call_count)
+        self.assertIn("timeout", mock_log.warning.call_args[0][0])
+
+    @mock.patch("%s.LOG" % BASE)
+    def test_watch_broken_get_deleted(self, mock_log):
+        manager_cls = self._manager_cls(Exception, max_attempts=2)
+        watcher = manager.DeletionWatcher(manager_cls, mock.MagicMock())
+        watcher.add(None, None, self._resource("a"))
+        watcher.start()
+        watcher.finish()
+
+        self.assertEqual(3, manager_cls.return_value.get_deleted.call_count)
+        self.assertEqual(3, mock_log.exception.call_count)
+        # 3 warnings about broken method and 1 about timeout
+        self.assertEqual(4, mock_log.warning.call_count)
 
 
 class ResourceManagerTestCase(test.TestCase):
@@ -352,3 +495,49 @@ class ResourceManagerTestCase(test.TestCase):
             ),
             mock.call().exterminate()
         ])
+
+    @mock.patch("%s.SeekAndDestroy" % BASE)
+    @mock.patch("%s.find_resource_managers" % BASE)
+    def test_cleanup_same_order_in_parallel(self, mock_find_resource_managers,
+                                            mock_seek_and_destroy):
+        managers = [mock.MagicMock(_order=1, _service="s", _resource="a"),
+                    mock.MagicMock(_order=1, _service="s", _resource="b"),
+                    mock.MagicMock(_order=2, _service="s", _resource="c")]
+        mock_find_resource_managers.return_value = managers
+        events = []
+        started = {"a": threading.Event(), "b": threading.Event()}
+
+        def seek_and_destroy(mgr, admin, users):
+            def exterminate():
+                if mgr._resource in started:
+                    started[mgr._resource].set()
+                    # the other manager of the same order is running too
+                    other = "b" if mgr._resource == "a" else "a"
+                    self.assertTrue(started[other].wait(5))
+                events.append(mgr._resource)
+            return mock.Mock(exterminate=exterminate)
+
+        mock_seek_and_destroy.side_effect = seek_and_destroy
+
+        manager.cleanup(names=["s"], admin_required=True,
+                        admin="admin", users=["user"])
+
+        self.assertEqual(["a", "b"], sorted(events[:2]))
+        self.assertEqual("c", events[2])
+
+    @mock.patch("%s.LOG" % BASE)
+    @mock.patch("%s.SeekAndDestroy" % BASE)
+    @mock.patch("%s.find_resource_managers" % BASE)
+    def test_cleanup_logs_durations(self, mock_find_resource_managers,
+                                    mock_seek_and_destroy, mock_log):
+        mock_find_resource_managers.return_value = [
+            mock.MagicMock(_order=1, _service="nova", _resource="servers"),
+            mock.MagicMock(_order=2, _service="glance", _resource="images")]
+
+        manager.cleanup(names=["nova", "glance"], admin_required=True,
+                        admin="admin", users=["user"])
+
+        self.assertEqual(1, mock_log.info.call_count)
+        message = mock_log.info.call_args[0][0]
+        self.assertIn("nova.servers", message)
+        self.assertIn("glance.images", message)
@@ -38,7 +38,9 @@ class AllResourceManagerTestCase(test.TestCase):
                 "_admin_required", "_perform_for_admin_only",
                 "_tenant_resource", "_service", "_resource", "_order",
                 "_max_attempts", "_timeout", "_interval", "_threads",
-                "_manager", "id", "is_deleted", "delete", "list",
+                "_list_complete",
+                "_manager", "id", "is_deleted", "get_deleted", "delete",
+                "list",
                 "supports_extension"
             ])
 
@@ -221,6 +221,17 @@ class UserGeneratorTestCase(test.ScenarioTestCase):
                                                           "nova-network")
         nova_admin.networks.disassociate.assert_called_once_with(networks[0])
 
+    @mock.patch("%s.broker.run" % CTX)
+    def test__run_broker(self, mock_broker_run):
+        self.context["config"]["users"]["resource_management_processes"] = 4
+        user_generator = users.UserGenerator(self.context)
+
+        result = user_generator._run_broker("publish", "consume")
+
+        self.assertEqual(mock_broker_run.return_value, result)
+        mock_broker_run.assert_called_once_with("publish", "consume",
+                                                self.threads, 4)
+
     @mock.patch("%s.keystone" % CTX)
     def test__create_tenants(self, mock_keystone):
         user_generator = users.UserGenerator(self.context)
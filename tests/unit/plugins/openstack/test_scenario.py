@@ -15,6 +15,7 @@
 import mock
 from oslotest import mockpatch
 
+from rally.common import objects
 from rally.plugins.openstack import scenario as base_scenario
 from tests.unit import test
 
@@ -67,3 +68,57 @@ class OpenStackScenarioTestCase(test.TestCase):
         self.assertEqual(self.context, scenario.context)
 
         self.assertEqual("foobar", scenario._clients)
+
+    def test_init_api_versions(self):
+        self.context["user"] = {"endpoint": mock.Mock()}
+        self.context["config"] = {"api_versions": {"nova": {"version": 2}}}
+        base_scenario.OpenStackScenario(self.context)
+        self.osclients.mock.assert_called_once_with(
+            self.context["user"]["endpoint"],
+            {"nova": {"version": 2, "service_type": None}})
+
+    def test_warm_up(self):
+        admin = objects.Endpoint("url", "admin", "pass", "admin")
+        users = [objects.Endpoint("url", "user%d" % i, "pass", "tenant")
+                 for i in range(2)]
+        self.context["admin"] = {"endpoint": admin}
+        self.context["users"] = [{"endpoint": user} for user in users]
+        self.osclients.mock.side_effect = lambda *args: mock.MagicMock()
+
+        with mock.patch.object(base_scenario.OpenStackScenario,
+                               "_clients_pool", {}):
+            base_scenario.OpenStackScenario.warm_up(self.context)
+
+            self.assertEqual([mock.call(user, {}) for user in users] +
+                             [mock.call(admin, {})],
+                             self.osclients.mock.call_args_list)
+            pool = base_scenario.OpenStackScenario._clients_pool
+            self.assertEqual(3, len(pool))
+            for clients in pool.values():
+                clients.keystone.assert_called_once_with()
+
+            # Scenario instances get Clients from the pool, endpoints are
+            # compared by value
+            self.osclients.mock.reset_mock()
+            scenario = base_scenario.OpenStackScenario(
+                {"admin": {"endpoint": objects.Endpoint(
+                    "url", "admin", "pass", "admin")},
+                 "user": {"endpoint": objects.Endpoint(
+                     "url", "user1", "pass", "tenant")}})
+            self.assertIn(scenario._admin_clients, pool.values())
+            self.assertIn(scenario._clients, pool.values())
+            self.assertNotEqual(scenario._admin_clients, scenario._clients)
+            scenario._clients.clear_if_token_expires.assert_called_once_with()
+
+            scenario = base_scenario.OpenStackScenario(
+                {"user": {"endpoint": objects.Endpoint(
+                    "url", "user2", "pass", "tenant")}})
+            self.assertNotIn(scenario._clients, pool.values())
+            self.assertEqual(1, self.osclients.mock.call_count)
+
+    def test_clear_warm_up(self):
+        with mock.patch.object(base_scenario.OpenStackScenario,
+                               "_clients_pool", {"key": "clients"}):
+            base_scenario.OpenStackScenario.clear_warm_up()
+            self.assertEqual({},
+                             base_scenario.OpenStackScenario._clients_pool)
@@ -0,0 +1,120 @@
+# Copyright 2015: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import os
+import shutil
+import tempfile
+
+import mock
+
+from rally import plugins
+from rally.task import scenario
+from tests.unit import test
+
+
+class PluginsTestCase(test.TestCase):
+
+    def setUp(self):
+        super(PluginsTestCase, self).setUp()
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        self.manifest_path = os.path.join(tmp_dir, "rally", "manifest.json")
+        mock.patch("rally.plugins.MANIFEST_PATH", self.manifest_path).start()
+        mock.patch("rally.plugins.PLUGINS_LOADED", False).start()
+        mock.patch("rally.plugins.LAZY_PLUGINS_LOADED", False).start()
+
+    def test_make_manifest(self):
+        manifest = plugins.make_manifest()
+
+        self.assertEqual(plugins._get_packages_mtime(), manifest["mtime"])
+        modules = set()
+        for entry in manifest["plugins"]:
+            self.assertTrue(plugins._in_packages(entry["module"]))
+            self.assertEqual("rally.common.plugin.plugin.Plugin",
+                             entry["bases"][-1])
+            modules.add(entry["module"])
+        self.assertIn("rally.plugins.common.runners.constant", modules)
+
+        entry = [e for e in manifest["plugins"]
+                 if e["name"] == "Dummy.dummy"][0]
+        self.assertEqual(
+            {"name": "Dummy.dummy", "namespace": "default",
+             "base": "rally.task.scenario.Scenario",
+             "module": "rally.plugins.common.scenarios.dummy.dummy",
+             "schema": None},
+            dict((k, v) for k, v in entry.items() if k != "bases"))
+        json.dumps(manifest)
+
+    @mock.patch("rally.plugins.plugin.set_lazy_plugins")
+    @mock.patch("rally.plugins._load_user_plugins")
+    @mock.patch("rally.plugins.load")
+    def test_load_lazily(self, mock_load, mock__load_user_plugins,
+                         mock_set_lazy_plugins):
+        manifest = plugins.make_manifest()
+        plugins._write_manifest(manifest)
+
+        plugins.load_lazily()
+
+        self.assertFalse(mock_load.called)
+        mock__load_user_plugins.assert_called_once_with()
+        mock_set_lazy_plugins.assert_called_once_with(manifest["plugins"])
+        self.assertTrue(plugins.LAZY_PLUGINS_LOADED)
+
+        plugins.load_lazily()
+        mock_set_lazy_plugins.assert_called_once_with(manifest["plugins"])
+
+    @mock.patch("rally.plugins.plugin.set_lazy_plugins")
+    @mock.patch("rally.plugins.load")
+    def test_load_lazily_outdated_manifest(self, mock_load,
+                                           mock_set_lazy_plugins):
+        manifest = plugins.make_manifest()
+        manifest["mtime"] -= 1
+        plugins._write_manifest(manifest)
+
+        plugins.load_lazily()
+
+        mock_load.assert_called_once_with()
+        self.assertFalse(mock_set_lazy_plugins.called)
+        with open(self.manifest_path) as f:
+            self.assertEqual(plugins._get_packages_mtime(),
+                             json.load(f)["mtime"])
+
+    @mock.patch("rally.plugins.load")
+    def test_load_lazily_without_manifest(self, mock_load):
+        plugins.load_lazily()
+
+        mock_load.assert_called_once_with()
+        self.assertTrue(os.path.exists(self.manifest_path))
+
+    @mock.patch("rally.plugins.os.rename", side_effect=OSError)
+    @mock.patch("rally.plugins.load")
+    def test_load_lazily_manifest_is_not_saved(self, mock_load,
+                                               mock_rename):
+        plugins.load_lazily()
+
+        mock_load.assert_called_once_with()
+        self.assertFalse(os.path.exists(self.manifest_path))
+
+    def test_ensure_plugins_are_loaded(self):
+
+        @plugins.ensure_plugins_are_loaded
+        def func(a, b=2):
+            return scenario.Scenario.get("Dummy.dummy"), a, b
+
+        with mock.patch("rally.plugins.load_lazily") as mock_load_lazily:
+            self.assertEqual(
+                (scenario.Scenario.get("Dummy.dummy"), 1, 3), func(1, b=3))
+        mock_load_lazily.assert_called_once_with()
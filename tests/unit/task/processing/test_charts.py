@@ -15,8 +15,10 @@
 
 import ddt
 import mock
+import testtools
 
 from rally.common import costilius
+from rally import exceptions
 from rally.task.processing import charts
 from tests.unit import test
 
@@ -242,6 +244,13 @@ class HistogramChartTestCase(test.TestCase):
                       "view": "Rice Rule"}]]
         self.assertEqual(expected, chart.render())
 
+    def test_add_iteration_bins(self):
+        chart = self.HistogramChart({"iterations_count": 4})
+        [chart.add_iteration({"foo": {"bar": x}})
+         for x in (2.7, 2.71, None, 4.3)]
+        # None is counted as 0, values beyond the last bin are skipped
+        self.assertEqual([2, 1], chart._data["bar"]["views"][0]["y"])
+
     @ddt.data(
         {"base_size": 2, "min_value": 1, "max_value": 4,
          "expected": [{"bins": 2, "view": "Square Root Choice",
@@ -430,3 +439,156 @@ class MainStatsTableTestCase(test.TestCase):
             table.add_iteration(el)
 
         self.assertEqual(expected, table.render())
+
+
+def generate_iterations(count):
+    iterations = []
+    for i in range(count):
+        atomic_actions = costilius.OrderedDict()
+        if i % 5 != 1:
+            atomic_actions["foo"] = (i % 7) / 10.0
+        atomic_actions["bar"] = None if i % 9 == 1 else (i % 13) / 10.0
+        iterations.append({
+            "duration": 2.0 + (i % 17) / 10.0, "idle_duration": i % 2,
+            "timestamp": 10.0 + i / 2.0, "error": ["E"] if i % 9 == 1 else [],
+            "scenario_output": {"errors": "",
+                                "data": {"out": i} if i % 3 else {}},
+            "atomic_actions": atomic_actions})
+    return iterations
+
+
+@ddt.ddt
+class AddColumnsTestCase(test.TestCase):
+
+    def _info(self, iterations):
+        return {"iterations_count": len(iterations),
+                "iterations_failed": len([i for i in iterations
+                                          if i["error"]]),
+                "min_duration": 2.0, "max_duration": 3.6,
+                "tstamp_start": 10.0,
+                "load_duration": len(iterations) / 2.0 + 5,
+                "output_names": ["out"],
+                "atomic": costilius.OrderedDict([
+                    ("foo", {"min_duration": 0.1, "max_duration": 0.6}),
+                    ("bar", {"min_duration": 0, "max_duration": 1.2})])}
+
+    def assertRendered(self, expected, rendered):
+        if isinstance(expected, (list, tuple)):
+            self.assertEqual(len(expected), len(rendered))
+            for e, r in zip(expected, rendered):
+                self.assertRendered(e, r)
+        elif isinstance(expected, dict):
+            self.assertEqual(sorted(expected), sorted(rendered))
+            for key in expected:
+                self.assertRendered(expected[key], rendered[key])
+        elif isinstance(expected, float):
+            self.assertAlmostEqual(expected, rendered)
+        else:
+            self.assertEqual(expected, rendered)
+
+    def test_iteration_columns(self):
+        iterations = generate_iterations(12)
+        columns = charts.IterationColumns(self._info(iterations))
+        for iteration in iterations:
+            columns.append(iteration)
+
+        self.assertEqual(12, columns.count)
+        self.assertEqual([i["duration"] for i in iterations],
+                         list(columns.duration))
+        self.assertEqual([0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0],
+                         list(columns.error))
+        self.assertEqual([1, 0, 1, 1, 1, 1, 0, 1, 1, 1, 1, 0],
+                         list(columns.atomic_present["foo"]))
+        self.assertEqual([1] * 12, list(columns.atomic_present["bar"]))
+        self.assertEqual(["foo", "bar"], list(columns.atomic))
+        self.assertEqual([0, 1, 2], list(columns.output["out"])[:3])
+        self.assertIsNone(columns.iterations)
+
+    def test_iteration_columns_keep_iterations(self):
+        iterations = generate_iterations(3)
+        columns = charts.IterationColumns(self._info(iterations),
+                                          keep_iterations=True)
+        for iteration in iterations:
+            columns.append(iteration)
+
+        self.assertEqual(iterations, columns.iterations)
+
+    @testtools.skipIf(charts.np is None, "NumPy is not installed")
+    @ddt.data(charts.MainStackedAreaChart, charts.AtomicStackedAreaChart,
+              charts.OutputStackedAreaChart, charts.AtomicAvgChart,
+              charts.LoadProfileChart, charts.MainHistogramChart,
+              charts.AtomicHistogramChart, charts.MainStatsTable)
+    def test_add_columns(self, chart_cls):
+        for count in (0, 1, 30, 2500):
+            iterations = generate_iterations(count)
+            info = self._info(iterations)
+            chart = chart_cls(info)
+            batch_chart = chart_cls(info)
+            columns = charts.IterationColumns(info)
+            for iteration in iterations:
+                columns.append(iteration)
+                chart.add_iteration(iteration)
+
+            batch_chart.add_columns(columns)
+
+            self.assertRendered(chart.render(), batch_chart.render())
+
+    @testtools.skipIf(charts.np is None, "NumPy is not installed")
+    def test_add_columns_stats_estimated(self):
+        iterations = generate_iterations(2500)
+        info = self._info(iterations)
+        chart = charts.MainStatsTable(info)
+        batch_chart = charts.MainStatsTable(info)
+        columns = charts.IterationColumns(info)
+        with mock.patch.object(charts.streaming.PercentileComputation,
+                               "EXACT_LIMIT", 100):
+            for iteration in iterations:
+                columns.append(iteration)
+                chart.add_iteration(iteration)
+            batch_chart.add_columns(columns)
+
+        self.assertEqual(chart.render(), batch_chart.render())
+
+    class Chart(charts.Chart):
+        def _map_iteration_values(self, iteration):
+            return [("duration", iteration["duration"])]
+
+    def test_add_columns_without_map_columns(self):
+        iterations = generate_iterations(30)
+        info = self._info(iterations)
+        chart = self.Chart(info)
+        batch_chart = self.Chart(info)
+        columns = charts.IterationColumns(info, keep_iterations=True)
+        for iteration in iterations:
+            columns.append(iteration)
+            chart.add_iteration(iteration)
+
+        batch_chart.add_columns(columns)
+
+        self.assertRendered(chart.render(), batch_chart.render())
+
+    def test_add_columns_without_iterations(self):
+        iterations = generate_iterations(3)
+        info = self._info(iterations)
+        columns = charts.IterationColumns(info)
+        for iteration in iterations:
+            columns.append(iteration)
+
+        self.assertRaises(exceptions.RallyException,
+                          self.Chart(info).add_columns, columns)
+
+    @testtools.skipIf(charts.np is None, "NumPy is not installed")
+    def test_add_columns_stats_atomic_without_duration(self):
+        iterations = generate_iterations(30)
+        iterations[3]["atomic_actions"]["foo"] = None
+        info = self._info(iterations)
+        chart = charts.MainStatsTable(info)
+        batch_chart = charts.MainStatsTable(info)
+        columns = charts.IterationColumns(info)
+        for iteration in iterations:
+            columns.append(iteration)
+            chart.add_iteration(iteration)
+
+        batch_chart.add_columns(columns)
+
+        self.assertRendered(chart.render(), batch_chart.render())
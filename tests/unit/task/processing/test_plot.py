@@ -15,6 +15,7 @@
 
 import json
 
+import ddt
 import mock
 
 from rally.task.processing import plot
@@ -23,10 +24,15 @@ from tests.unit import test
 PLOT = "rally.task.processing.plot."
 
 
+@ddt.ddt
 class PlotTestCase(test.TestCase):
 
+    @ddt.data(True, False)
     @mock.patch(PLOT + "charts")
-    def test__process_scenario(self, mock_charts):
+    def test__process_scenario(self, with_numpy, mock_charts):
+        if not with_numpy:
+            mock_charts.np = None
+        mock_charts.LoadProfileChart.return_value.supports_columns = False
         for mock_ins, ret in [
                 (mock_charts.MainStatsTable, "main_stats"),
                 (mock_charts.MainStackedAreaChart, "main_stacked"),
@@ -71,6 +77,24 @@ class PlotTestCase(test.TestCase):
                 "output": "output_stacked", "output_errors": [],
                 "sla": [], "sla_success": True, "table": "main_stats"})
 
+        chart = mock_charts.MainStatsTable.return_value
+        if with_numpy:
+            mock_charts.IterationColumns.assert_called_once_with(data["info"])
+            columns = mock_charts.IterationColumns.return_value
+            self.assertEqual([mock.call(i) for i in iterations],
+                             columns.append.mock_calls)
+            chart.add_columns.assert_called_once_with(columns)
+            self.assertFalse(chart.add_iteration.called)
+            # Charts which do not support columns get iterations one by one
+            chart = mock_charts.LoadProfileChart.return_value
+            self.assertEqual([mock.call(i) for i in iterations],
+                             chart.add_iteration.mock_calls)
+            self.assertFalse(chart.add_columns.called)
+        else:
+            self.assertFalse(mock_charts.IterationColumns.called)
+            self.assertEqual([mock.call(i) for i in iterations],
+                             chart.add_iteration.mock_calls)
+
     @mock.patch(PLOT + "_process_scenario")
     @mock.patch(PLOT + "json.dumps", return_value="json_data")
     def test__process_tasks(self, mock_json_dumps, mock__process_scenario):
@@ -110,8 +134,10 @@ class PlotTestCase(test.TestCase):
                       "full_duration": "foo_full_duration",
                       "sla": "foo_sla",
                       "load_duration": "foo_load_duration"}}]
-        mock_objects.Task.extend_results.assert_called_once_with(
-            generic_results)
+        self.assertEqual(1, mock_objects.Task.extend_results.call_count)
+        self.assertEqual(
+            generic_results,
+            list(mock_objects.Task.extend_results.call_args[0][0]))
         mock_get_template.assert_called_once_with("task/report.html")
         mock__process_tasks.assert_called_once_with(["extended_result"])
         mock_get_template.return_value.render.assert_called_once_with(
@@ -14,11 +14,14 @@
 #    under the License.
 
 import ddt
+import mock
 
 from rally import exceptions
 from rally.task.processing import utils
 from tests.unit import test
 
+PROCESSING = "rally.task.processing."
+
 
 class MathTestCase(test.TestCase):
 
@@ -94,6 +97,34 @@ class GraphZipperTestCase(test.TestCase):
         [merger.add_point(value) for value in data_stream]
         self.assertEqual(expected, merger.get_zipped_graph())
 
+    @ddt.data({"data_stream": list(range(1, 11)), "zipped_size": 8},
+              {"data_stream": [.005, .8, 22, .004, .7, 12, .5, .07, .02] * 10,
+               "zipped_size": 8},
+              {"data_stream": [x / 10.0 for x in range(1000)],
+               "zipped_size": 100},
+              {"data_stream": list(range(1, 100)), "zipped_size": 1000},
+              {"data_stream": [1, 4, 11, None, 42], "zipped_size": 2},
+              {"data_stream": [], "zipped_size": 8})
+    @ddt.unpack
+    def test_add_points(self, data_stream, zipped_size):
+        merger = utils.GraphZipper(len(data_stream), zipped_size)
+        [merger.add_point(value) for value in data_stream]
+        expected = merger.get_zipped_graph()
+
+        for np in (utils.np, None):
+            with mock.patch(PROCESSING + "utils.np", np):
+                merger = utils.GraphZipper(len(data_stream), zipped_size)
+                merger.add_points(data_stream)
+                zipped_graph = merger.get_zipped_graph()
+                self.assertEqual([p[0] for p in expected],
+                                 [p[0] for p in zipped_graph])
+                for point, expected_point in zip(zipped_graph, expected):
+                    self.assertAlmostEqual(expected_point[1], point[1])
+
+    def test_add_points_raises(self):
+        merger = utils.GraphZipper(10, 8)
+        self.assertRaises(RuntimeError, merger.add_points, [1] * 11)
+
     def test_add_point_raises(self):
         merger = utils.GraphZipper(10, 8)
         self.assertRaises(TypeError, merger.add_point)
@@ -218,6 +218,36 @@ class ContextManagerTestCase(test.TestCase):
         mock_context.return_value.assert_has_calls(
             [mock.call.cleanup(), mock.call.cleanup()], any_order=True)
 
+    @mock.patch("rally.task.context.Context.get")
+    def test_map_for_scenario(self, mock_context_get):
+        def map_for_scenario(context_obj):
+            context_obj["user"] = context_obj.pop("users")[0]
+            return context_obj
+
+        mock_context = mock.MagicMock()
+        mock_context.return_value.map_for_scenario.side_effect = (
+            map_for_scenario)
+        mock_context_get.return_value = mock_context
+        task = {"uuid": "uuid"}
+        users = [{"id": "user1"}, {"id": "user2"}]
+        ctx_object = {"config": {"a": []}, "task": task, "users": users}
+
+        manager = context.ContextManager(ctx_object)
+        result = manager.map_for_scenario()
+        manager.map_for_scenario()
+
+        self.assertEqual({"config": {"a": []}, "task": task,
+                          "user": {"id": "user1"}}, result)
+        self.assertIs(task, result["task"])
+        self.assertIsNot(users[0], result["user"])
+        self.assertIsNot(ctx_object["config"], result["config"])
+        self.assertEqual({"config": {"a": []}, "task": task, "users": users},
+                         ctx_object)
+        mock_context_get.assert_called_once_with("a")
+        mock_context.assert_called_once_with(ctx_object)
+        self.assertEqual(
+            2, mock_context.return_value.map_for_scenario.call_count)
+
     @mock.patch("rally.task.context.ContextManager.cleanup")
     @mock.patch("rally.task.context.ContextManager.setup")
     def test_with_statement(
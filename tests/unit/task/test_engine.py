@@ -15,7 +15,6 @@
 
 """Tests for the Test engine."""
 
-import collections
 import copy
 
 import jsonschema
@@ -24,6 +23,8 @@ import mock
 from rally import consts
 from rally import exceptions
 from rally.task import engine
+from rally.task import runner as runner_module
+from rally.task import scenario
 from tests.unit import fakes
 from tests.unit import test
 
@@ -107,9 +108,9 @@ class BenchmarkEngineTestCase(test.TestCase):
         self.assertTrue(task.set_failed.called)
 
     @mock.patch("rally.task.engine.TaskConfig")
-    @mock.patch("rally.task.engine.scenario.Scenario.get_all")
+    @mock.patch("rally.task.engine.scenario.Scenario.get")
     def test__validate_config_scenarios_name(
-            self, mock_scenario_get_all, mock_task_config):
+            self, mock_scenario_get, mock_task_config):
 
         mock_task_instance = mock.MagicMock()
         mock_subtask = mock.MagicMock()
@@ -119,18 +120,14 @@ class BenchmarkEngineTestCase(test.TestCase):
         ]
         mock_task_instance.subtasks = [mock_subtask]
 
-        mock_scenario_get_all.return_value = [
-            mock.MagicMock(get_name=lambda: "e"),
-            mock.MagicMock(get_name=lambda: "b"),
-            mock.MagicMock(get_name=lambda: "a")
-        ]
         eng = engine.BenchmarkEngine(mock.MagicMock(), mock.MagicMock())
         eng._validate_config_scenarios_name(mock_task_instance)
+        mock_scenario_get.assert_has_calls([mock.call("a"), mock.call("b")])
 
     @mock.patch("rally.task.engine.TaskConfig")
-    @mock.patch("rally.task.engine.scenario.Scenario")
+    @mock.patch("rally.task.engine.scenario.Scenario.get")
     def test__validate_config_scenarios_name_non_exsisting(
-            self, mock_scenario, mock_task_config):
+            self, mock_scenario_get, mock_task_config):
 
         mock_task_instance = mock.MagicMock()
         mock_subtask = mock.MagicMock()
@@ -140,12 +137,18 @@ class BenchmarkEngineTestCase(test.TestCase):
             {"name": "nonexist2"}
         ]
         mock_task_instance.subtasks = [mock_subtask]
-        mock_scenario.list_benchmark_scenarios.return_value = ["exist", "aaa"]
+
+        def get(name):
+            if name != "exist":
+                raise exceptions.PluginNotFound(name=name, namespace="any of")
+
+        mock_scenario_get.side_effect = get
         eng = engine.BenchmarkEngine(mock.MagicMock(), mock.MagicMock())
 
-        self.assertRaises(exceptions.NotFoundScenarios,
-                          eng._validate_config_scenarios_name,
-                          mock_task_instance)
+        exc = self.assertRaises(exceptions.NotFoundScenarios,
+                                eng._validate_config_scenarios_name,
+                                mock_task_instance)
+        self.assertIn("nonexist1, nonexist2", str(exc))
 
     @mock.patch("rally.task.engine.TaskConfig")
     @mock.patch("rally.task.engine.runner.ScenarioRunner.validate")
@@ -216,11 +219,12 @@ class BenchmarkEngineTestCase(test.TestCase):
                                               mock_task_config):
         deployment = mock.MagicMock()
         eng = engine.BenchmarkEngine(mock.MagicMock(), mock.MagicMock())
-        eng._validate_config_semantic_helper("admin", "user", "name", "pos",
-                                             deployment, {"args": "args"})
+        eng._validate_config_semantic_helper("admin", ["user"], "name", "pos",
+                                             deployment, {"args": "args"},
+                                             cache="cache")
         mock_scenario_validate.assert_called_once_with(
             "name", {"args": "args"}, admin="admin", users=["user"],
-            deployment=deployment)
+            deployment=deployment, cache="cache")
 
     @mock.patch("rally.task.engine.TaskConfig")
     @mock.patch("rally.task.engine.scenario.Scenario.validate",
@@ -230,8 +234,8 @@ class BenchmarkEngineTestCase(test.TestCase):
         eng = engine.BenchmarkEngine(mock.MagicMock(), mock.MagicMock())
 
         self.assertRaises(exceptions.InvalidBenchmarkConfig,
-                          eng._validate_config_semantic_helper, "a", "u", "n",
-                          "p", mock.MagicMock(), {})
+                          eng._validate_config_semantic_helper, "a", ["u"],
+                          "n", "p", mock.MagicMock(), {})
 
     @mock.patch("rally.task.engine.TaskConfig")
     @mock.patch("rally.task.engine.existing_users.ExistingUsers")
@@ -296,15 +300,75 @@ class BenchmarkEngineTestCase(test.TestCase):
         admin = user = mock_clients.return_value
         fake_deployment = mock_deployment_get.return_value
         expected_calls = [
-            mock.call(admin, user, "a", 0, fake_deployment,
-                      {"name": "a", "kw": 0}),
-            mock.call(admin, user, "a", 1, fake_deployment,
-                      {"name": "a", "kw": 1}),
-            mock.call(admin, user, "b", 0, fake_deployment,
-                      {"name": "b", "kw": 0})
+            mock.call(admin, [user], "a", 0, fake_deployment,
+                      {"name": "a", "kw": 0}, cache=mock.ANY),
+            mock.call(admin, [user], "a", 1, fake_deployment,
+                      {"name": "a", "kw": 1}, cache=mock.ANY),
+            mock.call(admin, [user], "b", 0, fake_deployment,
+                      {"name": "b", "kw": 0}, cache=mock.ANY)
         ]
         mock__validate_config_semantic_helper.assert_has_calls(
             expected_calls, any_order=True)
+        caches = set(c[1]["cache"] for c in
+                     mock__validate_config_semantic_helper.call_args_list)
+        self.assertEqual(1, len(caches))
+        self.assertIsInstance(caches.pop(), scenario.ValidationCache)
+
+    @mock.patch("rally.task.engine.TaskConfig")
+    @mock.patch("rally.task.engine.osclients.Clients")
+    @mock.patch("rally.task.engine.users_ctx")
+    @mock.patch("rally.task.engine.BenchmarkEngine"
+                "._validate_config_semantic_helper")
+    @mock.patch("rally.task.engine.objects.Deployment.get",
+                return_value="FakeDeployment")
+    def test__validate_config_semantic_reports_first_error(
+            self, mock_deployment_get,
+            mock__validate_config_semantic_helper,
+            mock_users_ctx, mock_clients, mock_task_config):
+        mock_users_ctx.UserGenerator = fakes.FakeUserContext
+        errors = dict((name, exceptions.InvalidBenchmarkConfig(
+            name=name, pos=0, config={}, reason="invalid"))
+            for name in ("b", "c"))
+
+        def validate(admin, users, name, pos, deployment, kwargs, cache):
+            if name in errors:
+                raise errors[name]
+
+        mock__validate_config_semantic_helper.side_effect = validate
+        mock_task_instance = mock.MagicMock()
+        mock_task_instance.subtasks = [
+            mock.MagicMock(scenarios=[{"name": "a"}]),
+            mock.MagicMock(scenarios=[{"name": "c"}, {"name": "b"}])]
+        eng = engine.BenchmarkEngine(mock_task_instance, mock.MagicMock())
+
+        exc = self.assertRaises(exceptions.InvalidBenchmarkConfig,
+                                eng._validate_config_semantic,
+                                mock_task_instance)
+        self.assertIs(errors["c"], exc)
+        self.assertEqual(3, mock__validate_config_semantic_helper.call_count)
+
+    @mock.patch("rally.task.engine.TaskConfig")
+    @mock.patch("rally.task.engine.osclients.Clients")
+    @mock.patch("rally.task.engine.users_ctx")
+    @mock.patch("rally.task.engine.BenchmarkEngine"
+                "._validate_config_semantic_helper")
+    @mock.patch("rally.task.engine.objects.Deployment.get",
+                return_value="FakeDeployment")
+    def test__validate_config_semantic_unexpected_error(
+            self, mock_deployment_get,
+            mock__validate_config_semantic_helper,
+            mock_users_ctx, mock_clients, mock_task_config):
+        mock_users_ctx.UserGenerator = fakes.FakeUserContext
+        error = KeyError("foo")
+        mock__validate_config_semantic_helper.side_effect = [None, error]
+        mock_task_instance = mock.MagicMock()
+        mock_task_instance.subtasks = [
+            mock.MagicMock(scenarios=[{"name": "a"}, {"name": "b"}])]
+        eng = engine.BenchmarkEngine(mock_task_instance, mock.MagicMock())
+
+        exc = self.assertRaises(KeyError, eng._validate_config_semantic,
+                                mock_task_instance)
+        self.assertIs(error, exc)
 
     @mock.patch("rally.common.objects.Task.get_status")
     @mock.patch("rally.task.engine.TaskConfig")
@@ -413,6 +477,117 @@ class BenchmarkEngineTestCase(test.TestCase):
         self.assertEqual(mock.call(consts.TaskStatus.ABORTED),
                          task.update_status.mock_calls[-1])
 
+    @mock.patch("rally.task.engine.BenchmarkEngine._run_subtask")
+    @mock.patch("rally.task.engine.BenchmarkEngine._run_subtasks_in_parallel")
+    @mock.patch("rally.common.objects.Task.get_status")
+    def test_run_in_parallel(self, mock_task_get_status,
+                             mock__run_subtasks_in_parallel,
+                             mock__run_subtask):
+        task = mock.MagicMock()
+        subtasks = [{"title": "s%d" % i, "run_in_parallel": in_parallel,
+                     "scenarios": [{"name": "a.benchmark",
+                                    "runner": {"type": "a"}}]}
+                    for i, in_parallel in enumerate(
+                        [True, True, False, True, False])]
+        eng = engine.BenchmarkEngine({"version": 2, "title": "t",
+                                      "subtasks": subtasks}, task)
+
+        eng.run()
+
+        self.assertEqual(
+            [["s0", "s1"]],
+            [[s.title for s in c[0][0]]
+             for c in mock__run_subtasks_in_parallel.call_args_list])
+        self.assertEqual(["s2", "s3", "s4"],
+                         [c[0][0].title
+                          for c in mock__run_subtask.call_args_list])
+        self.assertEqual(mock.call(consts.TaskStatus.FINISHED),
+                         task.update_status.mock_calls[-1])
+
+    @mock.patch("rally.task.engine.BenchmarkEngine._run_subtask")
+    @mock.patch("rally.task.engine.BenchmarkEngine._run_subtasks_in_parallel",
+                return_value=False)
+    def test_run_in_parallel_aborted(self, mock__run_subtasks_in_parallel,
+                                     mock__run_subtask):
+        task = mock.MagicMock()
+        subtasks = [{"title": "s%d" % i, "run_in_parallel": True,
+                     "scenarios": [{"name": "a.benchmark",
+                                    "runner": {"type": "a"}}]}
+                    for i in range(2)]
+        subtasks.append({"title": "s2", "scenarios": subtasks[0]["scenarios"]})
+        eng = engine.BenchmarkEngine({"version": 2, "title": "t",
+                                      "subtasks": subtasks}, task)
+
+        eng.run()
+
+        self.assertEqual(1, mock__run_subtasks_in_parallel.call_count)
+        self.assertFalse(mock__run_subtask.called)
+        self.assertEqual([mock.call(consts.TaskStatus.RUNNING)],
+                         task.update_status.mock_calls)
+
+    @mock.patch("rally.task.engine.CONF")
+    @mock.patch("rally.task.engine.multiprocessing.cpu_count",
+                return_value=8)
+    @mock.patch("rally.task.engine.BenchmarkEngine._run_subtask",
+                return_value=True)
+    @mock.patch("rally.task.engine.TaskConfig")
+    def test__run_subtasks_in_parallel(self, mock_task_config,
+                                       mock__run_subtask, mock_cpu_count,
+                                       mock_conf):
+        mock_conf.benchmark.max_parallel_subtasks = 3
+        subtasks = [mock.MagicMock() for i in range(5)]
+        eng = engine.BenchmarkEngine(mock.MagicMock(), mock.MagicMock())
+
+        self.assertTrue(eng._run_subtasks_in_parallel(subtasks))
+
+        self.assertEqual(5, mock__run_subtask.call_count)
+        mock__run_subtask.assert_has_calls(
+            [mock.call(s, 2) for s in subtasks], any_order=True)
+
+    @mock.patch("rally.task.engine.BenchmarkEngine._run_subtask")
+    @mock.patch("rally.task.engine.TaskConfig")
+    def test__run_subtasks_in_parallel_aborted(self, mock_task_config,
+                                               mock__run_subtask):
+        mock__run_subtask.side_effect = [True, False]
+        eng = engine.BenchmarkEngine(mock.MagicMock(), mock.MagicMock())
+
+        self.assertFalse(eng._run_subtasks_in_parallel(
+            [mock.MagicMock(), mock.MagicMock()]))
+
+    @mock.patch("rally.task.engine.BenchmarkEngine._run_subtask")
+    @mock.patch("rally.task.engine.TaskConfig")
+    def test__run_subtasks_in_parallel_exception(self, mock_task_config,
+                                                 mock__run_subtask):
+        mock__run_subtask.side_effect = [True, TestException()]
+        eng = engine.BenchmarkEngine(mock.MagicMock(), mock.MagicMock())
+
+        self.assertRaises(TestException, eng._run_subtasks_in_parallel,
+                          [mock.MagicMock(), mock.MagicMock()])
+
+    @mock.patch("rally.task.engine.TaskConfig")
+    @mock.patch("rally.task.engine.runner.ScenarioRunner.get")
+    def test__get_runner(self, mock_scenario_runner_get, mock_task_config):
+        runner_cls = mock_scenario_runner_get.return_value
+        runner_cls.CONFIG_SCHEMA = {"properties": {"max_cpu_count": {}}}
+        task = mock.MagicMock()
+        eng = engine.BenchmarkEngine(mock.MagicMock(), task)
+
+        eng._get_runner({"runner": {"type": "a"}})
+        eng._get_runner({"runner": {"type": "a"}}, max_cpu_count=2)
+        eng._get_runner({"runner": {"type": "a", "max_cpu_count": 1}},
+                        max_cpu_count=2)
+        eng._get_runner({"runner": {"type": "a", "max_cpu_count": 4}},
+                        max_cpu_count=2)
+        runner_cls.CONFIG_SCHEMA = {"properties": {}}
+        eng._get_runner({}, max_cpu_count=2)
+
+        self.assertEqual([
+            mock.call(task, {"type": "a"}),
+            mock.call(task, {"type": "a", "max_cpu_count": 2}),
+            mock.call(task, {"type": "a", "max_cpu_count": 1}),
+            mock.call(task, {"type": "a", "max_cpu_count": 2}),
+            mock.call(task, {"type": "serial"})], runner_cls.mock_calls)
+
     @mock.patch("rally.task.engine.TaskConfig")
     @mock.patch("rally.task.engine.scenario.Scenario.get")
     def test__prepare_context(self, mock_scenario_get, mock_task_config):
@@ -473,6 +648,12 @@ class BenchmarkEngineTestCase(test.TestCase):
 
 class ResultConsumerTestCase(test.TestCase):
 
+    def _make_queue(self, results):
+        result_queue = runner_module.ResultQueue()
+        for result in results:
+            result_queue.append(result)
+        return result_queue
+
     @mock.patch("rally.common.objects.Task.get_status")
     @mock.patch("rally.task.engine.ResultConsumer.wait_and_abort")
     @mock.patch("rally.task.sla.SLAChecker")
@@ -484,22 +665,219 @@ class ResultConsumerTestCase(test.TestCase):
         mock_task_get_status.return_value = consts.TaskStatus.RUNNING
         key = {"kw": {"fake": 2}, "name": "fake", "pos": 0}
         task = mock.MagicMock()
-        runner = mock.MagicMock()
+        runner = mock.MagicMock(config={})
 
         results = [
             {"duration": 1, "timestamp": 3},
             {"duration": 2, "timestamp": 2}
         ]
 
-        runner.result_queue = collections.deque(results)
+        runner.result_queue = self._make_queue(results)
         with engine.ResultConsumer(
                 key, task, runner, False) as consumer_obj:
             pass
 
         self.assertEqual(list(map(mock.call, results)),
                          mock_sla_instance.add_iteration.mock_calls)
-        self.assertEqual(sorted(results, key=lambda x: x["timestamp"]),
-                         consumer_obj.results)
+        self.assertEqual(0, len(consumer_obj.results))
+        task.create_results.assert_called_once_with(key)
+        results_id = task.create_results.return_value
+        task.append_results_chunk.assert_called_once_with(
+            results_id, 0, mock.ANY)
+        self.assertEqual(results,
+                         list(task.append_results_chunk.call_args[0][2]))
+        task.update_results.assert_called_once_with(results_id, {
+            "load_duration": runner.run_duration,
+            "full_duration": mock.ANY,
+            "sla": mock_sla_instance.results.return_value,
+            "summary": consumer_obj.summary.to_dict(),
+            "progress": mock.ANY})
+        self.assertFalse(task.append_results.called)
+        self.assertEqual(2, consumer_obj.summary.iterations_count)
+        self.assertEqual(2, consumer_obj.summary.tstamp_start)
+
+    @mock.patch("rally.task.engine.CONF")
+    @mock.patch("rally.common.objects.Task.get_status")
+    @mock.patch("rally.task.engine.ResultConsumer.wait_and_abort")
+    @mock.patch("rally.task.sla.SLAChecker")
+    def test_consume_results_in_chunks(
+            self, mock_sla_checker, mock_result_consumer_wait_and_abort,
+            mock_task_get_status, mock_conf):
+        mock_conf.benchmark.result_chunk_size = 2
+        mock_task_get_status.return_value = consts.TaskStatus.RUNNING
+        key = {"kw": {"fake": 2}, "name": "fake", "pos": 0}
+        task = mock.MagicMock()
+        runner = mock.MagicMock(config={})
+        results = [{"duration": 1, "timestamp": t} for t in (2, 1, 4, 3, 5)]
+        runner.result_queue = self._make_queue(results)
+
+        with engine.ResultConsumer(key, task, runner, False):
+            pass
+
+        results_id = task.create_results.return_value
+        self.assertEqual(
+            [(results_id, 0, results[0:2]),
+             (results_id, 1, results[2:4]),
+             (results_id, 2, results[4:])],
+            [(c[1][0], c[1][1], list(c[1][2]))
+             for c in task.append_results_chunk.mock_calls])
+        self.assertEqual(1, task.update_results.call_count)
+
+    @mock.patch("rally.task.engine.LOG")
+    @mock.patch("rally.task.engine.CONF")
+    @mock.patch("rally.common.objects.Task.get_status")
+    @mock.patch("rally.task.engine.ResultConsumer.wait_and_abort")
+    @mock.patch("rally.task.sla.SLAChecker")
+    def test_consume_results_store_chunk_failed(
+            self, mock_sla_checker, mock_result_consumer_wait_and_abort,
+            mock_task_get_status, mock_conf, mock_log):
+        mock_conf.benchmark.result_chunk_size = 1
+        mock_task_get_status.return_value = consts.TaskStatus.RUNNING
+        key = {"kw": {"fake": 2}, "name": "fake", "pos": 0}
+        task = mock.MagicMock()
+        task.append_results_chunk.side_effect = [TestException(), None]
+        runner = mock.MagicMock(config={})
+        results = [{"duration": 1, "timestamp": t} for t in (1, 2)]
+        runner.result_queue = self._make_queue(results)
+
+        with engine.ResultConsumer(key, task, runner, False):
+            pass
+
+        results_id = task.create_results.return_value
+        self.assertEqual(
+            [(results_id, 0, results), (results_id, 0, results)],
+            [(c[1][0], c[1][1], list(c[1][2]))
+             for c in task.append_results_chunk.mock_calls])
+        self.assertEqual(1, mock_log.exception.call_count)
+
+    @mock.patch("rally.task.engine.LOG")
+    @mock.patch("rally.task.engine.CONF")
+    @mock.patch("rally.common.objects.Task.get_status")
+    @mock.patch("rally.task.engine.ResultConsumer.wait_and_abort")
+    @mock.patch("rally.task.sla.SLAChecker")
+    def test_consume_results_store_last_chunk_retried(
+            self, mock_sla_checker, mock_result_consumer_wait_and_abort,
+            mock_task_get_status, mock_conf, mock_log):
+        mock_conf.benchmark.result_chunk_size = 10
+        mock_task_get_status.return_value = consts.TaskStatus.RUNNING
+        key = {"kw": {"fake": 2}, "name": "fake", "pos": 0}
+        task = mock.MagicMock()
+        task.append_results_chunk.side_effect = [TestException(), None]
+        runner = mock.MagicMock(config={})
+        results = [{"duration": 1, "timestamp": t} for t in (1, 2)]
+        runner.result_queue = self._make_queue(results)
+
+        with engine.ResultConsumer(key, task, runner, False):
+            pass
+
+        results_id = task.create_results.return_value
+        self.assertEqual(
+            [(results_id, 0, results), (results_id, 0, results)],
+            [(c[1][0], c[1][1], list(c[1][2]))
+             for c in task.append_results_chunk.mock_calls])
+        self.assertEqual(1, task.update_results.call_count)
+        self.assertFalse(
+            mock_sla_checker.return_value.set_unexpected_failure.called)
+
+    @mock.patch("rally.task.engine.LOG")
+    @mock.patch("rally.task.engine.CONF")
+    @mock.patch("rally.common.objects.Task.get_status")
+    @mock.patch("rally.task.engine.ResultConsumer.wait_and_abort")
+    @mock.patch("rally.task.sla.SLAChecker")
+    def test_consume_results_store_last_chunk_failed(
+            self, mock_sla_checker, mock_result_consumer_wait_and_abort,
+            mock_task_get_status, mock_conf, mock_log):
+        mock_conf.benchmark.result_chunk_size = 10
+        mock_task_get_status.return_value = consts.TaskStatus.RUNNING
+        mock_sla_instance = mock_sla_checker.return_value
+        key = {"kw": {"fake": 2}, "name": "fake", "pos": 0}
+        task = mock.MagicMock()
+        exc = TestException()
+        task.append_results_chunk.side_effect = exc
+        runner = mock.MagicMock(config={})
+        results = [{"duration": 1, "timestamp": t} for t in (1, 2)]
+        runner.result_queue = self._make_queue(results)
+
+        try:
+            with engine.ResultConsumer(key, task, runner, False):
+                pass
+        except TestException as e:
+            self.assertEqual(exc, e)
+        else:
+            self.fail("TestException is not raised")
+
+        self.assertEqual(2, task.append_results_chunk.call_count)
+        mock_sla_instance.set_unexpected_failure.assert_called_once_with(exc)
+        task.update_results.assert_called_once_with(
+            task.create_results.return_value, {
+                "load_duration": runner.run_duration,
+                "full_duration": mock.ANY,
+                "sla": mock_sla_instance.results.return_value,
+                "summary": mock.ANY,
+                "progress": mock.ANY})
+        self.assertEqual(2, mock_log.exception.call_count)
+
+    @mock.patch("rally.task.engine.CONF")
+    @mock.patch("rally.common.objects.Task.get_status")
+    @mock.patch("rally.task.engine.ResultConsumer.wait_and_abort")
+    @mock.patch("rally.task.sla.SLAChecker")
+    def test_consume_results_without_chunks(
+            self, mock_sla_checker, mock_result_consumer_wait_and_abort,
+            mock_task_get_status, mock_conf):
+        mock_conf.benchmark.result_chunk_size = 0
+        mock_task_get_status.return_value = consts.TaskStatus.RUNNING
+        key = {"kw": {"fake": 2}, "name": "fake", "pos": 0}
+        task = mock.MagicMock()
+        runner = mock.MagicMock(config={})
+        results = [{"duration": 1, "timestamp": t} for t in (2, 1)]
+        runner.result_queue = self._make_queue(results)
+
+        with engine.ResultConsumer(key, task, runner, False) as consumer_obj:
+            pass
+
+        task.append_results.assert_called_once_with(key, {
+            "raw": [results[1], results[0]],
+            "load_duration": runner.run_duration,
+            "full_duration": mock.ANY,
+            "sla": mock_sla_checker.return_value.results.return_value,
+            "summary": consumer_obj.summary.to_dict()})
+        self.assertFalse(task.create_results.called)
+
+    @mock.patch("rally.task.engine.LOG")
+    @mock.patch("rally.common.objects.Task.get_status")
+    @mock.patch("rally.task.engine.ResultConsumer.wait_and_abort")
+    @mock.patch("rally.task.sla.SLAChecker")
+    def test_consume_results_consumer_failed(
+            self, mock_sla_checker, mock_result_consumer_wait_and_abort,
+            mock_task_get_status, mock_log):
+        mock_task_get_status.return_value = consts.TaskStatus.RUNNING
+        mock_sla_instance = mock_sla_checker.return_value
+        exc = TestException()
+        mock_sla_instance.add_iteration.side_effect = exc
+        key = {"kw": {"fake": 2}, "name": "fake", "pos": 0}
+        task = mock.MagicMock()
+        runner = mock.MagicMock(config={})
+        runner.result_queue = runner_module.ResultQueue(max_size=1)
+
+        def run():
+            for i in range(5):
+                runner.result_queue.append({"duration": 1, "timestamp": i})
+
+        try:
+            with engine.ResultConsumer(key, task, runner, False):
+                # The runner is not blocked by the full queue after the
+                # consumer failure
+                run()
+        except TestException as e:
+            self.assertEqual(exc, e)
+        else:
+            self.fail("TestException is not raised")
+
+        self.assertEqual(1, mock_sla_instance.add_iteration.call_count)
+        runner.abort.assert_called_once_with()
+        mock_sla_instance.set_unexpected_failure.assert_called_once_with(exc)
+        self.assertEqual(1, task.update_results.call_count)
+        self.assertEqual(1, mock_log.exception.call_count)
 
     @mock.patch("rally.common.objects.Task.get_status")
     @mock.patch("rally.task.engine.ResultConsumer.wait_and_abort")
@@ -513,9 +891,9 @@ class ResultConsumerTestCase(test.TestCase):
                                                        False]
         key = {"kw": {"fake": 2}, "name": "fake", "pos": 0}
         task = mock.MagicMock()
-        runner = mock.MagicMock()
+        runner = mock.MagicMock(config={})
 
-        runner.result_queue = collections.deque(
+        runner.result_queue = self._make_queue(
             [{"duration": 1, "timestamp": 1}] * 4)
 
         with engine.ResultConsumer(key, task, runner, True):
@@ -530,7 +908,7 @@ class ResultConsumerTestCase(test.TestCase):
     def test_consume_results_abort_manually(self, mock_sla_checker,
                                             mock_event, mock_thread,
                                             mock_task_get_status):
-        runner = mock.MagicMock(result_queue=False)
+        runner = mock.MagicMock(config={}, result_queue=self._make_queue([]))
 
         is_done = mock.MagicMock()
         is_done.isSet.side_effect = (False, True)
@@ -562,8 +940,8 @@ class ResultConsumerTestCase(test.TestCase):
                                                        False]
         key = {"kw": {"fake": 2}, "name": "fake", "pos": 0}
         task = mock.MagicMock()
-        runner = mock.MagicMock()
-        runner.result_queue = collections.deque(
+        runner = mock.MagicMock(config={})
+        runner.result_queue = self._make_queue(
             [{"duration": 1, "timestamp": 4}] * 4)
 
         with engine.ResultConsumer(key, task, runner, False):
@@ -582,8 +960,8 @@ class ResultConsumerTestCase(test.TestCase):
         mock_sla_checker.return_value = mock_sla_instance
         key = {"kw": {"fake": 2}, "name": "fake", "pos": 0}
         task = mock.MagicMock()
-        runner = mock.MagicMock()
-        runner.result_queue = collections.deque([1])
+        runner = mock.MagicMock(config={})
+        runner.result_queue = self._make_queue([1])
         exc = TestException()
         try:
             with engine.ResultConsumer(key, task, runner, False):
@@ -594,6 +972,80 @@ class ResultConsumerTestCase(test.TestCase):
         mock_sla_instance.set_unexpected_failure.assert_has_calls(
             [mock.call(exc)])
 
+    @mock.patch("rally.task.engine.time.time")
+    @mock.patch("rally.task.sla.SLAChecker")
+    def test_get_progress(self, mock_sla_checker, mock_time):
+        runner = mock.MagicMock(config={"times": 10, "concurrency": 4})
+        runner.result_queue = self._make_queue([{"duration": 1}] * 2)
+        consumer = engine.ResultConsumer(
+            {"kw": {}, "name": "fake", "pos": 0}, mock.MagicMock(), runner,
+            False)
+        consumer.start = 100.0
+        for i in range(4):
+            consumer.summary.add({"duration": i + 1, "timestamp": i,
+                                  "error": ["Error"] if i == 3 else []})
+
+        mock_time.return_value = 102.0
+        progress = consumer.get_progress()
+
+        self.assertEqual(
+            {"iterations_done": 4, "iterations_total": 10,
+             "iterations_failed": 1, "queue_depth": 2, "error_rate": 0.25,
+             "rate": 2.0, "duration_p50": mock.ANY,
+             "duration_p95": mock.ANY, "elapsed": 2.0, "timestamp": 102.0},
+            progress)
+        self.assertAlmostEqual(2, progress["duration_p50"], delta=0.02)
+        self.assertAlmostEqual(2.9, progress["duration_p95"], delta=0.02)
+
+        for i in range(5):
+            consumer.summary.add({"duration": 1, "timestamp": i,
+                                  "error": []})
+        runner.result_queue.popleft()
+        mock_time.return_value = 112.0
+        progress = consumer.get_progress()
+
+        self.assertEqual(9, progress["iterations_done"])
+        self.assertEqual(1, progress["queue_depth"])
+        self.assertEqual(0.5, progress["rate"])
+        self.assertEqual(12.0, progress["elapsed"])
+
+    @mock.patch("rally.task.sla.SLAChecker")
+    def test_get_progress_without_times(self, mock_sla_checker):
+        consumer = engine.ResultConsumer(
+            {"kw": {}, "name": "fake", "pos": 0}, mock.MagicMock(),
+            mock.MagicMock(config={"duration": 10}), False)
+        consumer.start = 0.0
+
+        progress = consumer.get_progress()
+
+        self.assertIsNone(progress["iterations_total"])
+        self.assertIsNone(progress["duration_p50"])
+        self.assertEqual(0, progress["iterations_done"])
+        self.assertEqual(0.0, progress["error_rate"])
+
+    @mock.patch("rally.task.engine.threading.Thread")
+    @mock.patch("rally.task.engine.threading.Event")
+    @mock.patch("rally.common.objects.Task.get_status")
+    @mock.patch("rally.task.engine.time.sleep")
+    @mock.patch("rally.task.sla.SLAChecker")
+    def test_wait_and_abort_updates_progress(
+            self, mock_sla_checker, mock_sleep, mock_task_get_status,
+            mock_event, mock_thread):
+        task = mock.MagicMock()
+        mock_task_get_status.return_value = consts.TaskStatus.RUNNING
+        mock_event.return_value.isSet.side_effect = [False, False, True]
+
+        res = engine.ResultConsumer(
+            {"kw": {}, "name": "fake", "pos": 0}, task,
+            mock.MagicMock(config={}), True)
+        res.start = 0.0
+        res.results_id = 42
+        task.update_progress.side_effect = [Exception, None]
+        res.wait_and_abort()
+
+        self.assertEqual([mock.call(42, mock.ANY)] * 2,
+                         task.update_progress.mock_calls)
+
     @mock.patch("rally.task.engine.threading.Thread")
     @mock.patch("rally.task.engine.threading.Event")
     @mock.patch("rally.common.objects.Task.get_status")
@@ -724,3 +1176,11 @@ class TaskTestCase(test.TestCase):
         mock_sub_task.assert_has_calls([
             mock.call(subtask_conf1),
             mock.call(subtask_conf2)])
+
+    def test_subtask(self):
+        subtask = engine.SubTask({"title": "a", "scenarios": [{"s": 1}]})
+        self.assertFalse(subtask.run_in_parallel)
+
+        subtask = engine.SubTask({"title": "a", "run_in_parallel": True,
+                                  "scenarios": [{"s": 1}]})
+        self.assertTrue(subtask.run_in_parallel)
@@ -15,9 +15,11 @@
 
 import collections
 import multiprocessing
+import threading
 
 import jsonschema
 import mock
+from six import moves
 
 from rally.plugins.common.runners import serial
 from rally.task import runner
@@ -59,6 +61,38 @@ class ScenarioRunnerHelpersTestCase(test.TestCase):
         mock_context_manager.assert_called_once_with(mock_context_obj)
         mock_map_for_scenario.assert_called_once_with()
 
+    @mock.patch(BASE + "context.ContextManager")
+    def test_get_scenario_context_reuses_manager(self, mock_context_manager):
+        mock_context_manager.side_effect = (
+            lambda ctx: mock.MagicMock(context_obj=ctx))
+        context_obj = {"task": {"uuid": "uuid1"}}
+        other_context_obj = {"task": {"uuid": "uuid2"}}
+
+        runner._get_scenario_context(context_obj)
+        runner._get_scenario_context(context_obj)
+        runner._get_scenario_context(other_context_obj)
+
+        self.assertEqual(
+            [mock.call(context_obj), mock.call(other_context_obj)],
+            mock_context_manager.mock_calls)
+
+    def test__warm_up(self):
+        scenario_cls = mock.MagicMock()
+        context = {"users": []}
+
+        runner._warm_up(scenario_cls, context)
+
+        scenario_cls.warm_up.assert_called_once_with(context)
+
+    @mock.patch(BASE + "LOG")
+    def test__warm_up_failed(self, mock_log):
+        scenario_cls = mock.MagicMock()
+        scenario_cls.warm_up.side_effect = ValueError("foo")
+
+        runner._warm_up(scenario_cls, {})
+
+        self.assertTrue(mock_log.warning.called)
+
     def test_run_scenario_once_internal_logic(self):
         context = runner._get_scenario_context(
             fakes.FakeContext({}).context)
@@ -124,6 +158,77 @@ class ScenarioRunnerHelpersTestCase(test.TestCase):
                          ["Exception", "Something went wrong"])
 
 
+class ResultQueueTestCase(test.TestCase):
+
+    def test_append_and_popleft(self):
+        result_queue = runner.ResultQueue()
+        result_queue.append(1)
+        result_queue.append(2)
+
+        self.assertEqual(2, len(result_queue))
+        self.assertEqual([1, 2], list(result_queue))
+        self.assertEqual(1, result_queue.popleft())
+        self.assertEqual(2, result_queue.popleft())
+        self.assertRaises(IndexError, result_queue.popleft, block=False)
+
+    def test_popleft_closed(self):
+        result_queue = runner.ResultQueue()
+        result_queue.append(1)
+        result_queue.close()
+
+        self.assertEqual(1, result_queue.popleft())
+        self.assertRaises(IndexError, result_queue.popleft)
+
+    def test_append_throttled(self):
+        result_queue = runner.ResultQueue(max_size=2)
+        producer = threading.Thread(
+            target=lambda: [result_queue.append(i) for i in range(5)])
+        producer.start()
+
+        consumed = [result_queue.popleft() for i in range(5)]
+        producer.join()
+
+        self.assertEqual(list(range(5)), consumed)
+        self.assertEqual(2, result_queue.stats()["max_depth"])
+
+    def test_append_closed_is_not_throttled(self):
+        result_queue = runner.ResultQueue(max_size=1)
+        result_queue.append(1)
+        result_queue.close()
+        result_queue.append(2)
+
+        self.assertEqual([1, 2], list(result_queue))
+
+    def test_close_discard(self):
+        result_queue = runner.ResultQueue(max_size=1)
+        result_queue.append(1)
+        blocked = threading.Thread(target=result_queue.append, args=(2,))
+        blocked.start()
+
+        result_queue.close(discard=True)
+        blocked.join()
+        result_queue.append(3)
+
+        self.assertEqual([], list(result_queue))
+        self.assertRaises(IndexError, result_queue.popleft)
+
+    def test_stats(self):
+        result_queue = runner.ResultQueue()
+        self.assertEqual({"max_depth": 0, "throttled": 0.0,
+                          "consume_latency_avg": 0.0,
+                          "consume_latency_max": 0.0},
+                         result_queue.stats())
+
+        result_queue.append(1)
+        result_queue.append(2)
+        result_queue.popleft()
+
+        stats = result_queue.stats()
+        self.assertEqual(2, stats["max_depth"])
+        self.assertGreaterEqual(stats["consume_latency_max"],
+                                stats["consume_latency_avg"])
+
+
 class ScenarioRunnerResultTestCase(test.TestCase):
 
     def test_validate(self):
@@ -185,6 +290,7 @@ class ScenarioRunnerTestCase(test.TestCase):
 
         self.assertEqual(result, mock_timer_duration.return_value)
         self.assertEqual(list(runner_obj.result_queue), [])
+        self.assertEqual(10000, runner_obj.result_queue.max_size)
 
         cls_name, method_name = scenario_name.split(".", 1)
         cls = scenario.Scenario.get(scenario_name)._meta_get("cls_ref")
@@ -193,6 +299,22 @@ class ScenarioRunnerTestCase(test.TestCase):
         runner_obj._run_scenario.assert_called_once_with(
             cls, method_name, context_obj, expected_config_kwargs)
 
+    @mock.patch(BASE + "types.preprocess")
+    @mock.patch(BASE + "scenario.Scenario.get")
+    def test_run_clears_warm_up_and_context(self, mock_scenario_get,
+                                            mock_preprocess):
+        runner_obj = serial.SerialScenarioRunner(mock.MagicMock(),
+                                                 mock.MagicMock())
+        runner_obj._run_scenario = mock.MagicMock(side_effect=ValueError)
+        cls = mock_scenario_get.return_value._meta_get.return_value
+
+        self.addCleanup(runner._context_managers.clear)
+        runner._context_managers[42] = mock.MagicMock()
+
+        self.assertRaises(ValueError, runner_obj.run, "Foo.bar", {}, {})
+        cls.clear_warm_up.assert_called_once_with()
+        self.assertEqual({}, runner._context_managers)
+
     def test_runner_send_result_exception(self):
         runner_obj = serial.SerialScenarioRunner(
             mock.MagicMock(),
@@ -233,7 +355,7 @@ class ScenarioRunnerTestCase(test.TestCase):
         processes = 10
         process_pool = collections.deque([process] * processes)
         mock_result_queue = mock.MagicMock(
-            empty=mock.MagicMock(return_value=True))
+            get=mock.MagicMock(side_effect=moves.queue.Empty))
 
         runner_obj = serial.SerialScenarioRunner(
             mock.MagicMock(),
@@ -243,3 +365,109 @@ class ScenarioRunnerTestCase(test.TestCase):
 
         self.assertEqual(processes, process.join.call_count)
         mock_result_queue.close.assert_called_once_with()
+        self.assertFalse(mock_scenario_runner__send_result.called)
+        self.assertIsNone(runner_obj.collector_lag())
+
+    @mock.patch(BASE + "time.time", return_value=15)
+    @mock.patch(BASE + "ScenarioRunner._send_result")
+    def test__join_processes_collects_results(
+            self, mock_scenario_runner__send_result, mock_time):
+        process = mock.MagicMock(is_alive=mock.MagicMock(return_value=False))
+        process_pool = collections.deque([process])
+        results = [{"timestamp": 10, "duration": 1, "idle_duration": 0},
+                   {"timestamp": 10, "duration": 3, "idle_duration": 1},
+                   {"duration": 10, "idle_duration": 0}]
+        result_queue = moves.queue.Queue()
+        for result in results:
+            result_queue.put(result)
+
+        runner_obj = serial.SerialScenarioRunner(
+            mock.MagicMock(),
+            mock.MagicMock())
+
+        runner_obj._join_processes(process_pool, mock.MagicMock(
+            get=result_queue.get, get_nowait=result_queue.get_nowait))
+
+        self.assertEqual([mock.call(r) for r in results],
+                         mock_scenario_runner__send_result.call_args_list)
+        self.assertEqual({"avg": 2.5, "max": 4.0, "count": 2},
+                         runner_obj.collector_lag())
+
+    @mock.patch(BASE + "_wait_for_objects")
+    @mock.patch(BASE + "ScenarioRunner._send_result")
+    def test__join_processes_reaps_any_finished_process(
+            self, mock_scenario_runner__send_result, mock__wait_for_objects):
+        if not hasattr(multiprocessing.Process, "sentinel"):
+            self.skipTest("Process sentinels are not supported")
+        head = mock.MagicMock(is_alive=mock.MagicMock(
+            side_effect=[True, False]))
+        tail = mock.MagicMock(is_alive=mock.MagicMock(return_value=False))
+        process_pool = collections.deque([head, tail])
+        result_queue = multiprocessing.Queue()
+        pools = []
+        mock__wait_for_objects.side_effect = (
+            lambda objects: pools.append(list(process_pool)))
+
+        runner_obj = serial.SerialScenarioRunner(
+            mock.MagicMock(),
+            mock.MagicMock())
+
+        runner_obj._join_processes(process_pool, result_queue)
+
+        # The finished tail process is joined while the head one is alive
+        self.assertEqual([[head, tail], [head]], pools)
+        self.assertEqual(
+            [mock.call([result_queue._reader, head.sentinel, tail.sentinel]),
+             mock.call([result_queue._reader, head.sentinel])],
+            mock__wait_for_objects.call_args_list)
+        tail.join.assert_called_once_with()
+        head.join.assert_called_once_with()
+        self.assertFalse(mock_scenario_runner__send_result.called)
+
+    def test__get_queue_reader(self):
+        self.assertIsNone(runner._get_queue_reader(moves.queue.Queue()))
+        result_queue = multiprocessing.Queue()
+        if runner._wait_for_objects is None:
+            self.assertIsNone(runner._get_queue_reader(result_queue))
+            return
+        self.assertEqual(result_queue._reader,
+                         runner._get_queue_reader(result_queue))
+        del result_queue._reader
+        self.assertIsNone(runner._get_queue_reader(result_queue))
+
+    def test__join_processes_real_processes(self):
+        result_queue = multiprocessing.Queue()
+
+        def worker_process(i, info):
+            result_queue.put({"duration": i, "idle_duration": 0})
+
+        runner_obj = serial.SerialScenarioRunner(
+            mock.MagicMock(),
+            mock.MagicMock())
+        process_pool = runner_obj._create_process_pool(
+            3, worker_process, ((i,) for i in range(3)))
+
+        runner_obj._join_processes(process_pool, result_queue)
+
+        self.assertEqual(0, len(process_pool))
+        self.assertEqual([0, 1, 2], sorted(r["duration"]
+                                           for r in runner_obj.result_queue))
+
+    @mock.patch(BASE + "ScenarioRunner._send_result")
+    def test__collect_results_batch_size(
+            self, mock_scenario_runner__send_result):
+        result_queue = moves.queue.Queue()
+        for i in range(5):
+            result_queue.put({"duration": i, "idle_duration": 0})
+
+        runner_obj = serial.SerialScenarioRunner(
+            mock.MagicMock(),
+            mock.MagicMock())
+        runner_obj.COLLECTOR_BATCH_SIZE = 3
+
+        self.assertEqual(3, runner_obj._collect_results(result_queue,
+                                                        block=False))
+        self.assertEqual(2, runner_obj._collect_results(result_queue,
+                                                        block=False))
+        self.assertEqual(0, runner_obj._collect_results(result_queue,
+                                                        block=False))
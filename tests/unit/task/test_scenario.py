@@ -14,6 +14,7 @@
 #    under the License.
 
 import traceback
+import uuid
 
 import mock
 
@@ -104,6 +105,66 @@ class ScenarioTestCase(test.TestCase):
                           scenario.Scenario._validate_helper,
                           validators, clients, args, "fake_uuid")
 
+    def _validator(self, result=True, user_invariant=False,
+                   config_invariant=False):
+        return mock.MagicMock(
+            return_value=validation.ValidationResult(result, "msg"),
+            cache_key=(str(uuid.uuid4()), "()", "[]"),
+            user_invariant=user_invariant, config_invariant=config_invariant)
+
+    def _clients(self, tenant_name):
+        return mock.MagicMock(endpoint=mock.MagicMock(
+            auth_url="url", tenant_name=tenant_name, region_name=None,
+            permission=consts.EndpointPermission.USER))
+
+    def test__validate_helper_with_cache(self):
+        cache = scenario.ValidationCache()
+        validator = self._validator()
+        user_invariant = self._validator(user_invariant=True)
+        config_invariant = self._validator(config_invariant=True)
+        validators = [validator, user_invariant, config_invariant]
+
+        for tenant, config in (("t1", {"a": 1}), ("t1", {"a": 1}),
+                               ("t2", {"a": 1}), ("t1", {"a": 2})):
+            scenario.Scenario._validate_helper(
+                validators, self._clients(tenant), config, "deployment",
+                cache)
+
+        # a call per tenant and config
+        self.assertEqual(3, validator.call_count)
+        # a call per config
+        self.assertEqual(2, user_invariant.call_count)
+        # a call per tenant
+        self.assertEqual(2, config_invariant.call_count)
+        self.assertEqual(7, cache.calls)
+        self.assertEqual(5, cache.hits)
+
+    def test__validate_helper_with_cache_no_valid(self):
+        cache = scenario.ValidationCache()
+        validator = self._validator(result=False)
+
+        for i in range(2):
+            self.assertRaises(exceptions.InvalidScenarioArgument,
+                              scenario.Scenario._validate_helper,
+                              [validator], self._clients("t"), {}, None,
+                              cache)
+        validator.assert_called_once_with(
+            {}, clients=mock.ANY, deployment=None)
+
+    def test__validate_helper_with_cache_exception(self):
+        cache = scenario.ValidationCache()
+        validator = self._validator()
+        validator.side_effect = Exception("fail")
+        not_cached = mock.MagicMock(side_effect=Exception, cache_key=None)
+
+        for i in range(2):
+            for v in (validator, not_cached):
+                self.assertRaises(exceptions.InvalidScenarioArgument,
+                                  scenario.Scenario._validate_helper,
+                                  [v], self._clients("t"), {}, None, cache)
+        self.assertEqual(1, validator.call_count)
+        self.assertEqual(2, not_cached.call_count)
+
     @mock.patch("rally.task.scenario.Scenario.get")
     def test_validate__no_validators(self, mock_scenario_get):
 
@@ -144,7 +205,7 @@ class ScenarioTestCase(test.TestCase):
         scenario.Scenario.validate("Testing.validate_admin_validators",
                                    args, admin="admin", deployment=deployment)
         mock_scenario__validate_helper.assert_called_once_with(
-            validators, "admin", args, deployment)
+            validators, "admin", args, deployment, None)
 
         Testing.validate_admin_validators.unregister()
 
@@ -171,8 +232,8 @@ class ScenarioTestCase(test.TestCase):
             "Testing.validate_user_validators", args, users=["u1", "u2"])
 
         mock_scenario__validate_helper.assert_has_calls([
-            mock.call(validators, "u1", args, None),
-            mock.call(validators, "u2", args, None)
+            mock.call(validators, "u1", args, None, None),
+            mock.call(validators, "u2", args, None, None)
         ])
 
         Testing.validate_user_validators.unregister()
@@ -55,6 +55,29 @@ class ValidationUtilsTestCase(test.TestCase):
             ("conf", "client", "deploy", "a", "b", "c", 1),
             scenario._meta_get("validators")[0]("conf", "client", "deploy"))
 
+    def test_validator_invariant(self):
+
+        @plugin.from_func()
+        def scenario():
+            pass
+
+        scenario._meta_init()
+
+        @validation.validator
+        @validation.invariant(user=True)
+        def validator_func(config, clients, deployment, a, b=None):
+            pass
+
+        validator_func("a", b=[1])(scenario)
+        validator_func("a", b=[2])(scenario)
+        first, second = scenario._meta_get("validators")
+
+        self.assertTrue(first.user_invariant)
+        self.assertFalse(first.config_invariant)
+        self.assertEqual(("%s.validator_func" % __name__, "('a',)",
+                          "[('b', [1])]"), first.cache_key)
+        self.assertNotEqual(first.cache_key, second.cache_key)
+
 
 @ddt.ddt
 class ValidatorsTestCase(test.TestCase):
@@ -22,6 +22,7 @@ from oslotest import base
 from oslotest import mockpatch
 
 from rally.common import db
+from rally import osclients
 from rally import plugins
 from tests.unit import fakes
 
@@ -43,6 +44,7 @@ class TestCase(base.BaseTestCase):
     def setUp(self):
         super(TestCase, self).setUp()
         self.addCleanup(mock.patch.stopall)
+        self.addCleanup(osclients.AUTH_CACHE.clear)
         plugins.load()
 
     def _test_atomic_action_timer(self, atomic_actions, name):
@@ -13,6 +13,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import os
+import threading
+
 import ddt
 from keystoneclient.auth import token_endpoint
 from keystoneclient import exceptions as keystone_exceptions
@@ -76,6 +79,122 @@ class CachedTestCase(test.TestCase):
         self.assertEqual({}, clients.cache)
 
 
+class AuthCacheTestCase(test.TestCase):
+
+    def setUp(self):
+        super(AuthCacheTestCase, self).setUp()
+        self.cache = osclients.AuthCache()
+
+    def _client(self, expires_soon=False):
+        client = mock.MagicMock()
+        client.auth_ref.will_expire_soon.return_value = expires_soon
+        return client
+
+    def test_get_client(self):
+        create = mock.MagicMock(side_effect=lambda kw: self._client())
+
+        client = self.cache.get_client({"username": "foo"}, create)
+
+        self.assertEqual(client,
+                         self.cache.get_client({"username": "foo"}, create))
+        self.assertNotEqual(client,
+                            self.cache.get_client({"username": "bar"}, create))
+        self.assertEqual([mock.call({"username": "foo"}),
+                          mock.call({"username": "bar"})],
+                         create.call_args_list)
+        self.assertEqual(2, self.cache.authentications)
+        self.assertEqual(1, self.cache.hits)
+        client.auth_ref.will_expire_soon.assert_called_once_with(
+            cfg.CONF.keystone_token_stale_duration)
+
+    def test_get_client_token_expires(self):
+        clients = [self._client(expires_soon=True), self._client()]
+        create = mock.MagicMock(side_effect=clients)
+
+        self.assertEqual(clients[0], self.cache.get_client({}, create))
+        self.assertEqual(clients[1], self.cache.get_client({}, create))
+        self.assertEqual(clients[1], self.cache.get_client({}, create))
+        self.assertEqual(2, self.cache.authentications)
+        self.assertEqual(1, self.cache.hits)
+
+    def test_get_client_authenticates_once(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def create(kwargs):
+            started.set()
+            release.wait(5)
+            return self._client()
+
+        results = []
+        threads = [threading.Thread(
+            target=lambda: results.append(self.cache.get_client({}, create)))
+            for i in range(5)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(5, len(results))
+        self.assertEqual(1, len(set(map(id, results))))
+        self.assertEqual(1, self.cache.authentications)
+        self.assertEqual(4, self.cache.hits)
+
+    def test_get_client_failed(self):
+        create = mock.MagicMock(side_effect=[ValueError, self._client()])
+
+        self.assertRaises(ValueError, self.cache.get_client, {}, create)
+        self.cache.get_client({}, create)
+        self.assertEqual(1, self.cache.authentications)
+
+    def test_url_for(self):
+        client = mock.MagicMock()
+        url_for = client.service_catalog.url_for
+
+        self.assertEqual(url_for.return_value,
+                         self.cache.url_for(client, service_type="foo"))
+        self.cache.url_for(client, service_type="foo")
+        self.cache.url_for(client, service_type="bar")
+
+        self.assertEqual([mock.call(service_type="foo"),
+                          mock.call(service_type="bar")],
+                         url_for.call_args_list)
+
+    def test_clear(self):
+        create = mock.MagicMock(side_effect=lambda kw: self._client())
+        client = self.cache.get_client({}, create)
+        self.cache.url_for(client, service_type="foo")
+
+        self.cache.clear()
+        self.cache.get_client({}, create)
+        self.cache.url_for(client, service_type="foo")
+
+        self.assertEqual(2, create.call_count)
+        self.assertEqual(2, client.service_catalog.url_for.call_count)
+        self.assertEqual(1, self.cache.authentications)
+        self.assertEqual(0, self.cache.hits)
+
+    def test_get_client_in_forked_process(self):
+        create = mock.MagicMock(side_effect=lambda kw: self._client())
+        client = self.cache.get_client({}, create)
+        self.cache.url_for(client, service_type="foo")
+
+        with mock.patch("rally.osclients.os.getpid",
+                        return_value=os.getpid() + 1):
+            forked_client = self.cache.get_client({}, create)
+            self.assertEqual(forked_client, self.cache.get_client({}, create))
+            self.cache.url_for(client, service_type="foo")
+
+        self.assertNotEqual(client, forked_client)
+        self.assertEqual(2, create.call_count)
+        self.assertEqual(2, client.service_catalog.url_for.call_count)
+        self.assertEqual(1, self.cache.authentications)
+        self.assertEqual(1, self.cache.hits)
+
+
 class TestCreateKeystoneClient(test.TestCase):
 
     def setUp(self):
@@ -227,6 +346,40 @@ class OSClientsTestCase(test.TestCase):
         self.mock_create_keystone_client.assert_called_once_with(kwargs)
         self.assertEqual(self.fake_keystone, self.clients.cache["keystone"])
 
+    def test_keystone_shared(self):
+        self.fake_keystone.auth_ref.will_expire_soon.return_value = False
+        clients = osclients.Clients(
+            objects.Endpoint("http://auth_url", "use", "pass", "tenant"), {})
+
+        self.assertEqual(self.fake_keystone, self.clients.keystone())
+        self.assertEqual(self.fake_keystone, clients.keystone())
+        self.assertEqual(1, self.mock_create_keystone_client.call_count)
+        self.assertEqual(1, osclients.AUTH_CACHE.hits)
+        self.assertEqual(1, osclients.AUTH_CACHE.authentications)
+
+    def test_clear_if_token_expires(self):
+        self.clients.clear_if_token_expires()
+        self.clients.keystone()
+        self.clients.cache["nova"] = "nova"
+
+        self.fake_keystone.auth_ref.will_expire_soon.return_value = False
+        self.clients.clear_if_token_expires()
+        self.assertEqual("nova", self.clients.cache["nova"])
+
+        self.fake_keystone.auth_ref.will_expire_soon.return_value = True
+        self.clients.clear_if_token_expires()
+        self.assertEqual({}, self.clients.cache)
+
+    def test_clear_if_token_expires_in_forked_process(self):
+        self.fake_keystone.auth_ref.will_expire_soon.return_value = False
+        self.clients.keystone()
+
+        with mock.patch("rally.osclients.os.getpid",
+                        return_value=os.getpid() + 1):
+            self.clients.clear_if_token_expires()
+
+        self.assertEqual({}, self.clients.cache)
+
     @mock.patch("rally.osclients.Keystone.create_client")
     def test_verified_keystone_user_not_admin(self,
                                               mock_keystone_create_client):